@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Framing codec benchmark suite with regression thresholds.
+
+Sweeps tx size x frame_payload_bytes x group_size x parity mode x loss rate
+(x output format) and measures, per case:
+
+  encode_mbps / decode_mbps   tx bytes per second through encode_frames / decode_frames
+  parse_fps                   frames per second through parse_frame alone
+  peak_kib                    tracemalloc peak over one encode + decode
+  overhead                    bytes on air / tx bytes (frame text + newline)
+  recovered                   whether the tx survived the simulated loss
+
+Usage (from the repo root):
+  python -m benchmarks.bench_codec [--quick] [--output results.json]
+  python -m benchmarks.bench_codec --quick --compare baseline.json [--time-threshold 0.35] [--threshold 0.25]
+
+Timings are the best of --repeat rounds, the encode/decode/parse rounds
+taking turns; the gap between the best and the median round is kept as
+that metric's noise.
+
+--compare exits with status 1 when a case present in both runs got slower
+(throughput down by more than --time-threshold plus the noise either run
+measured), hungrier (peak memory up) or fatter (overhead up) by more than
+--threshold, or stopped recovering. Keep baselines per machine.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Dict, List
+
+from courier.channel import PARITY_MODES
+from courier.foundry_courier import decode_frames, encode_frames, parse_frame
+
+HIGHER_IS_BETTER = ("encode_mbps", "decode_mbps", "parse_fps")
+LOWER_IS_BETTER = ("peak_kib", "overhead")
+
+FULL = {"sizes": [200, 4096, 65536, 1048576], "frame_sizes": [64, 128], "group_sizes": [8, 16],
+        "parity": ["none", "xor", "rs2", "il", "2d"], "loss": [0.0, 0.05], "formats": ["v1"]}
+QUICK = {"sizes": [200, 4096, 65536], "frame_sizes": [64], "group_sizes": [8],
+         "parity": ["none", "xor", "rs2"], "loss": [0.0, 0.05], "formats": ["v1"]}
+
+
+def case_key(case: Dict[str, object]) -> str:
+    return "{size}B/f{frame_size}/g{group_size}/{parity}/loss{loss}/{fmt}".format(**case)
+
+
+def _round(fn, min_time: float) -> float:
+    """Per-call seconds of fn over one round of at least min_time."""
+    n = 0
+    t0 = time.perf_counter()
+    while True:
+        fn()
+        n += 1
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            return elapsed / n
+
+
+def _timings(fns: Dict[str, object], min_time: float = 0.2, repeat: int = 5) -> Dict[str, List[float]]:
+    """Per-call seconds of each fn for repeat rounds, the fns taking turns so drift hits them all alike."""
+    out: Dict[str, List[float]] = {name: [] for name in fns}
+    for _ in range(max(1, repeat)):
+        for name, fn in fns.items():
+            out[name].append(_round(fn, min_time))
+    return out
+
+
+def _noise(rounds: List[float]) -> float:
+    """How far the median round is from the best, relative to the median: the run's own jitter."""
+    return 1 - min(rounds) / statistics.median(rounds)
+
+
+def _lossy(frames: List[str], loss: float, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    return [f for f in frames if rng.random() >= loss]
+
+
+def run_case(size: int, frame_size: int, group_size: int, parity: str, loss: float, fmt: str,
+             min_time: float = 0.2, repeat: int = 5) -> Dict[str, object]:
+    raw = random.Random(size).randbytes(size)
+    tx_hex = raw.hex()
+    opts = dict(frame_payload_bytes=frame_size, group_size=group_size, fmt=fmt, **PARITY_MODES[parity])
+    frames = encode_frames(tx_hex, **opts)
+    received = _lossy(frames, loss, seed=size ^ frame_size ^ group_size)
+
+    rounds = _timings({"encode_mbps": lambda: encode_frames(tx_hex, **opts),
+                       "decode_mbps": lambda: decode_frames(received),
+                       "parse_fps": lambda: [parse_frame(f) for f in frames]}, min_time, repeat)
+    t_enc, t_dec, t_parse = (min(rounds[m]) for m in HIGHER_IS_BETTER)
+
+    tracemalloc.start()
+    decode_frames(encode_frames(tx_hex, **opts))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "size": size, "frame_size": frame_size, "group_size": group_size, "parity": parity,
+        "loss": loss, "fmt": fmt,
+        "frames": len(frames),
+        "encode_mbps": size / t_enc / 1e6,
+        "decode_mbps": size / t_dec / 1e6,
+        "parse_fps": len(frames) / t_parse,
+        "peak_kib": peak / 1024,
+        "overhead": sum(len(f) + 1 for f in frames) / size,
+        "recovered": decode_frames(received) == raw,
+        "noise": {metric: _noise(r) for metric, r in rounds.items()},
+    }
+
+
+def run_suite(grid: Dict[str, list], min_time: float = 0.2, repeat: int = 5, progress=sys.stderr) -> Dict[str, object]:
+    results = []
+    for size, frame_size, group_size, parity, loss, fmt in itertools.product(
+            grid["sizes"], grid["frame_sizes"], grid["group_sizes"], grid["parity"], grid["loss"], grid["formats"]):
+        res = run_case(size, frame_size, group_size, parity, loss, fmt, min_time, repeat)
+        results.append(res)
+        if progress:
+            print(f"{case_key(res):<36} enc {res['encode_mbps']:8.2f} MB/s  dec {res['decode_mbps']:8.2f} MB/s  "
+                  f"parse {res['parse_fps']:>9.0f} f/s  peak {res['peak_kib']:9.1f} KiB  "
+                  f"x{res['overhead']:.2f}  {'ok' if res['recovered'] else 'LOST'}", file=progress)
+    return {
+        "meta": {"python": platform.python_version(), "machine": platform.machine(),
+                 "platform": platform.platform(), "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "cpus": os.cpu_count()},
+        "grid": grid,
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, object], current: Dict[str, object], threshold: float = 0.25,
+            time_threshold: float = 0.35) -> List[str]:
+    """
+    Human-readable regressions of current against baseline (empty when within
+    tolerance). Timings (HIGHER_IS_BETTER) may drop by time_threshold plus the
+    larger jitter either run measured for that metric; peak memory and
+    overhead, which do not jitter, by threshold.
+    """
+    old = {case_key(r): r for r in baseline["results"]}
+    problems = []
+    for new in current["results"]:
+        key = case_key(new)
+        ref = old.get(key)
+        if ref is None:
+            continue
+        for metric in HIGHER_IS_BETTER:
+            noise = max(ref.get("noise", {}).get(metric, 0.0), new.get("noise", {}).get(metric, 0.0))
+            if new[metric] < ref[metric] * (1 - min(0.95, time_threshold + noise)):
+                problems.append(f"{key}: {metric} {ref[metric]:.4g} -> {new[metric]:.4g}")
+        for metric in LOWER_IS_BETTER:
+            if new[metric] > ref[metric] * (1 + threshold):
+                problems.append(f"{key}: {metric} {ref[metric]:.4g} -> {new[metric]:.4g}")
+        if ref["recovered"] and not new["recovered"]:
+            problems.append(f"{key}: no longer recovered")
+    return problems
+
+
+def _ints(text: str) -> List[int]:
+    return [int(v) for v in text.split(",")]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--quick", action="store_true", help="Smaller grid (no 1 MB txs) for CI.")
+    ap.add_argument("--sizes", type=_ints, help="Comma-separated tx sizes in bytes.")
+    ap.add_argument("--frame-sizes", type=_ints)
+    ap.add_argument("--group-sizes", type=_ints)
+    ap.add_argument("--parity", help=f"Comma-separated parity modes ({', '.join(PARITY_MODES)}).")
+    ap.add_argument("--loss", help="Comma-separated loss rates, e.g. 0,0.05,0.1.")
+    ap.add_argument("--formats", help="Comma-separated encode_frames formats (v1, v2-b91, v2-b85).")
+    ap.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing round.")
+    ap.add_argument("--repeat", type=int, default=5, help="Timing rounds (best is kept, the spread is the noise).")
+    ap.add_argument("--output", help="Write results as JSON.")
+    ap.add_argument("--compare", metavar="BASELINE", help="Fail on regressions against this JSON result file.")
+    ap.add_argument("--threshold", type=float, default=0.25,
+                    help="Allowed relative growth of peak memory and overhead (default 0.25).")
+    ap.add_argument("--time-threshold", type=float, default=0.35,
+                    help="Allowed relative throughput drop on top of the measured noise (default 0.35).")
+    args = ap.parse_args()
+
+    grid = dict(QUICK if args.quick else FULL)
+    for name in ("sizes", "frame_sizes", "group_sizes"):
+        if getattr(args, name):
+            grid[name] = getattr(args, name)
+    if args.parity:
+        grid["parity"] = args.parity.split(",")
+    if args.loss:
+        grid["loss"] = [float(v) for v in args.loss.split(",")]
+    if args.formats:
+        grid["formats"] = args.formats.split(",")
+
+    report = run_suite(grid, args.min_time, args.repeat)
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=1)
+    if args.compare:
+        with open(args.compare) as fh:
+            problems = compare(json.load(fh), report, args.threshold, args.time_threshold)
+        for p in problems:
+            print(f"[REGRESSION] {p}", file=sys.stderr)
+        if problems:
+            sys.exit(1)
+        print(f"[OK] no regressions beyond {args.time_threshold:.0%} + noise (throughput), "
+              f"{args.threshold:.0%} (memory, overhead)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: word-wide XOR parity vs the original per-byte _xor_pad.
+
+Usage (from the repo root):
+  python -m benchmarks.bench_parity [--sizes 250,4096,65536,1048576] [--frame-size 64] [--group-size 8]
+"""
+import argparse
+import os
+import timeit
+
+from courier.foundry_courier import chunk_bytes
+from courier.parity import xor_parity
+
+
+def _legacy_xor_pad(a: bytes, b: bytes, size: int) -> bytes:
+    # Reference copy of the pre-engine implementation, kept only for comparison.
+    a2 = a.ljust(size, b'\x00')
+    b2 = b.ljust(size, b'\x00')
+    return bytes(x ^ y for x, y in zip(a2, b2))
+
+
+def legacy_parities(raw: bytes, frame_size: int, group_size: int):
+    parts = [raw[i:i+frame_size] for i in range(0, len(raw), frame_size)]
+    out = []
+    for g in range(0, len(parts), group_size):
+        group = parts[g:g+group_size]
+        size = max(len(p) for p in group)
+        parity = bytes(size)
+        for p in group:
+            parity = _legacy_xor_pad(parity, p, size)
+        out.append(parity)
+    return out
+
+
+def engine_parities(raw: bytes, frame_size: int, group_size: int):
+    parts = list(chunk_bytes(raw, frame_size))
+    out = []
+    for g in range(0, len(parts), group_size):
+        group = parts[g:g+group_size]
+        out.append(xor_parity(group, max(len(p) for p in group)))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--sizes", default="250,4096,65536,1048576", help="Comma-separated tx sizes in bytes.")
+    ap.add_argument("--frame-size", type=int, default=64)
+    ap.add_argument("--group-size", type=int, default=8)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    print(f"{'tx bytes':>10} {'legacy ms':>11} {'engine ms':>11} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        raw = os.urandom(size)
+        assert legacy_parities(raw, args.frame_size, args.group_size) == \
+            engine_parities(raw, args.frame_size, args.group_size)
+        number = max(1, 200_000 // max(size, 1))
+        t_old = min(timeit.repeat(lambda: legacy_parities(raw, args.frame_size, args.group_size),
+                                  number=number, repeat=args.repeat)) / number
+        t_new = min(timeit.repeat(lambda: engine_parities(raw, args.frame_size, args.group_size),
+                                  number=number, repeat=args.repeat)) / number
+        print(f"{size:>10} {t_old*1e3:>11.3f} {t_new*1e3:>11.3f} {t_old/t_new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: bytes-pattern parse_frame vs the original split/try parser.
+
+Inputs are the frames of a few encoded txs (v1, all parity kinds) either
+clean or mixed 1:9 with noise lines: random printable text, truncated
+frames and frames with one character changed, the mix a receiver sees on a
+busy shared channel.
+
+Usage (from the repo root):
+  python -m benchmarks.bench_parser [--frames 20000] [--noise 0.9] [--repeat 3]
+"""
+import argparse
+import base64
+import random
+import timeit
+import zlib
+
+from courier import wire
+from courier.foundry_courier import (MAX_STRIDED_COUNT, _TX_ID_RE, DataFrame, ParityFrame, RepairFrame,
+                                     StridedParityFrame, encode_frames, parse_frame, parse_frames, parse_record)
+from courier.fountain import FountainSymbol
+
+
+def _legacy_parse_symbol(rest: str):
+    try:
+        esi_s, length_s, crc_hex, b64 = rest.split(":", 3)
+        crc = int(crc_hex, 16)
+        payload = base64.b64decode(b64.encode("ascii"))
+        if (zlib.crc32(payload) & 0xffffffff) != crc or not payload:
+            return None
+        return FountainSymbol(esi=int(esi_s), length=int(length_s), crc=crc, payload=payload)
+    except Exception:
+        return None
+
+
+def legacy_parse_frame(line: str):
+    # Reference copy of the pre-rewrite parser, kept only for comparison.
+    if not line.strip():
+        return None
+    if wire.is_v2_line(line):
+        return parse_record(wire.decode_text(line.strip()))
+    try:
+        kind, rest = line.split(":", 1)
+    except ValueError:
+        return None
+
+    if kind == "X":
+        try:
+            tx_id, total_s, inner = rest.split(":", 2)
+            total = int(total_s)
+        except ValueError:
+            return None
+        if not _TX_ID_RE.match(tx_id) or total < 0 or inner.startswith("X:"):
+            return None
+        codec = 0
+        if inner.startswith("Z"):
+            try:
+                codec_s, inner = inner.split(":", 1)
+                codec = int(codec_s[1:])
+            except ValueError:
+                return None
+        fr = legacy_parse_frame(inner)
+        if fr is not None:
+            fr.tx_id, fr.total, fr.codec = tx_id, total, codec
+        return fr
+    elif kind == "F":
+        try:
+            seq_s, size_s, crc_hex, b64 = rest.split(":", 3)
+            seq, size, crc = int(seq_s), int(size_s), int(crc_hex, 16)
+            part = base64.b64decode(b64.encode("ascii"))
+            if (zlib.crc32(part) & 0xffffffff) != crc or len(part) != size:
+                return None
+            return DataFrame(seq=seq, size=size, crc=crc, payload=part)
+        except Exception:
+            return None
+    elif kind == "P":
+        try:
+            gidx_s, start_s, end_s, size_s, crc_hex, b64 = rest.split(":", 5)
+            gidx = int(gidx_s); start_seq = int(start_s); end_seq = int(end_s)
+            size = int(size_s); crc = int(crc_hex, 16)
+            parity = base64.b64decode(b64.encode("ascii"))
+            if (zlib.crc32(parity) & 0xffffffff) != crc or len(parity) != size:
+                return None
+            return ParityFrame(gidx=gidx, start_seq=start_seq, end_seq=end_seq, size=size, crc=crc, parity=parity)
+        except Exception:
+            return None
+    elif kind == "R":
+        try:
+            gidx_s, start_s, end_s, ridx_s, size_s, last_s, crc_hex, b64 = rest.split(":", 7)
+            start_seq = int(start_s); end_seq = int(end_s)
+            size = int(size_s); last = int(last_s); crc = int(crc_hex, 16)
+            payload = base64.b64decode(b64.encode("ascii"))
+            if (zlib.crc32(payload) & 0xffffffff) != crc or len(payload) != size:
+                return None
+            ridx = int(ridx_s)
+            if end_seq < start_seq or last > size or (end_seq - start_seq + 1) + ridx > 256:
+                return None
+            return RepairFrame(gidx=int(gidx_s), start_seq=start_seq, end_seq=end_seq, index=ridx,
+                               size=size, last=last, crc=crc, payload=payload)
+        except Exception:
+            return None
+    elif kind == "Q":
+        try:
+            gidx_s, start_s, stride_s, count_s, size_s, last_s, crc_hex, b64 = rest.split(":", 7)
+            stride, count = int(stride_s), int(count_s)
+            size = int(size_s); last = int(last_s); crc = int(crc_hex, 16)
+            parity = base64.b64decode(b64.encode("ascii"))
+            if (zlib.crc32(parity) & 0xffffffff) != crc or len(parity) != size:
+                return None
+            if stride < 1 or not 1 <= count <= MAX_STRIDED_COUNT or last > size:
+                return None
+            return StridedParityFrame(gidx=int(gidx_s), start_seq=int(start_s), stride=stride, count=count,
+                                      size=size, last=last, crc=crc, parity=parity)
+        except Exception:
+            return None
+    elif kind == "L":
+        return _legacy_parse_symbol(rest)
+    else:
+        return None
+
+
+def clean_lines(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    layouts = ({"repair_frames": 1}, {"repair_frames": 2}, {"repair_frames": 1, "parity_layout": "2d"})
+    out = []
+    while len(out) < n:
+        raw = rng.randbytes(rng.randrange(200, 2000))
+        opts = layouts[len(out) % len(layouts)]
+        out += encode_frames(raw.hex(), frame_payload_bytes=64, group_size=8, add_parity=True,
+                             tx_id=raw[:3].hex() if rng.random() < 0.5 else None, **opts)
+    return out[:n]
+
+
+def noisy_lines(n: int, noise: float, seed: int = 0):
+    rng = random.Random(seed)
+    frames = clean_lines(n, seed)
+    out = []
+    for i in range(n):
+        if rng.random() >= noise:
+            out.append(frames[i])
+            continue
+        f = frames[rng.randrange(n)]
+        roll = rng.random()
+        if roll < 0.6:
+            out.append("".join(chr(rng.randrange(32, 127)) for _ in range(rng.randrange(10, 120))))
+        elif roll < 0.8:
+            out.append(f[:rng.randrange(len(f))])
+        else:
+            p = rng.randrange(len(f))
+            out.append(f[:p] + chr(rng.randrange(32, 127)) + f[p + 1:])
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--frames", type=int, default=20000, help="Lines per input set.")
+    ap.add_argument("--noise", type=float, default=0.9, help="Share of noise lines in the noisy set.")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    inputs = {"clean": clean_lines(args.frames), f"{args.noise:.0%} noise": noisy_lines(args.frames, args.noise)}
+    print(f"{'input':>10} {'legacy f/s':>12} {'str f/s':>12} {'bytes f/s':>12} {'vs legacy':>9}")
+    for name, lines in inputs.items():
+        encoded = [line.encode("ascii", "replace") for line in lines]
+        # the new parser is stricter (no int() leniency such as "+5" or "0_1") but agrees wherever it accepts
+        for line, fr in zip(lines, map(parse_frame, encoded)):
+            assert fr is None or fr == legacy_parse_frame(line)
+        t_old = min(timeit.repeat(lambda: [legacy_parse_frame(line) for line in lines], number=1, repeat=args.repeat))
+        t_str = min(timeit.repeat(lambda: list(parse_frames(lines)), number=1, repeat=args.repeat))
+        t_bytes = min(timeit.repeat(lambda: list(parse_frames(encoded)), number=1, repeat=args.repeat))
+        n = len(lines)
+        print(f"{name:>10} {n / t_old:>12.0f} {n / t_str:>12.0f} {n / t_bytes:>12.0f} {t_old / t_bytes:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
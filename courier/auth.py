@@ -0,0 +1,67 @@
+"""
+Truncated HMAC tags authenticating frames (A: frames).
+
+CRC32 only catches damage: a hostile relay can inject CRC-valid frames, and
+the gateway then spends RPC calls on garbage. A full HMAC per frame would
+double the header overhead, so one tag covers many frames instead:
+
+    scope "group"  one tag per run of group_size consecutive data frames
+    scope "tx"     one tag for the whole transaction
+
+The tag is HMAC-SHA256 over the frames' payloads and their context (tx id,
+codec, seq range, whether the range ends the tx), truncated to tag_bytes
+(default 8: forging one takes ~2^64 tries, each costing a message on air).
+The key comes from the SVNEVM_HMAC environment variable; INSECURE_DEFAULT_KEY
+is public and only meant for lab setups.
+
+Each tag is sent ahead of the frames it covers, so a decoder holding the key
+knows a tx is authenticated before its data could complete it. The decoder
+checks a group's tag before joining its payloads, drops a group whose tag
+fails (its frames can be resent), and never hands out data no tag covers. A
+forged frame (data or tag) that arrives before the real one costs its group
+a retransmission; it can never reach the output.
+"""
+import hashlib
+import hmac
+import os
+from typing import Mapping, Optional, Sequence
+
+ENV_KEY = "SVNEVM_HMAC"
+INSECURE_DEFAULT_KEY = b"foundry-courier-insecure-lab-key"
+AUTH_SCOPES = ("group", "tx")
+DEFAULT_TAG_BYTES = 8
+MIN_TAG_BYTES = 4
+MAX_TAG_BYTES = 32
+_DOMAIN = b"foundry-courier/A1"
+
+
+def key_from_env(env: Mapping[str, str] = os.environ, allow_insecure_default: bool = False) -> Optional[bytes]:
+    """The HMAC key from SVNEVM_HMAC, the public lab key if allowed, else None."""
+    value = env.get(ENV_KEY)
+    if value:
+        return value.encode("utf-8")
+    return INSECURE_DEFAULT_KEY if allow_insecure_default else None
+
+
+def group_tag(key: bytes, parts: Sequence[bytes], start_seq: int, end_seq: int, last: bool,
+              tx_id: Optional[str] = None, codec: int = 0, tag_bytes: int = DEFAULT_TAG_BYTES) -> bytes:
+    """Truncated HMAC-SHA256 over the payloads of seqs start_seq..end_seq (parts, in order) and their context."""
+    if not MIN_TAG_BYTES <= tag_bytes <= MAX_TAG_BYTES:
+        raise ValueError(f"tag_bytes must be {MIN_TAG_BYTES}..{MAX_TAG_BYTES}")
+    mac = hmac.new(key, digestmod=hashlib.sha256)
+    tx = (tx_id or "").encode("ascii")
+    mac.update(_DOMAIN + bytes((len(tx),)) + tx + codec.to_bytes(2, "big") + start_seq.to_bytes(4, "big")
+               + end_seq.to_bytes(4, "big") + bytes((1 if last else 0,)))
+    for part in parts:
+        mac.update(len(part).to_bytes(4, "big"))
+        mac.update(part)
+    return mac.digest()[:tag_bytes]
+
+
+def verify(key: bytes, tag: bytes, parts: Sequence[bytes], start_seq: int, end_seq: int, last: bool,
+           tx_id: Optional[str] = None, codec: int = 0) -> bool:
+    """Constant-time check of a tag made by group_tag (its length gives tag_bytes)."""
+    if not MIN_TAG_BYTES <= len(tag) <= MAX_TAG_BYTES:
+        return False
+    expected = group_tag(key, parts, start_seq, end_seq, last, tx_id, codec, len(tag))
+    return hmac.compare_digest(expected, tag)
@@ -0,0 +1,175 @@
+"""
+Bulk encode/decode for sneakernet prep: thousands of txs per process start.
+
+Inputs
+  directory  encode: every *.hex file is one tx; decode: every *.txt file is a frame file
+  *.jsonl    encode: {"id": ..., "hex": ...} per line; decode: {"id": ..., "frames": [...]}
+Outputs (always in input order)
+  directory  encode: <id>.txt with one frame per line; decode: <id>.hex, one tx per line
+  *.jsonl    {"id", "ok", "frames" | "txs" | "error"} per line
+
+Work is fanned out over a process pool in chunks of chunksize items, with
+at most two chunks per worker in flight, so a huge input is read only as
+fast as it is processed. Results are streamed to the output as they come
+back, and a bad item (unreadable, undecodable, or an id that is not a plain
+file name for a directory output) is reported without aborting the batch.
+"""
+import itertools
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from courier.foundry_courier import demux_frames, encode_frames
+
+ENCODE_GLOB = "*.hex"
+DECODE_GLOB = "*.txt"
+
+
+def _is_jsonl(path: Path) -> bool:
+    return path.suffix == ".jsonl"
+
+
+def iter_items(src: str, mode: str) -> Iterator[Tuple[str, object]]:
+    """(id, hex) items for mode "encode", (id, frame lines) items for mode "decode"."""
+    path = Path(src)
+    if path.is_dir():
+        for f in sorted(path.glob(ENCODE_GLOB if mode == "encode" else DECODE_GLOB)):
+            try:
+                text = f.read_text()
+            except (OSError, UnicodeDecodeError) as e:
+                yield f.stem, e
+                continue
+            yield f.stem, (text.strip() if mode == "encode" else text.splitlines())
+        return
+    with path.open("r", errors="replace") as fh:  # a non-UTF-8 line fails as its own item
+        for lineno, line in enumerate(fh, 1):
+            if not line.strip():
+                continue
+            try:
+                rec = json.loads(line)
+                item_id = str(rec.get("id", lineno))
+                yield item_id, (rec["hex"] if mode == "encode" else rec["frames"])
+            except (ValueError, KeyError, AttributeError) as e:
+                yield str(lineno), e
+
+
+def encode_item(item: Tuple[str, object], **options) -> Dict[str, object]:
+    item_id, tx_hex = item
+    try:
+        if isinstance(tx_hex, Exception):
+            raise tx_hex
+        tx_hex = tx_hex.strip().lower().replace("0x", "")
+        return {"id": item_id, "ok": True, "frames": encode_frames(tx_hex, **options)}
+    except Exception as e:
+        return {"id": item_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def decode_item(item: Tuple[str, object], **options) -> Dict[str, object]:
+    item_id, lines = item
+    try:
+        if isinstance(lines, Exception):
+            raise lines
+        txs = [raw.hex() for raw in demux_frames([ln.strip() for ln in lines], **options).values() if raw]
+        if not txs:
+            raise ValueError("no complete transaction in frames")
+        return {"id": item_id, "ok": True, "txs": txs}
+    except Exception as e:
+        return {"id": item_id, "ok": False, "error": f"{type(e).__name__}: {e}"}
+
+
+def _map_chunk(fn: Callable, chunk: List) -> List:
+    return [fn(item) for item in chunk]
+
+
+def bounded_map(pool: Executor, fn: Callable, items: Iterable, chunksize: int, window: int) -> Iterator:
+    """
+    fn over items on pool, in order, like Executor.map(chunksize=...) but
+    pulling items lazily: at most window chunks are submitted and not yet
+    consumed (Executor.map submits the whole input up front).
+    """
+    it = iter(items)
+    pending: deque = deque()
+    while True:
+        while len(pending) < window:
+            chunk = list(itertools.islice(it, chunksize))
+            if not chunk:
+                break
+            pending.append(pool.submit(_map_chunk, fn, chunk))
+        if not pending:
+            return
+        yield from pending.popleft().result()
+
+
+class _Sink:
+    """Writes results to a directory (one file per item) or a JSONL file, in arrival order."""
+
+    def __init__(self, dst: str, mode: str):
+        self.path = Path(dst)
+        self.mode = mode
+        self.jsonl = _is_jsonl(self.path)
+        if self.jsonl:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self.fh = self.path.open("w")
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self.fh = None
+
+    def write(self, res: Dict[str, object]) -> None:
+        if self.jsonl:
+            self.fh.write(json.dumps(res) + "\n")
+        elif res["ok"]:
+            item_id = str(res["id"])
+            # ids name files under dst: one that is a path (x/y, ../..) would escape or miss it
+            if item_id in ("", ".", "..") or Path(item_id).name != item_id or "\\" in item_id:
+                raise ValueError(f"id {item_id!r} is not a plain file name")
+            name, body = (f"{item_id}.txt", res["frames"]) if self.mode == "encode" else (f"{item_id}.hex", res["txs"])
+            (self.path / name).write_text("\n".join(body))
+
+    def close(self) -> None:
+        if self.fh is not None:
+            self.fh.close()
+
+
+def run_batch(mode: str, src: str, dst: str, workers: Optional[int] = None, chunksize: int = 64,
+              progress=sys.stderr, **options) -> Dict[str, object]:
+    """
+    mode: "encode" or "decode"; options are passed to encode_frames or demux_frames
+    (hmac_key: tag the frames, or check the tags; require_auth: reject untagged txs).
+    workers: process count (None = CPU count, 0/1 = in-process, handy for tests).
+    Returns a summary {"total", "ok", "failed", "errors": [(id, error)]}.
+    """
+    fn = partial(encode_item if mode == "encode" else decode_item, **options)
+    items = iter_items(src, mode)
+    sink = _Sink(dst, mode)
+    summary: Dict[str, object] = {"total": 0, "ok": 0, "failed": 0}
+    errors: List[Tuple[str, str]] = []
+    pool = ProcessPoolExecutor(max_workers=workers) if workers is None or workers > 1 else None
+    try:
+        window = 2 * (workers or os.cpu_count() or 1)
+        results = bounded_map(pool, fn, items, max(1, chunksize), window) if pool else map(fn, items)
+        for res in results:
+            try:
+                sink.write(res)
+            except (OSError, ValueError) as e:
+                res = {"id": res["id"], "ok": False, "error": f"{type(e).__name__}: {e}"}
+            summary["total"] += 1
+            if res["ok"]:
+                summary["ok"] += 1
+            else:
+                summary["failed"] += 1
+                errors.append((res["id"], res["error"]))
+                if progress:
+                    print(f"[WARN] {res['id']}: {res['error']}", file=progress)
+            if progress and summary["total"] % 100 == 0:
+                print(f"[..] {summary['total']} items, {summary['failed']} failed", file=progress)
+    finally:
+        sink.close()
+        if pool:
+            pool.shutdown()
+    summary["errors"] = errors
+    return summary
@@ -0,0 +1,180 @@
+"""
+Loss-channel simulator and frame/group size planner.
+
+A Channel turns the list of frame lines a sender emits into what a receiver
+might see: frames dropped (Bernoulli, or Gilbert-Elliott two-state bursts),
+duplicated, reordered and bit-corrupted. simulate() pushes a tx through the
+real encode_frames / decode_frames many times and reports how often it came
+out intact.
+
+plan() searches frame size x group size x parity mode x format for a
+carrier (MTU, per-message overhead, channel model) and ranks the settings
+that reach a target success probability by the bytes or messages they put
+on air. Success rates are Monte Carlo estimates: more trials, tighter
+numbers.
+"""
+import random
+from dataclasses import dataclass, field, replace
+from typing import Dict, List, Optional, Sequence
+
+from courier.foundry_courier import decode_frames, encode_frames
+from courier.packing import PROFILES
+
+PARITY_MODES = {
+    "none": {"add_parity": False},
+    "xor": {"add_parity": True, "repair_frames": 1},
+    "rs2": {"add_parity": True, "repair_frames": 2},
+    "rs3": {"add_parity": True, "repair_frames": 3},
+    "rs4": {"add_parity": True, "repair_frames": 4},
+    "il": {"add_parity": True, "repair_frames": 1, "parity_layout": "interleaved"},
+    "2d": {"add_parity": True, "repair_frames": 1, "parity_layout": "2d"},
+}
+FRAME_SIZES = (16, 24, 32, 48, 64, 96, 128, 192, 256, 384, 512)
+GROUP_SIZES = (4, 8, 12, 16, 24)
+
+
+@dataclass
+class Channel:
+    """
+    Per-frame impairments. Loss follows a Gilbert-Elliott chain: in the good
+    state a frame is lost with loss_good, in the bad state with loss_bad;
+    p_good_bad / p_bad_good are the per-frame state transition odds. With
+    p_good_bad = 0 this is plain Bernoulli loss at loss_good.
+    """
+    loss_good: float = 0.0
+    loss_bad: float = 1.0
+    p_good_bad: float = 0.0
+    p_bad_good: float = 1.0
+    duplicate: float = 0.0
+    reorder: float = 0.0
+    reorder_depth: int = 4
+    corrupt: float = 0.0
+
+    def transmit(self, frames: Sequence[str], rng: random.Random) -> List[str]:
+        out = []
+        bad = False
+        for i, line in enumerate(frames):
+            bad = (rng.random() >= self.p_bad_good) if bad else (rng.random() < self.p_good_bad)
+            if rng.random() < (self.loss_bad if bad else self.loss_good):
+                continue
+            copies = 2 if rng.random() < self.duplicate else 1
+            for _ in range(copies):
+                received = _flip_bit(line, rng) if rng.random() < self.corrupt else line
+                delay = rng.uniform(0, self.reorder_depth) if rng.random() < self.reorder else 0.0
+                out.append((i + delay, received))
+        out.sort(key=lambda item: item[0])
+        return [line for _, line in out]
+
+    def mean_loss(self) -> float:
+        """Long-run fraction of frames lost."""
+        if self.p_good_bad == 0:
+            return self.loss_good
+        share_bad = self.p_good_bad / (self.p_good_bad + self.p_bad_good)
+        return share_bad * self.loss_bad + (1 - share_bad) * self.loss_good
+
+
+def bernoulli(loss: float, **kwargs) -> Channel:
+    return Channel(loss_good=loss, **kwargs)
+
+
+def gilbert_elliott(p_good_bad: float, p_bad_good: float, loss_bad: float = 1.0, loss_good: float = 0.0,
+                    **kwargs) -> Channel:
+    return Channel(loss_good=loss_good, loss_bad=loss_bad, p_good_bad=p_good_bad, p_bad_good=p_bad_good, **kwargs)
+
+
+def _flip_bit(line: str, rng: random.Random) -> str:
+    if not line:
+        return line
+    pos = rng.randrange(len(line))
+    c = chr(ord(line[pos]) ^ (1 << rng.randrange(7)))
+    if not c.isprintable():
+        c = "?"
+    return line[:pos] + c + line[pos + 1:]
+
+
+@dataclass
+class Carrier:
+    name: str
+    mtu: Optional[int]              # max message size (one frame line per message), in the profile's unit
+    overhead: int                   # bytes each message costs on air besides the frame line
+    channel: Channel = field(default_factory=Channel)
+    note: str = ""
+    profile: Optional[str] = None   # courier.packing profile that measures a message (None: characters)
+
+    def fits(self, line: str) -> bool:
+        """Whether line goes out as one message: carriable, and within mtu as the carrier counts it."""
+        size = PROFILES[self.profile].cost(line) if self.profile else len(line)
+        return size is not None and (not self.mtu or size <= self.mtu)
+
+
+CARRIERS: Dict[str, Carrier] = {
+    "sms": Carrier("sms", 160, 25, gilbert_elliott(0.02, 0.3, loss_bad=0.8, loss_good=0.01, duplicate=0.01, reorder=0.1),
+                   "GSM-7 SMS; bursty loss when the handset drops off the network", "sms-gsm7"),
+    "lora": Carrier("lora", 237, 13, gilbert_elliott(0.05, 0.5, loss_bad=0.7, loss_good=0.05, corrupt=0.01),
+                    "LoRa mesh; collisions come in bursts, some frames arrive damaged", "lora"),
+    "aprs": Carrier("aprs", 67, 40, bernoulli(0.15, duplicate=0.05, reorder=0.05),
+                    "APRS text message over AX.25; digipeaters duplicate", "aprs"),
+    "qr": Carrier("qr", 1000, 0, bernoulli(0.02), "QR code sequence; missed scans, QR ECC hides corruption", "qr"),
+}
+
+
+def simulate(raw: bytes, channel: Channel, trials: int = 200, seed: int = 0, frames: Optional[List[str]] = None,
+             **encode_opts) -> Dict[str, object]:
+    """Send raw through channel trials times; success rate plus what one transmission costs."""
+    if frames is None:
+        frames = encode_frames(raw.hex(), **encode_opts)
+    rng = random.Random(seed)
+    ok = sum(decode_frames(channel.transmit(frames, rng)) == raw for _ in range(trials))
+    return {"success": ok / trials, "frames": len(frames), "chars": sum(len(f) for f in frames),
+            "max_line": max(len(f) for f in frames)}
+
+
+def plan(raw: bytes, carrier: Carrier, target: float = 0.99, trials: int = 200, objective: str = "bytes",
+         frame_sizes: Sequence[int] = FRAME_SIZES, group_sizes: Sequence[int] = GROUP_SIZES,
+         parity: Sequence[str] = tuple(PARITY_MODES), formats: Sequence[str] = ("v1", "v2-b91"),
+         seed: int = 0) -> List[Dict[str, object]]:
+    """
+    Rank encodings of raw for carrier. Settings reaching target come first,
+    cheapest first by objective ("bytes" on air incl. per-message overhead, or
+    "messages"); the rest follow by success rate. "expected_*" is the cost
+    divided by the success rate, i.e. what resending until success costs.
+    """
+    if objective not in ("bytes", "messages"):
+        raise ValueError(f"unknown objective: {objective}")
+    rows = []
+    for fmt in formats:
+        for fs in frame_sizes:
+            n_data = max(1, -(-len(raw) // fs))
+            seen = set()
+            for gs in group_sizes:
+                for mode in parity:
+                    # group sizes past the frame count (or without parity) encode identically
+                    key = (mode, None if mode == "none" else min(gs, n_data))
+                    if key in seen:
+                        continue
+                    seen.add(key)
+                    opts = dict(frame_payload_bytes=fs, group_size=gs, fmt=fmt, **PARITY_MODES[mode])
+                    frames = encode_frames(raw.hex(), **opts)
+                    # measured as the carrier counts: a v2-b91 line outside GSM-7 is no 160-char SMS
+                    if not all(carrier.fits(f) for f in frames):
+                        continue
+                    sim = simulate(raw, carrier.channel, trials, seed, frames=frames)
+                    cost = {"messages": sim["frames"], "bytes": sim["chars"] + carrier.overhead * sim["frames"]}
+                    p = sim["success"]
+                    rows.append({
+                        "format": fmt, "frame_size": fs, "group_size": gs, "parity": mode,
+                        "success": p, "messages": cost["messages"], "bytes": cost["bytes"],
+                        "expected_messages": cost["messages"] / p if p else float("inf"),
+                        "expected_bytes": cost["bytes"] / p if p else float("inf"),
+                        "meets_target": p >= target,
+                    })
+    rows.sort(key=lambda r: (not r["meets_target"], r[objective] if r["meets_target"] else -r["success"],
+                             r[f"expected_{objective}"]))
+    return rows
+
+
+def carrier_with(name: str, mtu: Optional[int] = None, **channel_overrides) -> Carrier:
+    """A copy of a named carrier profile with some fields replaced."""
+    base = CARRIERS[name]
+    overrides = {k: v for k, v in channel_overrides.items() if v is not None}
+    return replace(base, mtu=mtu if mtu is not None else base.mtu, channel=replace(base.channel, **overrides))
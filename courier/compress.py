@@ -0,0 +1,118 @@
+"""
+Optional compression stage in front of framing.
+
+Signed transactions repeat a lot of structure (version words, script
+templates, ABI selectors, zero-padded uint256 words), so a preset
+dictionary lets even a 200-byte tx shrink. Codecs are identified by a small
+integer carried in the frame header (v1: "Z<codec>:" after the X: envelope;
+v2: a flag bit plus a varint), so the decoder picks the right one by itself:
+
+    0  none
+    1  zlib  raw deflate with DEFAULT_DICTIONARY as preset dictionary
+    2  lzma  raw LZMA2 (the lzma module has no preset dictionaries)
+
+A dictionary is part of the codec id: a new dictionary needs a new id.
+"""
+import lzma
+import time
+import zlib
+from typing import Dict, List
+
+CODEC_NONE = 0
+CODEC_ZLIB = 1
+CODEC_LZMA = 2
+CODECS = {"zlib": CODEC_ZLIB, "lzma": CODEC_LZMA}
+
+# Decompression refuses to produce more than this (guards against bombs on hostile carriers)
+MAX_TX_BYTES = 4 * 1024 * 1024
+
+_LZMA_FILTERS = [{"id": lzma.FILTER_LZMA2, "preset": 9, "dict_size": 1 << 20}]
+
+# Structural fragments of common BTC and ETH transactions, picked by hand (changing
+# them changes codec 1 on the wire). Order matters a little: deflate reaches the end
+# of the dictionary with the shortest distance codes.
+_SAMPLE_FRAGMENTS = [
+    # ETH: EIP-1559 / EIP-2930 envelopes, chain ids, empty access list, gas limits
+    "02f8b1018203e8", "02f87001", "01f8", "f86c", "f8a9", "c080a0", "c001a0", "c080", "825208", "830186a0",
+    # ERC-20 selectors: transfer, approve, transferFrom; WETH deposit/withdraw
+    "a9059cbb000000000000000000000000", "095ea7b3000000000000000000000000",
+    "23b872dd000000000000000000000000", "d0e30db0", "2e1a7d4d",
+    # ABI uint256 / address word padding
+    "000000000000000000000000", "0000000000000000000000000000000000000000000000000000000000000000",
+    "ffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffffff",
+    # BTC: versions, segwit marker, sequences, locktime, sighash
+    "01000000", "02000000", "0001", "feffffff", "fdffffff", "ffffffff", "00000000", "0141", "0147", "0121",
+    # BTC script templates: P2PKH, P2SH, P2WPKH, P2WSH, P2TR, OP_RETURN
+    "1976a914", "88ac", "17a914", "87", "160014", "220020", "225120", "6a",
+    # full-ish segwit v0 single-input skeleton
+    "020000000001010000000000000000000000000000000000000000000000000000000000000000000000000000fdffffff02",
+    "0247304402200000000000000000000000000000000000000000000000000000000000000000022000",
+]
+DEFAULT_DICTIONARY = b"".join(bytes.fromhex(f) for f in _SAMPLE_FRAGMENTS)
+
+
+def compress(raw: bytes, codec: int) -> bytes:
+    if codec == CODEC_NONE:
+        return raw
+    if codec == CODEC_ZLIB:
+        c = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, zdict=DEFAULT_DICTIONARY)
+        return c.compress(raw) + c.flush()
+    if codec == CODEC_LZMA:
+        return lzma.compress(raw, format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+    raise ValueError(f"unknown codec {codec}")
+
+
+def decompress(data: bytes, codec: int) -> bytes:
+    """Inverse of compress(); raises ValueError on damaged or oversized input."""
+    if codec == CODEC_NONE:
+        return data
+    try:
+        if codec == CODEC_ZLIB:
+            d = zlib.decompressobj(-15, zdict=DEFAULT_DICTIONARY)
+            out = d.decompress(data, MAX_TX_BYTES)
+            if d.unconsumed_tail or not d.eof:
+                raise ValueError("truncated or oversized deflate stream")
+            return out
+        if codec == CODEC_LZMA:
+            d = lzma.LZMADecompressor(format=lzma.FORMAT_RAW, filters=_LZMA_FILTERS)
+            out = d.decompress(data, MAX_TX_BYTES)
+            if not d.eof:
+                raise ValueError("truncated or oversized lzma stream")
+            return out
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"decompress failed: {e}") from e
+    raise ValueError(f"unknown codec {codec}")
+
+
+def pick(raw: bytes, method: str):
+    """(codec, payload) for method, falling back to no compression when it does not pay off."""
+    try:
+        codec = CODECS[method]
+    except KeyError:
+        raise ValueError(f"unknown compression method {method}") from None
+    packed = compress(raw, codec)
+    if len(packed) >= len(raw):
+        return CODEC_NONE, raw
+    return codec, packed
+
+
+def compression_report(raw: bytes, repeat: int = 20) -> List[Dict[str, object]]:
+    """Ratio and per-tx encode/decode cost of every codec on raw (at least one round each)."""
+    repeat = max(1, repeat)
+    rows = []
+    for name, codec in [("none", CODEC_NONE)] + sorted(CODECS.items(), key=lambda kv: kv[1]):
+        t0 = time.perf_counter()
+        for _ in range(repeat):
+            packed = compress(raw, codec)
+        t1 = time.perf_counter()
+        for _ in range(repeat):
+            decompress(packed, codec)
+        t2 = time.perf_counter()
+        rows.append({
+            "codec": name,
+            "bytes": len(packed),
+            "ratio": len(packed) / len(raw) if raw else 1.0,
+            "encode_us": (t1 - t0) / repeat * 1e6,
+            "decode_us": (t2 - t1) / repeat * 1e6,
+        })
+    return rows
@@ -7,7 +7,15 @@ Features
 - CRC32 per data frame
 - Base64 text-safe payloads
 - XOR parity frames (recover 1 missing data frame per group)
+- Reed-Solomon repair frames over GF(256) (recover m missing data frames per group)
+- Interleaved (strided) and row+column 2D XOR parity layouts for burst loss (Q: frames)
+- Rateless fountain symbols (L: lines) for one-way broadcast carriers
 - Metadata in parity headers to identify group range
+- Streaming Decoder: feed lines one at a time, get the tx the moment it completes
+- Optional X:<txid>:<total>: envelope so many txs can share one stream (Demuxer)
+- Compact v2 format: varint headers, basE91/Base85 lines or raw binary (courier.wire)
+- Optional zlib (preset tx dictionary) / lzma compression, flagged in the header
+- Optional truncated HMAC tags per group or per tx (A: frames, courier.auth)
 - Works with SMS, radio, mesh, or sneakernet
 - CLI usage; importable as a library
 
@@ -17,30 +25,54 @@ Usage
 """
 import argparse
 import base64
+import binascii
+import bisect
+import hashlib
 import itertools
+import re
 import sys
+import time
 import zlib
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import List, Dict, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
-def chunk_bytes(b: bytes, size: int):
-    for i in range(0, len(b), size):
-        yield b[i:i+size]
+from courier.fountain import FountainDecoder, FountainSymbol, parse_symbol, source_parts
+from courier import auth
+from courier import compress as codecs
+from courier import wire
+from courier.syntax import B64_PATTERN, DATACLASS_OPTS, SYMBOL_RE
+from courier.parity import XorAccumulator, rs_encode, rs_recover, xor_parity
 
-def _xor_pad(a: bytes, b: bytes, size: int) -> bytes:
-    a2 = a.ljust(size, b'\x00')
-    b2 = b.ljust(size, b'\x00')
-    return bytes(x ^ y for x, y in zip(a2, b2))
+TX_ID_CHARS = 6
+MAX_STRIDED_COUNT = 256  # members of one Q: group (bounds the work a hostile header can cause)
+MAX_GROUP = 256  # seqs covered by one P: group (build_frames never makes more)
+_TX_ID_RE = re.compile(r"[0-9a-z]{1,16}\Z")
 
-@dataclass
+def make_tx_id(raw: bytes, salt: int = 0) -> str:
+    """Short stream id derived from the tx itself (same tx -> same id on every relay)."""
+    h = hashlib.sha256(raw)
+    if salt:
+        h.update(salt.to_bytes(4, "big"))
+    return h.hexdigest()[:TX_ID_CHARS]
+
+def chunk_bytes(b: bytes, size: int):
+    # memoryview slices: framing a large tx never copies the payload
+    mv = memoryview(b)
+    for i in range(0, len(mv), size):
+        yield mv[i:i+size]
+
+@dataclass(**DATACLASS_OPTS)
 class DataFrame:
     seq: int
     size: int
     crc: int
     payload: bytes
+    tx_id: Optional[str] = None
+    total: Optional[int] = None
+    codec: int = 0
 
-@dataclass
+@dataclass(**DATACLASS_OPTS)
 class ParityFrame:
     gidx: int
     start_seq: int
@@ -48,133 +80,1135 @@ class ParityFrame:
     size: int
     crc: int
     parity: bytes
+    tx_id: Optional[str] = None
+    total: Optional[int] = None
+    codec: int = 0
+
+@dataclass(**DATACLASS_OPTS)
+class StridedParityFrame:
+    """XOR parity over seqs start_seq, start_seq + stride, ... (count members)."""
+    gidx: int
+    start_seq: int
+    stride: int
+    count: int
+    size: int
+    last: int
+    crc: int
+    parity: bytes
+    tx_id: Optional[str] = None
+    total: Optional[int] = None
+    codec: int = 0
+
+    @property
+    def members(self) -> range:
+        return range(self.start_seq, self.start_seq + self.stride * self.count, self.stride)
+
+@dataclass(**DATACLASS_OPTS)
+class RepairFrame:
+    gidx: int
+    start_seq: int
+    end_seq: int
+    index: int
+    size: int
+    last: int
+    crc: int
+    payload: bytes
+    tx_id: Optional[str] = None
+    total: Optional[int] = None
+    codec: int = 0
+
+@dataclass(**DATACLASS_OPTS)
+class AuthFrame:
+    """Truncated HMAC tag over data seqs start_seq..end_seq (last: the range ends the tx)."""
+    start_seq: int
+    end_seq: int
+    last: int
+    tag: bytes
+    tx_id: Optional[str] = None
+    total: Optional[int] = None
+    codec: int = 0
+
+PARITY_LAYOUTS = ("contiguous", "interleaved", "2d")
+
+def strided_groups(n: int, group_size: int, layout: str) -> List[Tuple[int, int, int, int]]:
+    """
+    (emit_after_seq, start, stride, count) of every Q: parity group over n data
+    frames. Frames are taken in blocks of group_size x group_size:
+      interleaved  group j of a block holds frames j, j+depth, ... (depth = rows in
+                   the block, >= group_size once the stream has a full block), so a
+                   burst of up to depth consecutive losses costs each group at most
+                   one frame; one parity per group_size frames, as with contiguous
+                   groups
+      2d           one parity per row (stride 1) plus one per column (stride
+                   group_size); a frame lost together with others in its row is
+                   still repaired by its column, and repairs unlock each other
+    """
+    out = []
+    block = group_size * group_size
+    starts = list(range(0, n, block))
+    if layout == "interleaved" and len(starts) > 1 and n - starts[-1] < block:
+        starts.pop()  # a short tail block joins the previous one, keeping depth >= group_size
+    for i, b0 in enumerate(starts):
+        m = (starts[i + 1] if i + 1 < len(starts) else n) - b0
+        depth = -(-m // group_size)
+        if layout == "interleaved":
+            for j in range(depth):
+                out.append((b0 + m - 1, b0 + j, depth, len(range(j, m, depth))))
+        elif layout == "2d":
+            for r0 in range(b0, b0 + m, group_size):
+                width = min(group_size, b0 + m - r0)
+                out.append((r0 + width - 1, r0, 1, width))
+            if depth > 1:
+                for j in range(min(group_size, m)):
+                    out.append((b0 + m - 1, b0 + j, group_size, len(range(j, m, group_size))))
+        else:
+            raise ValueError(f"parity_layout must be one of {', '.join(PARITY_LAYOUTS)}")
+    return out
+
+def _build_strided(raw: bytes, frame_payload_bytes: int, group_size: int, layout: str) -> List[object]:
+    parts = list(chunk_bytes(raw, frame_payload_bytes))
+    pending: Dict[int, List[Tuple[int, int, int]]] = {}
+    for after, start, stride, count in strided_groups(len(parts), group_size, layout):
+        pending.setdefault(after, []).append((start, stride, count))
+    frames: List[object] = []
+    gidx = 1
+    for seq, part in enumerate(parts):
+        frames.append(DataFrame(seq=seq, size=len(part), crc=zlib.crc32(part) & 0xffffffff, payload=part))
+        # groups whose last member came earliest go first, so a burst straddling the end of the
+        # data and the start of the parity frames never takes a member and its parity
+        for start, stride, count in sorted(pending.get(seq, ()), key=lambda g: g[0] + g[1] * (g[2] - 1)):
+            members = [parts[s] for s in range(start, start + stride * count, stride)]
+            size = max(len(p) for p in members)
+            parity = xor_parity(members, size)
+            frames.append(StridedParityFrame(gidx=gidx, start_seq=start, stride=stride, count=count, size=size,
+                                             last=len(members[-1]), crc=zlib.crc32(parity) & 0xffffffff,
+                                             parity=parity))
+            gidx += 1
+    return frames
+
+def build_frames(raw: bytes, frame_payload_bytes: int = 64, group_size: int = 8, add_parity: bool = True,
+                 repair_frames: int = 1, parity_layout: str = "contiguous") -> List[object]:
+    """Frame objects (data interleaved with each group's parity/repair frames) for raw tx bytes."""
+    if repair_frames < 1:
+        raise ValueError("repair_frames must be >= 1")
+    if add_parity and group_size + repair_frames > 256:
+        raise ValueError("group_size + repair_frames must be <= 256")
+    if add_parity and parity_layout != "contiguous":
+        if repair_frames > 1:
+            raise ValueError("interleaved and 2d parity layouts use XOR parity (repair_frames=1)")
+        return _build_strided(raw, frame_payload_bytes, group_size, parity_layout)
+    frames: List[object] = []
+    use_rs = add_parity and repair_frames > 1
+    acc = XorAccumulator()
+    group: List[memoryview] = []
+    start_seq, idx, gidx = 0, 0, 1
+
+    def close_group():
+        if use_rs:
+            size = max(len(p) for p in group)
+            for ridx, block in enumerate(rs_encode(group, repair_frames, size)):
+                frames.append(RepairFrame(gidx=gidx, start_seq=start_seq, end_seq=idx - 1, index=ridx, size=size,
+                                          last=len(group[-1]), crc=zlib.crc32(block) & 0xffffffff, payload=block))
+            group.clear()
+        else:
+            parity = acc.digest()
+            frames.append(ParityFrame(gidx=gidx, start_seq=start_seq, end_seq=idx - 1, size=len(parity),
+                                      crc=zlib.crc32(parity) & 0xffffffff, parity=parity))
+            acc.reset()
+
+    for part in chunk_bytes(raw, frame_payload_bytes):
+        frames.append(DataFrame(seq=idx, size=len(part), crc=zlib.crc32(part) & 0xffffffff, payload=part))
+        if use_rs:
+            group.append(part)
+        else:
+            acc.add(part)
+        idx += 1
+
+        if add_parity and (idx % group_size == 0):
+            close_group()
+            start_seq = idx
+            gidx += 1
+
+    if add_parity and idx > start_seq:
+        close_group()
+    return frames
+
+def format_frame(fr) -> str:
+    """v1 text line for a frame object (with its X: envelope when it carries a tx_id)."""
+    if isinstance(fr, DataFrame):
+        line = f"F:{fr.seq:06d}:{fr.size:03d}:{fr.crc:08x}:" + base64.b64encode(fr.payload).decode("ascii")
+    elif isinstance(fr, ParityFrame):
+        line = (f"P:{fr.gidx:06d}:{fr.start_seq:06d}:{fr.end_seq:06d}:{fr.size:03d}:{fr.crc:08x}:"
+                + base64.b64encode(fr.parity).decode("ascii"))
+    elif isinstance(fr, StridedParityFrame):
+        line = (f"Q:{fr.gidx:06d}:{fr.start_seq:06d}:{fr.stride:03d}:{fr.count:03d}:{fr.size:03d}:{fr.last:03d}:"
+                f"{fr.crc:08x}:" + base64.b64encode(fr.parity).decode("ascii"))
+    elif isinstance(fr, RepairFrame):
+        line = (f"R:{fr.gidx:06d}:{fr.start_seq:06d}:{fr.end_seq:06d}:{fr.index:03d}:"
+                f"{fr.size:03d}:{fr.last:03d}:{fr.crc:08x}:" + base64.b64encode(fr.payload).decode("ascii"))
+    elif isinstance(fr, FountainSymbol):
+        line = f"L:{fr.esi:06d}:{fr.length:06d}:{fr.crc:08x}:" + base64.b64encode(fr.payload).decode("ascii")
+    elif isinstance(fr, AuthFrame):
+        line = f"A:{fr.start_seq:06d}:{fr.end_seq:06d}:{fr.last:d}:" + base64.b64encode(fr.tag).decode("ascii")
+    else:
+        raise TypeError(f"not a frame: {fr!r}")
+    if fr.tx_id is not None:
+        codec = f"Z{fr.codec}:" if fr.codec else ""
+        line = f"X:{fr.tx_id}:{fr.total or 0:06d}:{codec}" + line
+    return line
+
+def pack_frame(fr) -> bytes:
+    """v2 binary record for a frame object."""
+    if isinstance(fr, DataFrame):
+        kind, fields, payload = "F", (fr.seq,), fr.payload
+    elif isinstance(fr, ParityFrame):
+        kind, fields, payload = "P", (fr.gidx, fr.start_seq, fr.end_seq - fr.start_seq), fr.parity
+    elif isinstance(fr, StridedParityFrame):
+        kind, fields, payload = "Q", (fr.gidx, fr.start_seq, fr.stride, fr.count, fr.last), fr.parity
+    elif isinstance(fr, RepairFrame):
+        kind, fields, payload = "R", (fr.gidx, fr.start_seq, fr.end_seq - fr.start_seq, fr.index, fr.last), fr.payload
+    elif isinstance(fr, FountainSymbol):
+        kind, fields, payload = "L", (fr.esi, fr.length), fr.payload
+    elif isinstance(fr, AuthFrame):
+        kind, fields, payload = "A", (fr.start_seq, fr.end_seq - fr.start_seq, fr.last), fr.tag
+    else:
+        raise TypeError(f"not a frame: {fr!r}")
+    return wire.pack_record(kind, fields, payload, fr.tx_id, fr.total, fr.codec)
+
+def parse_record(rec: Optional[bytes]):
+    """Frame object from a v2 binary record, or None if it is damaged."""
+    unpacked = wire.unpack_record(rec) if rec else None
+    if unpacked is None:
+        return None
+    kind, fields, payload, tx_id, total, codec = unpacked
+    crc = zlib.crc32(payload) & 0xffffffff
+    if kind == "F":
+        fr = DataFrame(seq=fields[0], size=len(payload), crc=crc, payload=payload)
+    elif kind == "P":
+        gidx, start, span = fields
+        if span >= MAX_GROUP:
+            return None
+        fr = ParityFrame(gidx=gidx, start_seq=start, end_seq=start + span, size=len(payload), crc=crc, parity=payload)
+    elif kind == "R":
+        gidx, start, span, ridx, last = fields
+        if last > len(payload) or span + 1 + ridx > 255:  # Cauchy point k + ridx must be in GF(256)
+            return None
+        fr = RepairFrame(gidx=gidx, start_seq=start, end_seq=start + span, index=ridx, size=len(payload),
+                         last=last, crc=crc, payload=payload)
+    elif kind == "Q":
+        gidx, start, stride, count, last = fields
+        if not (1 <= stride and 1 <= count <= MAX_STRIDED_COUNT) or last > len(payload):
+            return None
+        fr = StridedParityFrame(gidx=gidx, start_seq=start, stride=stride, count=count, size=len(payload),
+                                last=last, crc=crc, parity=payload)
+    elif kind == "A":
+        start, span, last = fields
+        if last > 1 or not auth.MIN_TAG_BYTES <= len(payload) <= auth.MAX_TAG_BYTES:
+            return None
+        fr = AuthFrame(start_seq=start, end_seq=start + span, last=last, tag=payload)
+    elif payload:
+        fr = FountainSymbol(esi=fields[0], length=fields[1], crc=crc, payload=payload)
+    else:
+        return None
+    fr.tx_id, fr.total, fr.codec = tx_id, total, codec
+    return fr
+
+FORMATS = ("v1", "v2-b91", "v2-b85")
 
-def encode_frames(tx_hex: str, frame_payload_bytes: int = 64, group_size: int = 8, add_parity: bool = True) -> List[str]:
+def encode_frames(tx_hex: str, frame_payload_bytes: int = 64, group_size: int = 8, add_parity: bool = True,
+                  repair_frames: int = 1, tx_id: Optional[str] = None, fmt: str = "v1",
+                  compress: Optional[str] = None, parity_layout: str = "contiguous",
+                  hmac_key: Optional[bytes] = None, auth_scope: str = "group",
+                  tag_bytes: int = auth.DEFAULT_TAG_BYTES) -> List[str]:
     """
     tx_hex: signed raw transaction hex string (no 0x)
     frame_payload_bytes: payload size before base64 (keep <= 64 for SMS/radio comfort)
     group_size: number of frames per parity group
-    add_parity: append 1 parity frame per group using XOR across group frames
+    add_parity: append parity/repair frames per group
+    repair_frames: 1 = one XOR parity frame per group (classic P: frames);
+                   m > 1 = m Reed-Solomon repair frames per group, any m losses recoverable
+    tx_id: if set, every line is wrapped as X:<tx_id>:<total>:<frame>, where total
+           is the number of data frames, so the tx can share a stream with others
+    fmt: "v1" (below), or "v2-b91" / "v2-b85" for compact v2 lines (see courier.wire)
+    compress: "zlib" or "lzma" to compress the tx before framing (skipped if it does not
+              shrink); the codec is flagged in the header, which implies a tx_id envelope
+    parity_layout: "contiguous" (P:/R: groups of consecutive seqs), "interleaved" (strided
+                   groups: a burst of up to group_size lost frames is recoverable at the
+                   same overhead) or "2d" (row + column parity); see strided_groups
+    hmac_key: if set, add A: frames carrying a truncated HMAC tag (tag_bytes long) per
+              group_size data frames (auth_scope "group") or one for the tx ("tx"); see courier.auth
     returns: list[str] frames:
        Data:  F:<seq>:<size>:<crc>:<base64payload>
        Parity: P:<gidx>:<start_seq>:<end_seq>:<size>:<crc>:<base64parity>
+       Repair: R:<gidx>:<start_seq>:<end_seq>:<ridx>:<size>:<last>:<crc>:<base64repair>
+               (last = payload length of end_seq, so a recovered tail is trimmed exactly)
+       Strided: Q:<gidx>:<start_seq>:<stride>:<count>:<size>:<last>:<crc>:<base64parity>
+               (members start_seq + i*stride for i < count; last as for R:)
+       Auth:   A:<start_seq>:<end_seq>:<last>:<base64tag>
+               (just ahead of data frame start_seq; last = 1 if end_seq ends the tx)
     """
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {', '.join(FORMATS)}")
+    frames = _tagged_frames(tx_hex, frame_payload_bytes, group_size, add_parity, repair_frames, tx_id, compress,
+                            parity_layout, hmac_key, auth_scope, tag_bytes)
+    if fmt == "v1":
+        return [format_frame(fr) for fr in frames]
+    alphabet = fmt[3:]
+    return [wire.encode_text(pack_frame(fr), alphabet) for fr in frames]
+
+def encode_frames_binary(tx_hex: str, frame_payload_bytes: int = 64, group_size: int = 8, add_parity: bool = True,
+                         repair_frames: int = 1, tx_id: Optional[str] = None, compress: Optional[str] = None,
+                         parity_layout: str = "contiguous", hmac_key: Optional[bytes] = None,
+                         auth_scope: str = "group", tag_bytes: int = auth.DEFAULT_TAG_BYTES) -> bytes:
+    """Raw-binary v2 stream (for USB sticks and files): magic + length-prefixed records."""
+    frames = _tagged_frames(tx_hex, frame_payload_bytes, group_size, add_parity, repair_frames, tx_id, compress,
+                            parity_layout, hmac_key, auth_scope, tag_bytes)
+    return wire.pack_binary(pack_frame(fr) for fr in frames)
+
+def _tagged_frames(tx_hex, frame_payload_bytes, group_size, add_parity, repair_frames, tx_id, compress=None,
+                   parity_layout="contiguous", hmac_key=None, auth_scope="group", tag_bytes=auth.DEFAULT_TAG_BYTES):
+    if tx_id is not None and not _TX_ID_RE.match(tx_id):
+        raise ValueError("tx_id must be 1-16 characters of [0-9a-z]")
+    if auth_scope not in auth.AUTH_SCOPES:
+        raise ValueError(f"auth_scope must be one of {', '.join(auth.AUTH_SCOPES)}")
     raw = bytes.fromhex(tx_hex)
-    frames, group_parts, idx = [], [], 0
-    gidx = 1
+    codec = codecs.CODEC_NONE
+    if compress:
+        if tx_id is None:
+            tx_id = make_tx_id(raw)
+        codec, raw = codecs.pick(raw, compress)
+    frames = build_frames(raw, frame_payload_bytes, group_size, add_parity, repair_frames, parity_layout)
+    if tx_id is not None:
+        total = sum(1 for fr in frames if isinstance(fr, DataFrame))
+        for fr in frames:
+            fr.tx_id, fr.total, fr.codec = tx_id, total, codec
+    if hmac_key is not None:
+        frames = _with_auth(frames, hmac_key, group_size if auth_scope == "group" else None, tag_bytes)
+    return frames
 
-    for part in chunk_bytes(raw, frame_payload_bytes):
-        crc = zlib.crc32(part) & 0xffffffff
-        header = f"F:{idx:06d}:{len(part):03d}:{crc:08x}:"
-        body = base64.b64encode(part).decode("ascii")
-        frames.append(header + body)
-        group_parts.append((idx, part))
-        idx += 1
+def _with_auth(frames: List[object], key: bytes, span: Optional[int], tag_bytes: int) -> List[object]:
+    """
+    frames with an A: frame ahead of each run of span data frames (span None:
+    one for all). Sent first, a tag tells the decoder the tx is authenticated
+    before its data could complete it.
+    """
+    data = [fr for fr in frames if isinstance(fr, DataFrame)]
+    n = len(data)
+    tags = {}
+    for start in range(0, n, span or max(n, 1)):
+        end = min(start + (span or n), n) - 1
+        first = data[start]
+        tag = auth.group_tag(key, [fr.payload for fr in data[start:end + 1]], start, end, end == n - 1,
+                             first.tx_id, first.codec, tag_bytes)
+        tags[start] = AuthFrame(start_seq=start, end_seq=end, last=int(end == n - 1), tag=tag, tx_id=first.tx_id,
+                              total=first.total, codec=first.codec)
+    out: List[object] = []
+    for fr in frames:
+        if isinstance(fr, DataFrame) and fr.seq in tags:
+            out.append(tags[fr.seq])
+        out.append(fr)
+    return out
 
-        if add_parity and (idx % group_size == 0):
-            start_seq = group_parts[0][0]
-            end_seq = group_parts[-1][0]
-            size = max(len(p) for _, p in group_parts)
-            parity = bytes(size)
-            for _, p in group_parts:
-                parity = _xor_pad(parity, p, size)
-            crc_p = zlib.crc32(parity) & 0xffffffff
-            header_p = f"P:{gidx:06d}:{start_seq:06d}:{end_seq:06d}:{size:03d}:{crc_p:08x}:"
-            frames.append(header_p + base64.b64encode(parity).decode("ascii"))
-            group_parts.clear()
-            gidx += 1
+def parse_binary(data: bytes) -> List[object]:
+    """Frame objects from a raw-binary v2 stream (damaged records are skipped)."""
+    return [fr for fr in map(parse_record, wire.iter_binary(data)) if fr is not None]
 
-    if add_parity and group_parts:
-        start_seq = group_parts[0][0]
-        end_seq = group_parts[-1][0]
-        size = max(len(p) for _, p in group_parts)
-        parity = bytes(size)
-        for _, p in group_parts:
-            parity = _xor_pad(parity, p, size)
-        crc_p = zlib.crc32(parity) & 0xffffffff
-        header_p = f"P:{gidx:06d}:{start_seq:06d}:{end_seq:06d}:{size:03d}:{crc_p:08x}:"
-        frames.append(header_p + base64.b64encode(parity).decode("ascii"))
+def airtime_report(tx_hex: str, **kwargs) -> List[Dict[str, object]]:
+    """Frames and bytes-on-air for one tx in every format (text lines counted with their newline)."""
+    raw_len = len(tx_hex) // 2
+    rows = []
+    for fmt in FORMATS:
+        lines = encode_frames(tx_hex, fmt=fmt, **kwargs)
+        rows.append({"format": fmt, "frames": len(lines), "bytes": sum(len(ln) + 1 for ln in lines)})
+    binary = encode_frames_binary(tx_hex, **kwargs)
+    rows.append({"format": "v2-bin", "frames": rows[0]["frames"], "bytes": len(binary)})
+    for row in rows:
+        row["overhead"] = row["bytes"] / raw_len - 1 if raw_len else 0.0
+    return rows
 
-    return frames
+def encode_batch(tx_hexes: List[str], **kwargs) -> List[Tuple[str, List[str]]]:
+    """
+    Frame many txs for one shared stream. Each tx gets its own derived tx_id;
+    returns [(tx_id, frames)] in input order. Use interleave() to mix them.
+    """
+    out, used = [], set()
+    for tx_hex in tx_hexes:
+        raw = bytes.fromhex(tx_hex)
+        salt = 0
+        tx_id = make_tx_id(raw)
+        while tx_id in used:
+            salt += 1
+            tx_id = make_tx_id(raw, salt)
+        used.add(tx_id)
+        out.append((tx_id, encode_frames(tx_hex, tx_id=tx_id, **kwargs)))
+    return out
+
+def interleave(streams: List[List[str]]) -> List[str]:
+    """Round-robin merge, so a burst on the channel hits many txs lightly instead of one hard."""
+    return [f for row in itertools.zip_longest(*streams) for f in row if f is not None]
+
+def encode_stream(tx_hexes: List[str], **kwargs) -> List[str]:
+    """Encode a whole batch of hex txs into one interleaved, demultiplexable stream."""
+    return interleave([frames for _, frames in encode_batch(tx_hexes, **kwargs)])
 
-def parse_frame(line: str):
-    # Returns Union[DataFrame, ParityFrame, None]
-    if not line.strip():
+# Exception-free parser: one precompiled bytes pattern per kind checks the
+# structure (decimal and hex fields, base64 alphabet) and the base64 length is
+# checked against the declared size, all before any base64 or CRC work. A line
+# passing both always decodes, so no exception is raised on the hot path.
+_V2_PREFIX_BYTES = frozenset(ord(c) for c in (wire.PREFIX_B91, wire.PREFIX_B85))
+_N = rb"([0-9]{1,9})"
+_HEX = rb"([0-9a-fA-F]{1,8})"
+_B64 = rb"(%s)" % B64_PATTERN
+_ENVELOPE_RE = re.compile(rb"X:([0-9a-z]{1,16}):([0-9]{1,9}):(?:Z([0-9]{1,3}):)?")
+_KIND_RE = {
+    ord("F"): re.compile(b":".join((rb"F", _N, _N, _HEX, _B64))),
+    ord("P"): re.compile(b":".join((rb"P", _N, _N, _N, _N, _HEX, _B64))),
+    ord("R"): re.compile(b":".join((rb"R", _N, _N, _N, _N, _N, _N, _HEX, _B64))),
+    ord("Q"): re.compile(b":".join((rb"Q", _N, _N, _N, _N, _N, _N, _HEX, _B64))),
+    ord("A"): re.compile(b":".join((rb"A", _N, _N, rb"([01])", _B64))),
+}
+
+def _payload(b64: bytes, size: int, crc: int) -> Optional[bytes]:
+    """Decoded payload if its length and CRC check out, else None."""
+    if len(b64) != 4 * ((size + 2) // 3):
         return None
-    try:
-        kind, rest = line.split(":", 1)
-    except ValueError:
+    data = binascii.a2b_base64(b64)
+    if len(data) != size or zlib.crc32(data) != crc:
         return None
+    return data
 
-    if kind == "F":
-        try:
-            seq_s, size_s, crc_hex, b64 = rest.split(":", 3)
-            seq, size, crc = int(seq_s), int(size_s), int(crc_hex, 16)
-            part = base64.b64decode(b64.encode("ascii"))
-            if (zlib.crc32(part) & 0xffffffff) != crc or len(part) != size:
-                return None
-            return DataFrame(seq=seq, size=size, crc=crc, payload=part)
-        except Exception:
+def _parse_v1(line: bytes):
+    kind = line[0]
+    if kind == 76:  # "L"
+        return parse_symbol(line[2:])
+    pattern = _KIND_RE.get(kind)
+    m = pattern.fullmatch(line) if pattern is not None else None
+    if m is None:
+        return None
+    if kind == 70:  # "F"
+        seq, size, crc, b64 = m.groups()
+        size, crc = int(size), int(crc, 16)
+        part = _payload(b64, size, crc)
+        return None if part is None else DataFrame(seq=int(seq), size=size, crc=crc, payload=part)
+    if kind == 65:  # "A": no CRC, the tag is its own check
+        start_seq, end_seq, last, b64 = m.groups()
+        if len(b64) % 4 or not 4 <= len(b64) <= 4 * ((auth.MAX_TAG_BYTES + 2) // 3):
             return None
-    elif kind == "P":
-        try:
-            gidx_s, start_s, end_s, size_s, crc_hex, b64 = rest.split(":", 5)
-            gidx = int(gidx_s); start_seq = int(start_s); end_seq = int(end_s)
-            size = int(size_s); crc = int(crc_hex, 16)
-            parity = base64.b64decode(b64.encode("ascii"))
-            if (zlib.crc32(parity) & 0xffffffff) != crc or len(parity) != size:
-                return None
-            return ParityFrame(gidx=gidx, start_seq=start_seq, end_seq=end_seq, size=size, crc=crc, parity=parity)
-        except Exception:
+        tag = binascii.a2b_base64(b64)
+        start_seq, end_seq = int(start_seq), int(end_seq)
+        if end_seq < start_seq or len(tag) < auth.MIN_TAG_BYTES:
             return None
-    else:
+        return AuthFrame(start_seq=start_seq, end_seq=end_seq, last=int(last), tag=tag)
+    if kind == 80:  # "P"
+        gidx, start_seq, end_seq, size, crc, b64 = m.groups()
+        start_seq, end_seq, size, crc = int(start_seq), int(end_seq), int(size), int(crc, 16)
+        if not 0 <= end_seq - start_seq < MAX_GROUP:
+            return None
+        parity = _payload(b64, size, crc)
+        if parity is None:
+            return None
+        return ParityFrame(gidx=int(gidx), start_seq=start_seq, end_seq=end_seq, size=size, crc=crc, parity=parity)
+    gidx, a, b, c, size, last, crc, b64 = m.groups()
+    a, b, c, size, last = int(a), int(b), int(c), int(size), int(last)
+    if last > size:
+        return None
+    if kind == 82:  # "R": data seqs a..b, repair index c
+        if b < a or (b - a + 1) + c > 255:  # Cauchy point k + ridx must be in GF(256)
+            return None
+        crc = int(crc, 16)
+        payload = _payload(b64, size, crc)
+        if payload is None:
+            return None
+        return RepairFrame(gidx=int(gidx), start_seq=a, end_seq=b, index=c, size=size, last=last, crc=crc,
+                           payload=payload)
+    # "Q": start a, stride b, count c
+    if b < 1 or not 1 <= c <= MAX_STRIDED_COUNT:
         return None
+    crc = int(crc, 16)
+    parity = _payload(b64, size, crc)
+    if parity is None:
+        return None
+    return StridedParityFrame(gidx=int(gidx), start_seq=a, stride=b, count=c, size=size, last=last, crc=crc,
+                              parity=parity)
 
-def recover_with_parity(parts: Dict[int, bytes], parity: ParityFrame) -> None:
-    """If exactly one frame missing in the parity range, reconstruct it via XOR and insert."""
+def parse_frame(line):
+    """
+    Frame object for one line (str or bytes; v1 with optional X: envelope, or
+    v2 text), or None for anything malformed or failing its CRC. Returns
+    Union[DataFrame, ParityFrame, RepairFrame, StridedParityFrame, FountainSymbol, None].
+    """
+    if isinstance(line, str):
+        line = line.encode("latin-1", "replace")
+    line = line.strip()
+    if len(line) < 2:
+        return None
+    if line[0] in _V2_PREFIX_BYTES:
+        return parse_record(wire.decode_text(line.decode("latin-1")))
+    if line[1] != 58:  # ":"
+        return None
+    if line[0] != 88:  # "X"
+        return _parse_v1(line)
+    m = _ENVELOPE_RE.match(line)
+    if m is None:
+        return None
+    inner = line[m.end():]
+    if len(inner) < 2 or inner[1] != 58 or inner[0] == 88:
+        return None
+    fr = _parse_v1(inner)
+    if fr is not None:
+        tx_id, total, codec = m.groups()
+        fr.tx_id, fr.total, fr.codec = tx_id.decode("ascii"), int(total), int(codec) if codec else 0
+    return fr
+
+def parse_frames(lines: Iterable) -> Iterator[object]:
+    """Frame objects for every valid line of lines (str or bytes), skipping garbage."""
+    for line in lines:
+        fr = parse_frame(line)
+        if fr is not None:
+            yield fr
+
+REJECT_REASONS = ("malformed", "length", "crc", "invalid")
+
+def reject_reason(line) -> Optional[str]:
+    """
+    Why parse_frame(line) gives None: "malformed" (not a frame: bad structure
+    or alphabet), "length" (payload does not match its declared size), "crc"
+    (checksum mismatch) or "invalid" (header fields out of range). None for a
+    blank line. Diagnostics only: this repeats the parse, so it is not on the
+    decode hot path.
+    """
+    if isinstance(line, str):
+        line = line.encode("latin-1", "replace")
+    line = line.strip()
+    if not line:
+        return None
+    if line[0] in _V2_PREFIX_BYTES:
+        rec = wire.decode_text(line.decode("latin-1"))
+        if rec is None or len(rec) < 6:
+            return "malformed"
+        if zlib.crc32(rec[:-4]) != int.from_bytes(rec[-4:], "little"):
+            return "crc"
+        return "invalid"
+    if line[:2] == b"X:":
+        m = _ENVELOPE_RE.match(line)
+        if m is None:
+            return "malformed"
+        line = line[m.end():]
+    if line[:2] == b"L:":
+        m = SYMBOL_RE.fullmatch(line[2:])
+        if m is None or not m.group(4):
+            return "malformed"
+        b64, crc = m.group(4), int(m.group(3), 16)
+        if len(b64) % 4:
+            return "length"
+        return "crc" if zlib.crc32(binascii.a2b_base64(b64)) != crc else "invalid"
+    pattern = _KIND_RE.get(line[0]) if len(line) > 1 and line[1] == 58 else None
+    m = pattern.fullmatch(line) if pattern is not None else None
+    if m is None:
+        return "malformed"
+    g = m.groups()
+    if line[0] == 65:  # A: a tag of a bad length (or a range ending before it starts)
+        return "length" if len(g[-1]) % 4 else "invalid"
+    # every v1 kind ends in <size>:<crc>:<b64> (R:/Q: with <last> after <size>)
+    size, crc, b64 = int(g[-4] if line[0] in (81, 82) else g[-3]), int(g[-2], 16), g[-1]
+    if len(b64) != 4 * ((size + 2) // 3):
+        return "length"
+    data = binascii.a2b_base64(b64)
+    if len(data) != size:
+        return "length"
+    return "crc" if zlib.crc32(data) != crc else "invalid"
+
+def _xor_solve(parts: Dict[int, bytes], parity: ParityFrame) -> Dict[int, bytes]:
     start, end = parity.start_seq, parity.end_seq
     missing = [s for s in range(start, end+1) if s not in parts]
     if len(missing) != 1:
-        return
+        return {}
     miss = missing[0]
-    acc = bytes(parity.size)  # start zero
-    for s in range(start, end+1):
-        if s == miss:
-            continue
-        part = parts.get(s, b"")
-        acc = _xor_pad(acc, part, parity.size)
-    recovered = _xor_pad(parity.parity, acc, parity.size)
+    others = (parts[s] for s in range(start, end+1) if s != miss)
     # We cannot verify the original CRC (unknown), but length is bounded
-    parts[miss] = recovered[:parity.size]
+    return {miss: xor_parity(itertools.chain((parity.parity,), others), parity.size)}
 
-def decode_frames(lines: List[str]) -> bytes:
-    data_parts: Dict[int, bytes] = {}
-    parities: List[ParityFrame] = []
+def _strided_solve(parts: Dict[int, bytes], q: StridedParityFrame) -> Dict[int, bytes]:
+    members = q.members
+    missing = [s for s in members if s not in parts]
+    if len(missing) != 1:
+        return {}
+    miss = missing[0]
+    block = xor_parity(itertools.chain((q.parity,), (parts[s] for s in members if s != miss)), q.size)
+    return {miss: block[:q.last] if miss == members[-1] else block}
 
-    for line in lines:
+def _rs_solve(parts: Dict[int, bytes], repairs: List[RepairFrame]) -> Dict[int, bytes]:
+    first = repairs[0]
+    start, end, size = first.start_seq, first.end_seq, first.size
+    k = end - start + 1
+    known = {}
+    for s in range(start, end+1):
+        part = parts.get(s)
+        if part is not None:
+            if len(part) > size:
+                return {}
+            known[s - start] = part
+    blocks = {r.index: r.payload for r in repairs if r.size == size and r.end_seq == end}
+    return {start + j: (block[:first.last] if start + j == end else block)
+            for j, block in rs_recover(known, blocks, k, size).items()}
+
+def recover_with_parity(parts: Dict[int, bytes], parity: ParityFrame) -> None:
+    """If exactly one frame missing in the parity range, reconstruct it via XOR and insert."""
+    parts.update(_xor_solve(parts, parity))
+
+def recover_with_repairs(parts: Dict[int, bytes], repairs: List[RepairFrame]) -> None:
+    """Reed-Solomon recovery for one group: if losses <= repair frames received, reconstruct all of them."""
+    parts.update(_rs_solve(parts, repairs))
+
+def seq_ranges(seqs: Iterable[int]) -> List[Tuple[int, int]]:
+    """Sorted seqs as inclusive (first, last) runs: [1, 2, 3, 7] -> [(1, 3), (7, 7)]."""
+    out: List[Tuple[int, int]] = []
+    for s in sorted(seqs):
+        if out and s == out[-1][1] + 1:
+            out[-1] = (out[-1][0], s)
+        else:
+            out.append((s, s))
+    return out
+
+def _merge_ranges(ranges: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Inclusive (first, last) ranges merged where they overlap or touch, sorted."""
+    out: List[Tuple[int, int]] = []
+    for first, last in sorted(ranges):
+        if out and first <= out[-1][1] + 1:
+            out[-1] = (out[-1][0], max(out[-1][1], last))
+        else:
+            out.append((first, last))
+    return out
+
+def max_frames(frame_size: int) -> int:
+    """Most data frames a tx of at most MAX_TX_BYTES can take at frame_size bytes a frame."""
+    return -(-codecs.MAX_TX_BYTES // max(1, frame_size))
+
+def _top_seq(fr) -> int:
+    """Highest data seq a frame claims exists (its own, its group's end, or its envelope's total)."""
+    if isinstance(fr, DataFrame):
+        top = fr.seq
+    elif isinstance(fr, StridedParityFrame):
+        top = fr.start_seq + fr.stride * (fr.count - 1)
+    else:
+        top = fr.end_seq
+    return max(top, (fr.total or 0) - 1)
+
+def _in_ranges(ranges: List[Tuple[int, int]], starts: List[int], seq: int) -> bool:
+    i = bisect.bisect_right(starts, seq) - 1
+    return i >= 0 and seq <= ranges[i][1]
+
+FRAME_KINDS = {DataFrame: "data", ParityFrame: "parity", RepairFrame: "repair", StridedParityFrame: "strided",
+               FountainSymbol: "fountain", AuthFrame: "auth"}
+
+@dataclass
+class DecodeReport:
+    """
+    What a Decoder saw and did. The counters (frames by kind, rejected lines by
+    reject_reason, duplicates, frames arriving after completion, seqs rebuilt
+    by parity/repair, groups dropped because their auth tag did not verify,
+    seconds spent parsing, recovering and verifying) accumulate and may
+    be shared by several decoders; the rest is a snapshot of one tx, filled in
+    by Decoder.report().
+    """
+    frames: Dict[str, int] = field(default_factory=dict)
+    rejected: Dict[str, int] = field(default_factory=dict)
+    duplicates: int = 0
+    late: int = 0
+    recovered: int = 0
+    unauthenticated: int = 0
+    parse_seconds: float = 0.0
+    recovery_seconds: float = 0.0
+    auth_seconds: float = 0.0
+    complete: bool = False
+    error: Optional[str] = None
+    last_seq: Optional[int] = None
+    recovered_seqs: List[int] = field(default_factory=list)
+    missing: List[Tuple[int, int]] = field(default_factory=list)  # inclusive seq ranges
+    gap: Optional[int] = None  # first missing seq: where result() truncates
+
+    def merge(self, other: "DecodeReport") -> None:
+        """Add other's counters to these."""
+        for name in ("frames", "rejected"):
+            mine = getattr(self, name)
+            for key, n in getattr(other, name).items():
+                mine[key] = mine.get(key, 0) + n
+        self.duplicates += other.duplicates
+        self.late += other.late
+        self.recovered += other.recovered
+        self.unauthenticated += other.unauthenticated
+        self.parse_seconds += other.parse_seconds
+        self.recovery_seconds += other.recovery_seconds
+        self.auth_seconds += other.auth_seconds
+
+class _Group:
+    """One parity/repair constraint over a range of seqs, with a live count of missing members."""
+    __slots__ = ("key", "members", "parity", "repairs", "missing")
+
+    def __init__(self, key: tuple, members: range, parity=None):
+        self.key = key
+        self.members = members
+        self.parity = parity
+        self.repairs: List[RepairFrame] = []
+        self.missing = 0
+
+    def solvable(self) -> bool:
+        if self.missing == 0:
+            return False
+        if self.parity is not None:
+            return self.missing == 1
+        return self.missing <= len(self.repairs)
+
+class Decoder:
+    """
+    Incremental frame reassembler for live feeds (serial, radio, stdin).
+
+    feed(line) parses one line and updates reassembly and parity/repair
+    recovery in O(1) amortised per frame (each group keeps a running count of
+    its missing members, so recovery is attempted only when it can succeed).
+    feed returns the raw transaction bytes on the call that completes it and
+    None otherwise; is_complete(), missing() and result() expose the state.
+
+    The frame count comes from the X: envelope when present; for a bare v1
+    stream it is learned from the short tail frame or the short last parity
+    group, and a stream whose length gives neither is only known complete at EOF, where result() returns the same best-effort
+    contiguous prefix as decode_frames.
+
+    Counters go to stats (a DecodeReport, possibly shared with other decoders);
+    report() adds why the tx is or is not complete. A frame claiming a seq or
+    total no tx of compress.MAX_TX_BYTES could reach at the frame size seen
+    (max_frames) is rejected as "invalid" before it sizes anything.
+
+    With hmac_key set, a tx that carries A: tags (or any tx, with require_auth)
+    is only released once every seq up to the tag marked last is covered by
+    tags that verify; the tags, not the stream heuristics, say where it ends.
+    A fountain-decoded tx needs the tag over its source symbols (courier.fountain).
+    A group whose tag fails is dropped (data and tag, and the parity/repair
+    groups that rebuilt any of its seqs, which may be forged) so a resend can
+    refill it, and result() gives no unauthenticated prefix. Without a key, A: frames
+    are ignored.
+    """
+
+    def __init__(self, stats: Optional[DecodeReport] = None, hmac_key: Optional[bytes] = None,
+                 require_auth: bool = False):
+        self.stats = stats if stats is not None else DecodeReport()
+        self.hmac_key = hmac_key
+        self.require_auth = require_auth
+        self.parts: Dict[int, bytes] = {}
+        self.total: Optional[int] = None  # data frame count, from an X: envelope
+        self.codec = codecs.CODEC_NONE
+        self.error: Optional[str] = None
+        self.last_seq: Optional[int] = None
+        self._recovered = set()
+        self._rebuilt_by: Dict[int, _Group] = {}  # recovered seq -> the group that rebuilt it
+        self._groups: Dict[tuple, _Group] = {}
+        self._by_seq: Dict[int, List[_Group]] = {}
+        self._queue: List[_Group] = []
+        self._frame_size = 0
+        self._short: Optional[Tuple[int, int]] = None  # (len, seq) of the shortest real data frame
+        self._span = 0
+        self._short_group: Optional[Tuple[int, int]] = None  # (span, end) of the narrowest group
+        self._max_seq = -1
+        self._fountain = FountainDecoder()
+        self._result: Optional[bytes] = None
+        self._tags: Dict[Tuple[int, int], AuthFrame] = {}
+        self._verified: set = set()  # (start, end) of tags checked against the data
+        self._last_tags: List[AuthFrame] = []  # tags marked last: candidate ends of the tx
+
+    def feed(self, line: str) -> Optional[bytes]:
+        t0 = time.perf_counter()
         fr = parse_frame(line)
+        self.stats.parse_seconds += time.perf_counter() - t0
         if fr is None:
-            continue
+            reason = reject_reason(line)
+            if reason is not None:
+                self.stats.rejected[reason] = self.stats.rejected.get(reason, 0) + 1
+            return None
+        return self.feed_frame(fr)
+
+    def feed_frame(self, fr) -> Optional[bytes]:
+        stats = self.stats
+        if self._result is not None or self.error is not None:
+            stats.late += 1
+            return None
+        if not isinstance(fr, FountainSymbol) and \
+                _top_seq(fr) >= max_frames(max(self._frame_size, getattr(fr, "size", 0))):
+            # no tx within MAX_TX_BYTES reaches this seq: refuse before anything is sized by it
+            stats.rejected["invalid"] = stats.rejected.get("invalid", 0) + 1
+            return None
+        kind = FRAME_KINDS[type(fr)]
+        stats.frames[kind] = stats.frames.get(kind, 0) + 1
+        if fr.codec:
+            self.codec = fr.codec
+        if fr.total and not isinstance(fr, FountainSymbol):
+            self.total = fr.total
         if isinstance(fr, DataFrame):
-            data_parts[fr.seq] = fr.payload
-        else:
-            parities.append(fr)
-
-    # Attempt parity-based single-loss recovery
-    for p in parities:
-        recover_with_parity(data_parts, p)
-
-    if not data_parts:
-        return b""
-    # Build contiguous from min to max available
-    seqs = sorted(data_parts.keys())
-    result = []
-    for s in range(seqs[0], seqs[-1] + 1):
-        if s in data_parts:
-            result.append(data_parts[s])
+            self._add_data(fr.seq, fr.payload, recovered=False)
+        elif isinstance(fr, FountainSymbol):
+            tx = self._fountain.feed(fr)
+            if not self._authenticating():
+                return self._finish(tx) if tx is not None else None
+            # else a decoded tx waits for the A: tag over its source symbols
+        elif isinstance(fr, AuthFrame):
+            if self.hmac_key is not None:
+                key = (fr.start_seq, fr.end_seq)
+                if key in self._tags:
+                    stats.duplicates += 1
+                else:
+                    self._tags[key] = fr
+                    if fr.last:
+                        self._last_tags.append(fr)
+        elif isinstance(fr, RepairFrame):
+            key = ("R", fr.start_seq, fr.end_seq, fr.size)
+            g = self._groups.get(key) or self._add_group(key, range(fr.start_seq, fr.end_seq + 1), fr.size)
+            if all(r.index != fr.index for r in g.repairs):
+                g.repairs.append(fr)
+                if fr.last < fr.size:
+                    self.last_seq = fr.end_seq
+                self._enqueue(g)
+            else:
+                stats.duplicates += 1
+        elif isinstance(fr, ParityFrame):
+            key = ("P", fr.start_seq, fr.end_seq)
+            if key not in self._groups:
+                self._enqueue(self._add_group(key, range(fr.start_seq, fr.end_seq + 1), fr.size, fr))
+            else:
+                stats.duplicates += 1
+        elif isinstance(fr, StridedParityFrame):
+            key = ("Q", fr.start_seq, fr.stride, fr.count)
+            if key not in self._groups:
+                if fr.last < fr.size:
+                    self.last_seq = fr.members[-1]
+                self._enqueue(self._add_group(key, fr.members, fr.size, fr))
+            else:
+                stats.duplicates += 1
+        if self._queue:
+            t0 = time.perf_counter()
+            self._drain()
+            stats.recovery_seconds += time.perf_counter() - t0
+        return self._check_complete()
+
+    def is_complete(self) -> bool:
+        return self._result is not None
+
+    def missing(self) -> List[int]:
+        """Sequence numbers still needed (up to the highest seq known to exist)."""
+        return [s for first, last in self.missing_ranges() for s in range(first, last + 1)]
+
+    def open_tail(self) -> Optional[int]:
+        """First seq past everything seen while the stream length is still unknown, else None."""
+        if self._result is not None or self.total is not None:
+            return None
+        if self._authenticating():
+            ended = any(t.end_seq <= self._max_seq for t in self._last_tags)
+            return None if ended else self._max_seq + 1
+        if self.last_seq is not None:
+            return None
+        return self._max_seq + 1
+
+    def missing_ranges(self) -> List[Tuple[int, int]]:
+        """missing() as inclusive (first, last) runs, built from the seqs held (never the whole range)."""
+        if self._result is not None:
+            return []
+        upper = self.last_seq if self.last_seq is not None else self._max_seq
+        held = sorted(self.parts)
+        if self._authenticating():
+            upper = self._max_seq if self.total is None else self.total - 1
+            # data no tag covers yet is needed again: a resend brings the tag with it
+            covered = _merge_ranges((t.start_seq, t.end_seq) for t in self._tags.values())
+            starts = [first for first, _ in covered]
+            held = [s for s in held if _in_ranges(covered, starts, s)]
+        out: List[Tuple[int, int]] = []
+        nxt = 0
+        for s in held:
+            if s > upper:
+                break
+            if s > nxt:
+                out.append((nxt, s - 1))
+            nxt = s + 1
+        if nxt <= upper:
+            out.append((nxt, upper))
+        return out
+
+    def report(self) -> DecodeReport:
+        """Counters so far plus this tx's state: recovered seqs, missing ranges, where it truncates."""
+        missing = self.missing_ranges()
+        return replace(self.stats, frames=dict(self.stats.frames), rejected=dict(self.stats.rejected),
+                       complete=self._result is not None, error=self.error, last_seq=self.last_seq,
+                       recovered_seqs=sorted(self._recovered), missing=missing,
+                       gap=missing[0][0] if missing else None)
+
+    def result(self) -> bytes:
+        """The finished tx, or the contiguous prefix available so far."""
+        if self._result is not None:
+            return self._result
+        if not self.parts or self.codec or self._authenticating():
+            return b""  # a prefix of a compressed tx is useless; an unauthenticated one is untrusted
+        # Build contiguous from min to max available
+        seqs = sorted(self.parts.keys())
+        result = []
+        for s in range(seqs[0], seqs[-1] + 1):
+            if s in self.parts:
+                result.append(self.parts[s])
+            else:
+                break  # stop at first gap
+        return b"".join(result)
+
+    def _add_group(self, key: tuple, members: range, size: int, parity=None) -> _Group:
+        g = _Group(key, members, parity)
+        g.missing = sum(1 for s in members if s not in self.parts)
+        self._groups[key] = g
+        for s in members:
+            self._by_seq.setdefault(s, []).append(g)
+        end = members[-1]
+        if members.step == 1:
+            # only runs of consecutive seqs tell the stream length by being short
+            span = len(members)
+            self._span = max(self._span, span)
+            if self._short_group is None or span < self._short_group[0]:
+                self._short_group = (span, end)
+        self._frame_size = max(self._frame_size, size)
+        self._max_seq = max(self._max_seq, end)
+        return g
+
+    def _add_data(self, seq: int, payload: bytes, recovered: bool) -> None:
+        if seq in self.parts:
+            if not recovered and seq in self._recovered:
+                # a real frame beats a reconstruction (exact length for a short tail)
+                self.parts[seq] = payload
+                self._recovered.discard(seq)
+                self._rebuilt_by.pop(seq, None)
+            elif not recovered:
+                self.stats.duplicates += 1
+            return
+        self.parts[seq] = payload
+        if recovered:
+            self._recovered.add(seq)
+            self.stats.recovered += 1
         else:
-            break  # stop at first gap
-    return b"".join(result)
+            self._frame_size = max(self._frame_size, len(payload))
+            if self._short is None or len(payload) < self._short[0]:
+                self._short = (len(payload), seq)
+        self._max_seq = max(self._max_seq, seq)
+        for g in self._by_seq.get(seq, ()):
+            g.missing -= 1
+            self._enqueue(g)
+
+    def _enqueue(self, g: _Group) -> None:
+        if g.solvable():
+            self._queue.append(g)
+
+    def _drain(self) -> None:
+        while self._queue:
+            g = self._queue.pop()
+            if not g.solvable():
+                continue
+            if isinstance(g.parity, StridedParityFrame):
+                solved = _strided_solve(self.parts, g.parity)
+            elif g.parity is not None:
+                solved = _xor_solve(self.parts, g.parity)
+            else:
+                solved = _rs_solve(self.parts, g.repairs)
+            for seq, block in solved.items():
+                if seq not in self.parts:
+                    self._rebuilt_by[seq] = g
+                self._add_data(seq, block, recovered=True)
+
+    def _check_complete(self) -> Optional[bytes]:
+        if self._authenticating():
+            return self._check_authenticated()  # the tags say where the tx ends
+        if self.total is not None:
+            self.last_seq = self.total - 1
+        elif self._short is not None and self._short[0] < self._frame_size:
+            self.last_seq = self._short[1]
+        elif self._short_group is not None and self._short_group[0] < self._span:
+            self.last_seq = self._short_group[1]
+        last = self.last_seq
+        if last is None or len(self.parts) < last + 1:
+            return None
+        if any(s not in self.parts for s in range(last + 1)):
+            return None
+        return self._finish(b"".join(self.parts[s] for s in range(last + 1)))
+
+    def _authenticating(self) -> bool:
+        return self.hmac_key is not None and (self.require_auth or bool(self._tags))
+
+    def _check_authenticated(self) -> Optional[bytes]:
+        if self._fountain.is_complete():
+            return self._check_fountain()
+        for tag in list(self._last_tags):
+            end = tag.end_seq
+            if len(self.parts) < end + 1 or any(s not in self.parts for s in range(end + 1)):
+                continue
+            t0 = time.perf_counter()
+            ok = self._covered(tag.start_seq - 1) and self._check_tag(tag)
+            self.stats.auth_seconds += time.perf_counter() - t0
+            if ok:
+                self.last_seq = end
+                return self._finish(b"".join(self.parts[s] for s in range(end + 1)))
+        return None
+
+    def _check_fountain(self) -> Optional[bytes]:
+        """Release a fountain-decoded tx once a tag over its k source symbols verifies."""
+        fountain = self._fountain
+        parts = source_parts(fountain.result(), fountain.symbol_bytes)
+        for tag in list(self._last_tags):
+            if tag.start_seq != 0 or tag.end_seq != len(parts) - 1:
+                continue
+            t0 = time.perf_counter()
+            ok = auth.verify(self.hmac_key, tag.tag, parts, 0, tag.end_seq, True, tag.tx_id, self.codec)
+            self.stats.auth_seconds += time.perf_counter() - t0
+            if ok:
+                return self._finish(fountain.result())
+            # a forged symbol or a forged tag: drop both, the stream repeats the tag and is rateless
+            self.stats.unauthenticated += 1
+            del self._tags[(tag.start_seq, tag.end_seq)]
+            self._last_tags.remove(tag)
+            self._fountain = FountainDecoder()
+            return None
+        return None
+
+    def _covered(self, end: int) -> bool:
+        """Seqs 0..end are covered by consecutive tags that verify."""
+        by_start: Dict[int, List[AuthFrame]] = {}
+        for t in list(self._tags.values()):
+            if t.end_seq <= end:
+                by_start.setdefault(t.start_seq, []).append(t)
+        pos = 0
+        while pos <= end:
+            nxt = next((t for t in by_start.get(pos, ()) if self._check_tag(t)), None)
+            if nxt is None:
+                return False
+            pos = nxt.end_seq + 1
+        return pos == end + 1
+
+    def _check_tag(self, tag: AuthFrame) -> bool:
+        key = (tag.start_seq, tag.end_seq)
+        if key in self._verified:
+            return True
+        if self._tags.get(key) is not tag:
+            return False  # dropped by an earlier failure
+        parts = [self.parts[s] for s in range(tag.start_seq, tag.end_seq + 1)]
+        if auth.verify(self.hmac_key, tag.tag, parts, tag.start_seq, tag.end_seq, bool(tag.last),
+                       tag.tx_id, self.codec):
+            self._verified.add(key)
+            return True
+        self._reject(tag)
+        return False
+
+    def _reject(self, tag: AuthFrame) -> None:
+        """Drop a group whose tag did not verify: its data (forged, or rebuilt from forged parity) and the tag."""
+        self.stats.unauthenticated += 1
+        del self._tags[(tag.start_seq, tag.end_seq)]
+        if tag.last:
+            self._last_tags.remove(tag)
+        for s in range(tag.start_seq, tag.end_seq + 1):
+            if self.parts.pop(s, None) is not None:
+                self._recovered.discard(s)
+                for g in self._by_seq.get(s, ()):
+                    g.missing += 1
+                source = self._rebuilt_by.pop(s, None)
+                if source is not None:
+                    self._drop_group(source)
+
+    def _drop_group(self, g: _Group) -> None:
+        """Forget a parity/repair group, so the same P:/Q:/R: frames are taken afresh when they come again."""
+        if self._groups.get(g.key) is g:
+            del self._groups[g.key]
+        for s in g.members:
+            groups = self._by_seq.get(s)
+            if groups is not None and g in groups:
+                groups.remove(g)
+        g.missing = 0  # never solvable again, should it still be queued
+
+    def _finish(self, payload: bytes) -> Optional[bytes]:
+        try:
+            self._result = codecs.decompress(payload, self.codec)
+        except ValueError as e:
+            self.error = str(e)
+            return None
+        return self._result
+
+def decode_frames(lines: List[str], hmac_key: Optional[bytes] = None, require_auth: bool = False) -> bytes:
+    decoder = Decoder(hmac_key=hmac_key, require_auth=require_auth)
+    for fr in parse_frames(lines):
+        decoder.feed_frame(fr)
+    return decoder.result()
+
+def decode_report(lines: Iterable[str], hmac_key: Optional[bytes] = None,
+                  require_auth: bool = False) -> Tuple[bytes, DecodeReport]:
+    """decode_frames plus a DecodeReport saying why the result is short or empty."""
+    decoder = Decoder(hmac_key=hmac_key, require_auth=require_auth)
+    for line in lines:
+        decoder.feed(line)
+    return decoder.result(), decoder.report()
+
+class Demuxer:
+    """
+    Reassemble many transactions concurrently from one mixed stream.
+
+    Frames are routed by the tx_id of their X: envelope to one Decoder each;
+    bare v1 frames share the "" stream. feed() returns (tx_id, raw) when a
+    tx completes. Late frames of finished txs are dropped, except on the ""
+    stream, which starts over with the next bare tx; at most max_open
+    partial txs are kept (oldest evicted first). hmac_key and require_auth
+    are passed to every Decoder.
+    """
+
+    def __init__(self, max_open: int = 1024, max_done: int = 4096, hmac_key: Optional[bytes] = None,
+                 require_auth: bool = False):
+        self.max_open = max_open
+        self.max_done = max_done
+        self.hmac_key = hmac_key
+        self.require_auth = require_auth
+        self.open: Dict[str, Decoder] = {}
+        self._done: Dict[str, None] = {}
+
+    def feed(self, line: str) -> Optional[Tuple[str, bytes]]:
+        fr = parse_frame(line)
+        if fr is None:
+            return None
+        return self.feed_frame(fr)
+
+    def feed_frame(self, fr) -> Optional[Tuple[str, bytes]]:
+        tx_id = fr.tx_id or ""
+        if tx_id in self._done:
+            return None
+        decoder = self.open.get(tx_id)
+        if decoder is None:
+            if len(self.open) >= self.max_open:
+                del self.open[next(iter(self.open))]
+            decoder = self.open[tx_id] = Decoder(hmac_key=self.hmac_key, require_auth=self.require_auth)
+        raw = decoder.feed_frame(fr)
+        if raw is None:
+            return None
+        del self.open[tx_id]
+        if not tx_id:
+            return tx_id, raw  # the bare stream goes on: its next tx starts a fresh decoder
+        self._done[tx_id] = None
+        if len(self._done) > self.max_done:
+            del self._done[next(iter(self._done))]
+        return tx_id, raw
+
+    def pending(self) -> Dict[str, List[int]]:
+        """tx_id -> missing seqs for every partially received tx."""
+        return {tx_id: d.missing() for tx_id, d in self.open.items()}
+
+def demux_frames(lines: List[str], hmac_key: Optional[bytes] = None, require_auth: bool = False) -> Dict[str, bytes]:
+    """
+    Decode a mixed stream into {tx_id: raw} for every completed tx. Bare v1
+    frames are reported under "" with decode_frames' best-effort semantics.
+    """
+    demux = Demuxer(max_open=1 << 30, hmac_key=hmac_key, require_auth=require_auth)
+    out: Dict[str, bytes] = {}
+    for fr in parse_frames(lines):
+        done = demux.feed_frame(fr)
+        if done is not None:
+            out[done[0]] = done[1]
+    legacy = demux.open.get("")
+    if legacy is not None and legacy.result():
+        out[""] = legacy.result()
+    return out
 
 def cli():
     ap = argparse.ArgumentParser(description="Foundry Courier – frame/deframe signed transactions for offline carriers (SMS/radio/mesh/USB).")
@@ -186,30 +1220,49 @@ def cli():
     enc.add_argument("--size", type=int, default=64, help="Payload bytes per frame before base64 (default 64).")
     enc.add_argument("--group", type=int, default=8, help="Frames per parity group (default 8).")
     enc.add_argument("--no-parity", action="store_true", help="Disable parity frames.")
+    enc.add_argument("--repair", type=int, default=1, help="Repair frames per group: 1 = XOR parity, m > 1 = Reed-Solomon (default 1).")
+    enc.add_argument("--layout", choices=PARITY_LAYOUTS, default="contiguous", help="XOR parity group layout (default contiguous).")
+
+    for name in ("batch-encode", "batch-decode"):
+        bat = sub.add_parser(name, help="Process a directory or JSONL batch in parallel (see courier.batch).")
+        bat.add_argument("input", help="Input directory or .jsonl file.")
+        bat.add_argument("-o", "--output", required=True, help="Output directory or .jsonl file.")
+        bat.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count).")
+        bat.add_argument("--chunksize", type=int, default=64, help="Items per task submitted to a worker.")
 
     dec = sub.add_parser("decode", help="Decode frames back into raw signed transaction bytes.")
-    dec.add_argument("input", help="Path to file with frames (one per line).")
+    dec.add_argument("input", help="Path to file with frames (one per line; noise lines are skipped).")
     dec.add_argument("-o", "--output", help="Write raw tx hex to file (default stdout).")
 
     args = ap.parse_args()
+    key = auth.key_from_env()  # SVNEVM_HMAC: tag what is encoded, check what is decoded
 
     if args.cmd == "encode":
         tx_hex = Path(args.input).read_text().strip().lower().replace("0x","")
-        frames = encode_frames(tx_hex, frame_payload_bytes=args.size, group_size=args.group, add_parity=(not args.no_parity))
+        frames = encode_frames(tx_hex, frame_payload_bytes=args.size, group_size=args.group, add_parity=(not args.no_parity),
+                               repair_frames=args.repair, parity_layout=args.layout, hmac_key=key)
         out = "\n".join(frames)
         if args.output:
             Path(args.output).write_text(out)
         else:
             print(out)
 
+    elif args.cmd in ("batch-encode", "batch-decode"):
+        from courier.batch import run_batch
+        summary = run_batch(args.cmd[6:], args.input, args.output, workers=args.workers, chunksize=args.chunksize,
+                            hmac_key=key)
+        print(f"{summary['ok']}/{summary['total']} ok, {summary['failed']} failed", file=sys.stderr)
+
     elif args.cmd == "decode":
-        lines = Path(args.input).read_text().splitlines()
-        raw = decode_frames(lines)
-        raw_hex = raw.hex()
+        # streamed byte scan: multi-GB capture logs never load into memory (see courier.scan)
+        from courier.scan import scan
+        txs = []
+        scan(args.input, on_tx=lambda tx_id, raw: txs.append(raw.hex()), hmac_key=key)
+        out = "\n".join(txs) if txs else ""
         if args.output:
-            Path(args.output).write_text(raw_hex)
+            Path(args.output).write_text(out)
         else:
-            print(raw_hex)
+            print(out)
 
 if __name__ == "__main__":
     cli()
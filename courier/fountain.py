@@ -0,0 +1,320 @@
+"""
+Rateless (LT-style) fountain coding for one-way broadcast carriers.
+
+The encoder is an unbounded generator of symbol lines:
+
+    L:<esi>:<length>:<crc>:<base64symbol>
+
+esi     encoding symbol id (0, 1, 2, ...). The first k symbols are the
+        source symbols themselves (systematic); every later symbol is the
+        XOR of a pseudo-random set of source symbols.
+length  byte length of the transaction; together with the symbol size
+        (the payload length) it fixes k = ceil(length / symbol_size).
+
+The neighbour set of a symbol depends only on (esi, k), drawn from a robust
+soliton degree distribution with a tiny xorshift32 PRNG so that any
+implementation can reproduce it. The receiver needs no back channel: it
+peels symbols as they arrive and stops as soon as all k source symbols are
+known, typically after k * (1 + eps) symbols, whichever ones they are.
+
+With an HMAC key, an A: line tagging the whole tx (courier/auth.py: seqs
+0..k-1 over the k source symbols, marked last) goes ahead of the first
+symbol and again every k symbols, so a receiver tuning in late still gets it.
+"""
+import base64
+import binascii
+import bisect
+import math
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Set
+
+from courier import auth
+from courier.compress import MAX_TX_BYTES
+from courier.syntax import DATACLASS_OPTS, SYMBOL_RE
+
+# Robust soliton parameters (Luby): c scales the spike, delta is the failure bound
+SOLITON_C = 0.1
+SOLITON_DELTA = 0.05
+# Below this many unresolved sources a stalled peel falls back to GF(2) elimination
+DENSE_FALLBACK = 64
+# A decoder allocates k source slots and a k-entry degree table up front, so an
+# untrusted header must not be able to ask for more than this
+MAX_SYMBOLS = 65536
+
+
+@dataclass(**DATACLASS_OPTS)
+class FountainSymbol:
+    esi: int
+    length: int
+    crc: int
+    payload: bytes
+    tx_id: Optional[str] = None
+    total: Optional[int] = None
+    codec: int = 0
+
+
+def _xorshift32(state: int) -> int:
+    state ^= (state << 13) & 0xffffffff
+    state ^= state >> 17
+    state ^= (state << 5) & 0xffffffff
+    return state
+
+
+_CDF_CACHE: Dict[int, List[float]] = {}
+
+
+def _degree_cdf(k: int) -> List[float]:
+    cdf = _CDF_CACHE.get(k)
+    if cdf is not None:
+        return cdf
+    rho = [0.0, 1.0 / k] + [1.0 / (d * (d - 1)) for d in range(2, k + 1)]
+    s = SOLITON_C * math.log(k / SOLITON_DELTA) * math.sqrt(k)
+    spike = max(1, min(k, int(round(k / s)))) if s > 0 else k
+    tau = [0.0] * (k + 1)
+    for d in range(1, spike):
+        tau[d] = s / (k * d)
+    tau[spike] += s * math.log(s / SOLITON_DELTA) / k if s > SOLITON_DELTA else 0.0
+    total = sum(rho) + sum(tau)
+    cdf, acc = [], 0.0
+    for d in range(1, k + 1):
+        acc += (rho[d] + tau[d]) / total
+        cdf.append(acc)
+    _CDF_CACHE[k] = cdf
+    return cdf
+
+
+def symbol_neighbors(esi: int, k: int) -> Set[int]:
+    """Source indices XORed into symbol esi of a k-symbol transaction."""
+    if esi < k:
+        return {esi}
+    state = (esi * 0x9E3779B1 + k) & 0xffffffff or 1
+    state = _xorshift32(state)
+    cdf = _degree_cdf(k)
+    degree = min(k, bisect.bisect_left(cdf, state / 2**32) + 1)
+    if degree * 2 > k:
+        # draw the (smaller) complement instead
+        skip = _draw_distinct(state, k, k - degree)
+        return set(range(k)) - skip
+    return _draw_distinct(state, k, degree)
+
+
+def _draw_distinct(state: int, k: int, degree: int) -> Set[int]:
+    out: Set[int] = set()
+    while len(out) < degree:
+        state = _xorshift32(state)
+        out.add(state % k)
+    return out
+
+
+def fountain_frames(tx_hex: str, symbol_bytes: int = 64, start: int = 0, tx_id: Optional[str] = None,
+                    hmac_key: Optional[bytes] = None, tag_bytes: int = auth.DEFAULT_TAG_BYTES) -> Iterator[str]:
+    """
+    Unbounded generator of L: symbol lines for tx_hex (no 0x).
+    start: first esi to emit (resume a broadcast loop, or skip the systematic prefix).
+    tx_id: wrap each symbol in an X:<tx_id>:<k>: envelope for multiplexed streams.
+    hmac_key: interleave the A: tag of the tx (see above).
+    """
+    raw = bytes.fromhex(tx_hex)
+    if not raw:
+        return
+    k = -(-len(raw) // symbol_bytes)
+    mv = memoryview(raw)
+    words = [int.from_bytes(mv[i*symbol_bytes:(i+1)*symbol_bytes], "little") for i in range(k)]
+    envelope = f"X:{tx_id}:{k:06d}:" if tx_id is not None else ""
+    tag_line = None
+    if hmac_key is not None:
+        tag = auth.group_tag(hmac_key, source_parts(raw, symbol_bytes), 0, k - 1, True, tx_id, 0, tag_bytes)
+        tag_line = envelope + f"A:{0:06d}:{k - 1:06d}:1:" + base64.b64encode(tag).decode("ascii")
+    esi = start
+    while True:
+        if tag_line is not None and (esi - start) % k == 0:
+            yield tag_line
+        acc = 0
+        for j in symbol_neighbors(esi, k):
+            acc ^= words[j]
+        block = acc.to_bytes(symbol_bytes, "little")
+        crc = zlib.crc32(block) & 0xffffffff
+        yield envelope + f"L:{esi:06d}:{len(raw):06d}:{crc:08x}:" + base64.b64encode(block).decode("ascii")
+        esi += 1
+
+
+def source_parts(raw: bytes, symbol_bytes: int) -> List[bytes]:
+    """The source symbols of raw as an A: tag covers them (the last one unpadded)."""
+    return [raw[i:i + symbol_bytes] for i in range(0, len(raw), symbol_bytes)]
+
+
+def parse_symbol(rest) -> Optional[FountainSymbol]:
+    """
+    Parse the part of an L: line after the kind prefix (str or bytes). The
+    structure is checked by pattern before any base64 or CRC work; malformed
+    input gives None without raising.
+    """
+    if isinstance(rest, str):
+        rest = rest.encode("latin-1", "replace")
+    m = SYMBOL_RE.fullmatch(rest.strip())
+    if m is None:
+        return None
+    esi, length, crc, b64 = m.groups()
+    if not b64 or len(b64) % 4:
+        return None
+    payload = binascii.a2b_base64(b64)
+    crc = int(crc, 16)
+    if zlib.crc32(payload) != crc:
+        return None
+    if not 0 < int(length) <= MAX_TX_BYTES:
+        return None
+    return FountainSymbol(esi=int(esi), length=int(length), crc=crc, payload=payload)
+
+
+class FountainDecoder:
+    """
+    Incremental peeling decoder. feed() one line or FountainSymbol at a time;
+    it returns the raw transaction bytes on the call where decoding succeeds
+    (None before and after; see result()). Symbols for a different length/size are ignored,
+    as are first symbols whose header would need more than MAX_SYMBOLS source symbols.
+    """
+
+    def __init__(self):
+        self.length: Optional[int] = None
+        self.symbol_bytes = 0
+        self.k = 0
+        self.received = 0
+        self._seen: Set[int] = set()
+        self._source: List[Optional[int]] = []
+        self._resolved = 0
+        # pending equations: id -> [unknown neighbours, value]; neighbour -> pending ids
+        self._pending: Dict[int, list] = {}
+        self._by_source: Dict[int, Set[int]] = {}
+        self._next_id = 0
+        self._result: Optional[bytes] = None
+
+    def is_complete(self) -> bool:
+        return self._result is not None
+
+    def result(self) -> Optional[bytes]:
+        return self._result
+
+    def feed(self, item) -> Optional[bytes]:
+        if self._result is not None:
+            return None
+        sym = item
+        if isinstance(item, str):
+            line = item.strip()
+            if not line.startswith("L:"):
+                return None
+            sym = parse_symbol(line[2:])
+        if sym is None:
+            return None
+        if self.length is None:
+            if not sym.payload or not 0 < sym.length <= MAX_TX_BYTES \
+                    or -(-sym.length // len(sym.payload)) > MAX_SYMBOLS:
+                return None
+            self.length = sym.length
+            self.symbol_bytes = len(sym.payload)
+            self.k = -(-sym.length // self.symbol_bytes)
+            self._source = [None] * self.k
+        elif sym.length != self.length or len(sym.payload) != self.symbol_bytes:
+            return None
+        if sym.esi in self._seen:
+            return None
+        self._seen.add(sym.esi)
+        self.received += 1
+
+        unknown = set()
+        value = int.from_bytes(sym.payload, "little")
+        for j in symbol_neighbors(sym.esi, self.k):
+            known = self._source[j]
+            if known is None:
+                unknown.add(j)
+            else:
+                value ^= known
+        self._add_equation(unknown, value)
+        if self._resolved < self.k and len(self._pending) and self.k - self._resolved <= DENSE_FALLBACK \
+                and self.received >= self.k:
+            self._dense_solve()
+        if self._resolved == self.k:
+            self._finish()
+            return self._result
+        return None
+
+    def _add_equation(self, unknown: Set[int], value: int) -> None:
+        if not unknown:
+            return
+        if len(unknown) == 1:
+            self._resolve(next(iter(unknown)), value)
+            return
+        eid = self._next_id
+        self._next_id += 1
+        self._pending[eid] = [unknown, value]
+        for j in unknown:
+            self._by_source.setdefault(j, set()).add(eid)
+
+    def _resolve(self, j: int, value: int) -> None:
+        ripple = [(j, value)]
+        while ripple:
+            j, value = ripple.pop()
+            if self._source[j] is not None:
+                continue
+            self._source[j] = value
+            self._resolved += 1
+            for eid in self._by_source.pop(j, ()):
+                eq = self._pending.get(eid)
+                if eq is None:
+                    continue
+                eq[0].discard(j)
+                eq[1] ^= value
+                if len(eq[0]) == 1:
+                    del self._pending[eid]
+                    last = next(iter(eq[0]))
+                    self._by_source.get(last, set()).discard(eid)
+                    ripple.append((last, eq[1]))
+                elif not eq[0]:
+                    del self._pending[eid]
+
+    def _dense_solve(self) -> None:
+        """GF(2) elimination over the few sources left when peeling stalls."""
+        unknowns = [j for j in range(self.k) if self._source[j] is None]
+        col = {j: i for i, j in enumerate(unknowns)}
+        pivots: Dict[int, list] = {}
+        for unknown, value in self._pending.values():
+            mask = 0
+            for j in unknown:
+                mask |= 1 << col[j]
+            while mask:
+                low = mask & -mask
+                if low not in pivots:
+                    pivots[low] = [mask, value]
+                    break
+                pmask, pvalue = pivots[low]
+                mask ^= pmask
+                value ^= pvalue
+        if len(pivots) < len(unknowns):
+            return
+        # back-substitute from the highest pivot down
+        solved: Dict[int, int] = {}
+        for low in sorted(pivots, reverse=True):
+            mask, value = pivots[low]
+            rest = mask ^ low
+            while rest:
+                bit = rest & -rest
+                value ^= solved[bit]
+                rest ^= bit
+            solved[low] = value
+        for i, j in enumerate(unknowns):
+            self._resolve(j, solved[1 << i])
+
+    def _finish(self) -> None:
+        blocks = b"".join(v.to_bytes(self.symbol_bytes, "little") for v in self._source)
+        self._result = blocks[:self.length]
+        self._pending.clear()
+        self._by_source.clear()
+
+
+def fountain_decode(lines, decoder: Optional[FountainDecoder] = None) -> bytes:
+    """Feed L: lines until the transaction is rebuilt; b"" if the symbols were not enough."""
+    decoder = decoder or FountainDecoder()
+    for line in lines:
+        if decoder.feed(line) is not None:
+            break
+    return decoder.result() or b""
@@ -0,0 +1,203 @@
+"""
+Incremental sneakernet inbox: decode every tx dropped on a USB stick.
+
+ingest() walks a directory tree of frame files from many couriers (text
+frames, packed message units, noisy logs or v2 raw-binary files) and pools
+the frames of all of them, so a tx split across several files still
+decodes. Completed txs are written to an outbox directory, one
+<tx_id>-<sha256 prefix>.hex file each.
+
+An index (JSON, rewritten atomically) makes re-scans cheap:
+
+- files:   path -> (size, mtime_ns, sha256). Files whose size and mtime are
+           unchanged are not opened again; changed files are re-read, and
+           content already seen under another path (a copy, a touch) is skipped.
+- pending: frames of txs still incomplete, so the next run resumes them
+           without re-reading the files they came from.
+- done:    recent completed tx ids, so late frames of them are ignored.
+
+A pending frame that no longer parses means the index was damaged or
+tampered with: it is then trusted for nothing but done, and every file is
+read again.
+
+New and changed files are read, hashed and scanned in worker processes
+(courier.scan's byte prefilter, so noise costs little); the parent only
+feeds the valid frames they return into one Demuxer.
+"""
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from courier import wire
+from courier.foundry_courier import Demuxer, pack_frame, parse_binary, parse_frame
+from courier.scan import candidates, iter_chunks
+
+INDEX_NAME = ".ingest-index.json"
+MAX_DONE = 4096
+
+
+class Index:
+    def __init__(self, path: str):
+        self.path = path
+        self.files: Dict[str, List] = {}
+        self.pending: Dict[str, List[str]] = {}
+        self.done: List[str] = []
+        self._load()
+
+    def hashes(self) -> set:
+        return {entry[2] for entry in self.files.values()}
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return  # missing or damaged index: everything is new
+        self.files = state.get("files", {})
+        self.pending = state.get("pending", {})
+        self.done = state.get("done", [])
+
+    def save(self) -> None:
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump({"files": self.files, "pending": self.pending, "done": self.done[-MAX_DONE:]}, fh)
+        os.replace(tmp, self.path)
+
+
+def read_file(path: str) -> Tuple[str, str, List[str]]:
+    """(path, sha256, valid frame tokens) of one inbox file; runs in a worker process."""
+    digest = hashlib.sha256()
+    tokens: List[str] = []
+    with open(path, "rb") as fh:
+        binary = fh.read(len(wire.BINARY_MAGIC)) == wire.BINARY_MAGIC
+    if binary:
+        with open(path, "rb") as fh:
+            data = fh.read()
+        digest.update(data)
+        # binary records become v2 text tokens, so pending frames store as text like the rest
+        tokens = [wire.encode_text(pack_frame(fr), "b85") for fr in parse_binary(data)]
+        return path, digest.hexdigest(), tokens
+    for chunk in iter_chunks(path):
+        digest.update(chunk)
+        for token in candidates(chunk):
+            for t in token.split():  # packed message units hold several frames
+                if parse_frame(t) is not None:
+                    tokens.append(t.decode("ascii"))
+    return path, digest.hexdigest(), tokens
+
+
+def _walk(root: str, skip: Tuple[str, ...]) -> List[str]:
+    paths = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+        for name in sorted(filenames):
+            path = os.path.abspath(os.path.join(dirpath, name))
+            if not name.startswith(".") and not path.startswith(skip):
+                paths.append(path)
+    return paths
+
+
+def ingest(root: str, outbox: str, index_path: Optional[str] = None, workers: Optional[int] = None,
+           on_tx: Optional[Callable[[str, bytes, str], None]] = None, max_open: int = 1024,
+           hmac_key: Optional[bytes] = None, require_auth: bool = False) -> Dict[str, int]:
+    """
+    Decode what is new under root into outbox. on_tx(tx_id, raw, outbox_path)
+    is called per completed tx. index_path defaults to a file in outbox;
+    workers (default: CPU count) > 1 parses files in parallel processes.
+    hmac_key and require_auth are as for Decoder.
+    Returns a summary: files seen, skipped (unchanged), duplicate (content
+    already seen), parsed, frames, txs, incomplete, reindexed (1 if the
+    index was damaged and everything was read again).
+    """
+    os.makedirs(outbox, exist_ok=True)
+    index = Index(index_path or os.path.join(outbox, INDEX_NAME))
+    summary = {"files": 0, "skipped": 0, "duplicate": 0, "parsed": 0, "frames": 0, "txs": 0, "incomplete": 0,
+               "reindexed": 0}
+    resumed = {tx_id: [parse_frame(t) for t in tokens] for tx_id, tokens in index.pending.items()}
+    if any(fr is None for frames in resumed.values() for fr in frames):
+        index.files.clear()
+        index.pending, resumed = {}, {}
+        summary["reindexed"] = 1
+
+    todo = []
+    present = _walk(root, (os.path.abspath(outbox) + os.sep,))
+    prefix = os.path.join(os.path.abspath(root), "")
+    listed = set(present)
+    for path in [p for p in index.files if p.startswith(prefix) and p not in listed]:
+        del index.files[path]  # removed from the inbox
+    for path in present:
+        summary["files"] += 1
+        st = os.stat(path)
+        known = index.files.get(path)
+        if known is not None and known[0] == st.st_size and known[1] == st.st_mtime_ns:
+            summary["skipped"] += 1
+        else:
+            todo.append((path, st.st_size, st.st_mtime_ns))
+
+    demux = Demuxer(max_open=max_open, hmac_key=hmac_key, require_auth=require_auth)
+    done = set(index.done)
+    pending: Dict[str, Dict[str, None]] = {}  # tx_id -> its frame tokens (ordered set: changed files repeat them)
+
+    def feed(token: str, fr=None) -> None:
+        fr = fr or parse_frame(token)
+        if fr is None:
+            return
+        tx_id = fr.tx_id or ""
+        if tx_id in done:
+            return
+        pending.setdefault(tx_id, {})[token] = None
+        result = demux.feed_frame(fr)
+        if result is not None:
+            _emit(*result)
+
+    def _emit(tx_id: str, raw: bytes) -> None:
+        name = f"{tx_id or 'tx'}-{hashlib.sha256(raw).hexdigest()[:16]}.hex"
+        out = os.path.join(outbox, name)
+        tmp = f"{out}.tmp"
+        with open(tmp, "w") as fh:
+            fh.write(raw.hex() + "\n")
+        os.replace(tmp, out)
+        pending.pop(tx_id, None)
+        if tx_id:
+            done.add(tx_id)
+            index.done.append(tx_id)
+        summary["txs"] += 1
+        if on_tx:
+            on_tx(tx_id, raw, out)
+
+    for tx_id, tokens in index.pending.items():
+        for token, fr in zip(tokens, resumed[tx_id]):
+            feed(token, fr)
+
+    seen = index.hashes()
+    sizes = {path: (size, mtime) for path, size, mtime in todo}
+    paths = [path for path, _, _ in todo]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(paths))) as pool:
+            results = list(pool.map(read_file, paths, chunksize=max(1, len(paths) // (workers * 4))))
+    else:
+        results = map(read_file, paths)
+    for path, digest, tokens in results:
+        index.files[path] = [*sizes[path], digest]
+        if digest in seen:
+            summary["duplicate"] += 1
+            continue
+        seen.add(digest)
+        summary["parsed"] += 1
+        summary["frames"] += len(tokens)
+        for token in tokens:
+            feed(token)
+
+    # a bare v1 stream whose length is a multiple of the frame size never completes on its own:
+    # emit it best-effort once nothing before its last frame is missing (as decode-frames does at EOF)
+    legacy = demux.open.get("")
+    if legacy is not None and legacy.result() and not legacy.missing():
+        del demux.open[""]
+        _emit("", legacy.result())
+    index.pending = {tx_id: list(tokens) for tx_id, tokens in pending.items() if tx_id in demux.open}
+    summary["incomplete"] = len(index.pending)
+    index.save()
+    return summary
@@ -0,0 +1,122 @@
+"""
+Minimal Prometheus text-format metrics (exposition format 0.0.4), stdlib only.
+
+    registry = Registry()
+    requests = registry.counter("courier_requests_total", "Requests.", labels=("status",))
+    latency = registry.histogram("courier_request_seconds", "Request latency.")
+    registry.callback("courier_buffered", "gauge", "Partial txs buffered.", lambda: len(table))
+
+    requests.inc(status="ok"); latency.observe(0.012)
+    body = registry.render()   # serve with CONTENT_TYPE
+
+Callbacks read a value (or {label_value: value}) from live objects when the
+page is rendered, so counters that other components already keep need no
+second copy.
+"""
+import math
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _value(v: float) -> str:
+    if math.isinf(v):
+        return "+Inf" if v > 0 else "-Inf"
+    return repr(float(v)) if isinstance(v, float) and not v.is_integer() else str(int(v))
+
+
+def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+    if not pairs:
+        return ""
+    escaped = (str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.kind = name, help, "counter"
+        self.label_names = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = tuple(str(labels[k]) for k in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[Tuple[str, tuple, float]]:
+        with self._lock:
+            return [(self.name, tuple(zip(self.label_names, key)), v) for key, v in sorted(self._values.items())]
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name, self.help, self.kind = name, help, "histogram"
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot: above every bucket
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        i = next((i for i, b in enumerate(self.buckets) if value <= b), len(self.buckets))
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def samples(self) -> List[Tuple[str, tuple, float]]:
+        with self._lock:
+            counts, total = list(self._counts), self._sum
+        out, running = [], 0
+        for bound, n in zip(self.buckets + (math.inf,), counts):
+            running += n
+            out.append((f"{self.name}_bucket", (("le", _value(bound)),), running))
+        out.append((f"{self.name}_sum", (), total))
+        out.append((f"{self.name}_count", (), running))
+        return out
+
+
+class Callback:
+    """A counter or gauge whose value is read from fn() at render time."""
+
+    def __init__(self, name: str, kind: str, help: str, fn: Callable[[], Union[float, Dict[str, float]]],
+                 label: Optional[str] = None):
+        self.name, self.kind, self.help, self.fn, self.label = name, kind, help, fn, label
+
+    def samples(self) -> List[Tuple[str, tuple, float]]:
+        value = self.fn()
+        if isinstance(value, dict):
+            return [(self.name, ((self.label, k),), v) for k, v in sorted(value.items())]
+        return [(self.name, (), value)]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Union[Counter, Histogram, Callback]] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, buckets))
+
+    def callback(self, name: str, kind: str, help: str, fn, label: Optional[str] = None) -> Callback:
+        if kind not in ("counter", "gauge"):
+            raise ValueError(f"unknown metric type: {kind}")
+        return self._add(Callback(name, kind, help, fn, label))
+
+    def render(self) -> str:
+        lines = []
+        for m in self._metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in m.samples():
+                lines.append(f"{name}{_labels(labels)} {_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _add(self, metric):
+        if any(m.name == metric.name for m in self._metrics):
+            raise ValueError(f"duplicate metric: {metric.name}")
+        self._metrics.append(metric)
+        return metric
@@ -0,0 +1,198 @@
+"""
+Selective retransmit (NACK) for two-way carriers (SMS, two-way mesh).
+
+The receiver answers an incomplete tx with one or more NACK lines listing
+the data seqs it still needs as run-length ranges:
+
+    N:<tx_id>:<ranges>:<crc>
+
+tx_id   the X: envelope id, or "-" for a bare v1 stream
+ranges  comma-separated "a" / "a-b" (inclusive) / "a-" (a and everything
+        after it, sent when the stream length is not known yet)
+crc     crc32 of everything before it, 8 hex digits
+
+so a receiver missing 2 of 200 frames sends e.g. "N:ab12:17,120:1c291ca3"
+instead of asking for the whole tx again. Long lists are split over
+several lines of at most max_len characters (160 for one SMS).
+
+The sender re-frames the original tx with the same frame size, tx id and
+compression and answers with just the requested data frames, or with fresh
+Reed-Solomon repair frames over windows around the gaps (any m of them
+repair m losses, so extra ones cover losses on the resend too). Repair
+frames use the top of the index space, so they never collide with the
+repair frames of the original transmission. Authenticated sends get their
+A: tags again for groups requested in full.
+"""
+import re
+import zlib
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Tuple, Union
+
+from courier import auth, wire
+from courier.foundry_courier import (FORMATS, AuthFrame, DataFrame, Decoder, Demuxer, RepairFrame, _tagged_frames,
+                                     format_frame, pack_frame)
+from courier.parity import rs_encode
+
+NACK_PREFIX = "N:"
+_NACK_RE = re.compile(r"N:(-|[0-9a-z]{1,16}):((?:[0-9]{1,9}(?:-[0-9]{0,9})?)(?:,[0-9]{1,9}(?:-[0-9]{0,9})?)*):"
+                      r"([0-9a-f]{8})")
+
+Range = Tuple[int, Optional[int]]  # inclusive; end None = open (up to the end of the tx)
+
+
+@dataclass
+class Nack:
+    tx_id: Optional[str]
+    ranges: List[Range] = field(default_factory=list)
+
+    def seqs(self, total: int) -> List[int]:
+        """The requested data seqs of a tx with total data frames."""
+        out = set()
+        for start, end in self.ranges:
+            out.update(range(start, total if end is None else min(end + 1, total)))
+        return sorted(out)
+
+
+def _range_text(r: Range) -> str:
+    start, end = r
+    return f"{start}-" if end is None else str(start) if end == start else f"{start}-{end}"
+
+
+def _line(tx_id: Optional[str], parts: List[str]) -> str:
+    body = f"{NACK_PREFIX}{tx_id or '-'}:{','.join(parts)}"
+    return f"{body}:{zlib.crc32(body.encode('ascii')):08x}"
+
+
+def format_nack(tx_id: Optional[str], ranges: Iterable[Range], max_len: Optional[int] = 160) -> List[str]:
+    """NACK lines for ranges, each at most max_len characters (None: one line)."""
+    lines: List[str] = []
+    parts: List[str] = []
+    overhead = len(_line(tx_id, []))
+    used = overhead
+    for text in map(_range_text, ranges):
+        extra = len(text) + (1 if parts else 0)
+        if max_len is not None and parts and used + extra > max_len:
+            lines.append(_line(tx_id, parts))
+            parts, used = [], overhead
+            extra = len(text)
+        if max_len is not None and overhead + len(text) > max_len:
+            raise ValueError(f"max_len {max_len} is too short for a NACK line")
+        parts.append(text)
+        used += extra
+    if parts:
+        lines.append(_line(tx_id, parts))
+    return lines
+
+
+def parse_nack(line: str) -> Optional[Nack]:
+    """Nack for one NACK line, or None if it is not one or fails its CRC."""
+    m = _NACK_RE.fullmatch(line.strip())
+    if m is None:
+        return None
+    body = line.strip()[:-9]
+    if zlib.crc32(body.encode("ascii")) != int(m.group(3), 16):
+        return None
+    ranges: List[Range] = []
+    for part in m.group(2).split(","):
+        start, dash, end = part.partition("-")
+        r = (int(start), None if dash and not end else int(end) if end else int(start))
+        if r[1] is not None and r[1] < r[0]:
+            return None
+        ranges.append(r)
+    return Nack(None if m.group(1) == "-" else m.group(1), ranges)
+
+
+def nack_ranges(decoder: Decoder) -> List[Range]:
+    """Missing data seqs of a decoder as ranges; [] once it is complete."""
+    ranges: List[Range] = list(decoder.missing_ranges())
+    tail = decoder.open_tail()
+    if tail is not None:
+        ranges.append((tail, None))
+    return ranges
+
+
+def nack_for(decoder: Decoder, tx_id: Optional[str] = None, max_len: Optional[int] = 160) -> List[str]:
+    """NACK lines asking for what decoder still needs ([] when complete)."""
+    return format_nack(tx_id, nack_ranges(decoder), max_len)
+
+
+def demux_nacks(demux: Demuxer, max_len: Optional[int] = 160) -> List[str]:
+    """NACK lines for every partial tx of a Demuxer ("" streams as "-")."""
+    lines: List[str] = []
+    for tx_id, decoder in demux.open.items():
+        lines += nack_for(decoder, tx_id or None, max_len)
+    return lines
+
+
+def _repair_windows(seqs: List[int], extra: int, max_window: int) -> List[Tuple[int, int, int]]:
+    """(start, end, m) windows of consecutive seqs covering seqs, each with k + m <= 256 and k <= max_window."""
+    windows: List[Tuple[int, int, int]] = []
+    i = 0
+    while i < len(seqs):
+        start = seqs[i]
+        j = i
+        while j + 1 < len(seqs):
+            nxt = seqs[j + 1]
+            k, m = nxt - start + 1, j + 2 - i + extra
+            if k > max_window or k + m > 256:
+                break
+            j += 1
+        windows.append((start, seqs[j], j + 1 - i + extra))
+        i = j + 1
+    return windows
+
+
+def resend(tx_hex: str, nacks: Iterable[Union[Nack, str]], frame_payload_bytes: int = 64,
+           tx_id: Optional[str] = None, compress: Optional[str] = None, fmt: str = "v1",
+           repair: bool = False, extra: int = 0, max_window: int = 64, hmac_key: Optional[bytes] = None,
+           group_size: int = 8, auth_scope: str = "group", tag_bytes: int = auth.DEFAULT_TAG_BYTES) -> List[str]:
+    """
+    Frames answering nacks for the tx that was sent as tx_hex (frame size,
+    tx id and compression must match the original transmission; tx_id
+    defaults to the one in the NACK). repair=False resends the requested data
+    frames; repair=True sends, per window of at most max_window frames around
+    the gaps, as many fresh repair frames as there are gaps plus extra. Seqs
+    requested by an open range past the known length are always resent as
+    data frames. With hmac_key, the A: tag of every group requested in full is
+    resent too (group_size, auth_scope and tag_bytes as in the original send):
+    the receiver lost it, or dropped it with a forged group.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"fmt must be one of {', '.join(FORMATS)}")
+    if not 0 <= extra <= 128 or not 1 <= max_window <= 128:
+        raise ValueError("extra and max_window must be at most 128")
+    parsed = [parse_nack(n) if isinstance(n, str) else n for n in nacks]
+    if any(n is None for n in parsed):
+        raise ValueError("damaged NACK line")
+    for n in parsed:
+        if tx_id is None:
+            tx_id = n.tx_id
+        elif n.tx_id is not None and n.tx_id != tx_id:
+            raise ValueError(f"NACK is for tx {n.tx_id}, not {tx_id}")
+    frames = _tagged_frames(tx_hex, frame_payload_bytes, group_size, False, 1, tx_id, compress,
+                            hmac_key=hmac_key, auth_scope=auth_scope, tag_bytes=tag_bytes)
+    data = [fr for fr in frames if isinstance(fr, DataFrame)]
+    tags = [fr for fr in frames if isinstance(fr, AuthFrame)]
+    asked = {s for n in parsed for s in n.seqs(len(data))}
+    wanted = sorted(asked)
+    open_from = min((start for n in parsed for start, end in n.ranges if end is None), default=None)
+    out: List[object] = []
+    if repair:
+        closed = [s for s in wanted if open_from is None or s < open_from]
+        for start, end, m in _repair_windows(closed, extra, max_window):
+            members = [data[s].payload for s in range(start, end + 1)]
+            size = max(len(p) for p in members)
+            k = len(members)
+            first = 256 - k - m  # top of the index space: clear of the original repair frames
+            for ridx, block in enumerate(rs_encode(members, m, size, first), start=first):
+                fr = RepairFrame(gidx=0, start_seq=start, end_seq=end, index=ridx, size=size, last=len(members[-1]),
+                                 crc=zlib.crc32(block), payload=block)
+                fr.tx_id, fr.total, fr.codec = data[0].tx_id, data[0].total, data[0].codec
+                out.append(fr)
+        wanted = [s for s in wanted if open_from is not None and s >= open_from]
+    # a receiver holding a group's tag never asks for all of it: only a lost or rejected tag does
+    out = ([t for t in tags if all(s in asked for s in range(t.start_seq, t.end_seq + 1))]
+           + [data[s] for s in wanted] + out)
+    if fmt == "v1":
+        return [format_frame(fr) for fr in out]
+    return [wire.encode_text(pack_frame(fr), fmt[3:]) for fr in out]
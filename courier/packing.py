@@ -0,0 +1,133 @@
+"""
+Pack frame lines into carrier message units.
+
+Carriers bill and rate-limit per message, and one frame per message wastes
+most of a 160-character SMS or a 237-byte LoRa payload. pack() puts as many
+whole frames into each message unit as the carrier profile allows,
+separated by a space (no frame format contains whitespace); unpack() splits
+units back into frame lines for the decoder.
+
+Profiles measure a unit in what the carrier actually counts: GSM-7 septets
+(extension characters such as [ ] { } ^ | ~ cost two, characters outside
+the alphabet cannot be sent at all), UCS-2 code units, bytes, or
+characters, and may forbid characters the carrier reserves (APRS: | ~ {).
+
+Frames are striped across units (unit j holds frames j, j + n, j + 2n, ...)
+whenever that fits in the minimum number of units n, so losing one message
+costs frames from different parity groups instead of a whole group. If
+striping does not fit, first-fit decreasing packing is used.
+"""
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence
+
+# GSM 03.38 basic character set (one septet) and extension table (escape + septet)
+GSM7_BASIC = frozenset(
+    "@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !\"#¤%&'()*+,-./0123456789:;<=>?"
+    "¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà")
+GSM7_EXTENDED = frozenset("\f^{}\\[~]|€")
+
+SEPARATOR = " "
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    capacity: int                   # per message unit, in `unit`
+    unit: str                       # "septets" (GSM-7), "ucs2" (UTF-16 code units), "bytes" or "chars"
+    forbidden: str = ""             # characters the carrier reserves
+    note: str = ""
+
+    def cost(self, text: str) -> Optional[int]:
+        """Size of text in this profile's unit, or None if the carrier cannot carry it."""
+        if self.forbidden and any(c in self.forbidden for c in text):
+            return None
+        if self.unit == "septets":
+            n = 0
+            for c in text:
+                if c in GSM7_BASIC:
+                    n += 1
+                elif c in GSM7_EXTENDED:
+                    n += 2
+                else:
+                    return None
+            return n
+        if self.unit == "ucs2":
+            return len(text.encode("utf-16-le")) // 2
+        if self.unit == "bytes":
+            return len(text.encode("utf-8"))
+        return len(text)
+
+
+PROFILES: Dict[str, Profile] = {
+    "sms-gsm7": Profile("sms-gsm7", 160, "septets", note="single GSM-7 SMS"),
+    "sms-ucs2": Profile("sms-ucs2", 70, "ucs2", note="single UCS-2 SMS (any character)"),
+    "lora": Profile("lora", 237, "bytes", note="LoRa mesh packet payload"),
+    "aprs": Profile("aprs", 67, "chars", forbidden="|~{", note="APRS message text"),
+    "qr": Profile("qr", 1000, "bytes", note="QR code, version 22-L byte mode"),
+}
+CARRIER_NAMES = ("sms",) + tuple(PROFILES)
+
+
+def profile_for(carrier: str, frames: Sequence[str] = ()) -> Profile:
+    """Profile for a carrier name; "sms" is GSM-7 when every frame fits the alphabet, else UCS-2."""
+    if carrier == "sms":
+        gsm7 = PROFILES["sms-gsm7"]
+        return gsm7 if all(gsm7.cost(f) is not None for f in frames) else PROFILES["sms-ucs2"]
+    try:
+        return PROFILES[carrier]
+    except KeyError:
+        raise ValueError(f"unknown carrier: {carrier} (one of {', '.join(CARRIER_NAMES)})") from None
+
+
+def pack(frames: Sequence[str], profile: Profile) -> List[str]:
+    """Message units holding every frame once, as few as the profile allows."""
+    if not frames:
+        return []
+    costs = []
+    for i, f in enumerate(frames):
+        c = profile.cost(f)
+        if c is None:
+            raise ValueError(f"frame {i} has characters {profile.name} cannot carry; use another format")
+        if c > profile.capacity:
+            raise ValueError(f"frame {i} needs {c} {profile.unit}, {profile.name} carries {profile.capacity}; "
+                             f"use a smaller frame size")
+        costs.append(c)
+    sep = profile.cost(SEPARATOR)
+    units = _first_fit_decreasing(costs, profile.capacity, sep)
+    striped = _striped(costs, profile.capacity, sep, len(units))
+    if striped is not None:
+        units = striped
+    units.sort(key=lambda u: u[0])
+    return [SEPARATOR.join(frames[i] for i in u) for u in units]
+
+
+def unpack(units: Sequence[str]) -> List[str]:
+    """Frame lines of message units (plain one-frame lines pass through)."""
+    return [f for unit in units for f in unit.split()]
+
+
+def _first_fit_decreasing(costs: List[int], capacity: int, sep: int) -> List[List[int]]:
+    units: List[List[int]] = []
+    free: List[int] = []
+    for i in sorted(range(len(costs)), key=lambda i: -costs[i]):
+        for u, room in enumerate(free):
+            if costs[i] + sep <= room:
+                units[u].append(i)
+                free[u] -= costs[i] + sep
+                break
+        else:
+            units.append([i])
+            free.append(capacity - costs[i])
+    return [sorted(u) for u in units]
+
+
+def _striped(costs: List[int], capacity: int, sep: int, n: int) -> Optional[List[List[int]]]:
+    units: List[List[int]] = [[] for _ in range(n)]
+    used = [0] * n
+    for i, c in enumerate(costs):
+        u = i % n
+        used[u] += c + (sep if units[u] else 0)
+        if used[u] > capacity:
+            return None
+        units[u].append(i)
+    return units
@@ -0,0 +1,166 @@
+"""
+Parity engines for Foundry Courier frames.
+
+XOR parity is computed word-wide: every part is lifted into a Python int with
+``int.from_bytes`` (little-endian, so a shorter part is implicitly zero-padded
+at its tail, exactly like ``ljust``) and folded in with a single ``^``. Parts
+may be ``bytes``, ``bytearray`` or ``memoryview`` slices of the raw tx, so
+chunking never has to copy.
+
+The Reed-Solomon repair code below reuses the same word folding.
+"""
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+def _word(part: Buffer, size: int) -> int:
+    if len(part) > size:
+        part = memoryview(part)[:size]
+    return int.from_bytes(part, "little")
+
+
+def xor_parity(parts: Iterable[Buffer], size: int) -> bytes:
+    """XOR all parts (zero-padded / truncated to size) into one block of size bytes."""
+    acc = 0
+    for part in parts:
+        acc ^= _word(part, size)
+    return acc.to_bytes(size, "little")
+
+
+class XorAccumulator:
+    """Running XOR of a parity group; add() parts as they are framed, digest() once."""
+
+    __slots__ = ("size", "_acc")
+
+    def __init__(self, size: int = 0):
+        self.size = size
+        self._acc = 0
+
+    def add(self, part: Buffer) -> None:
+        if len(part) > self.size:
+            self.size = len(part)
+        self._acc ^= int.from_bytes(part, "little")
+
+    def digest(self) -> bytes:
+        return self._acc.to_bytes(self.size, "little")
+
+    def reset(self) -> None:
+        self.size = 0
+        self._acc = 0
+
+
+# ---------------------------------------------------------------------------
+# GF(256) Reed-Solomon (systematic Cauchy) repair symbols
+#
+# Field: GF(2^8) with the 0x11d polynomial. Repair row r of a k-frame group
+# uses coefficients C[r][j] = 1 / (x_r + y_j) with y_j = j and x_r = k + r,
+# so every square submatrix of [I; C] is invertible and any m losses in the
+# group are recoverable from m repair frames (k + m <= 256). Scalar * vector
+# products are done with bytes.translate against a cached 256-byte table.
+# ---------------------------------------------------------------------------
+
+GF_EXP = bytearray(512)
+GF_LOG = bytearray(256)
+_x = 1
+for _i in range(255):
+    GF_EXP[_i] = _x
+    GF_LOG[_x] = _i
+    _x <<= 1
+    if _x & 0x100:
+        _x ^= 0x11d
+for _i in range(255, 512):
+    GF_EXP[_i] = GF_EXP[_i - 255]
+del _x, _i
+
+_MUL_TABLES: List[Optional[bytes]] = [None] * 256
+
+
+def gf_mul(a: int, b: int) -> int:
+    if a == 0 or b == 0:
+        return 0
+    return GF_EXP[GF_LOG[a] + GF_LOG[b]]
+
+
+def gf_inv(a: int) -> int:
+    if a == 0:
+        raise ZeroDivisionError("0 has no inverse in GF(256)")
+    return GF_EXP[255 - GF_LOG[a]]
+
+
+def _mul_table(c: int) -> bytes:
+    table = _MUL_TABLES[c]
+    if table is None:
+        table = bytes(gf_mul(c, v) for v in range(256))
+        _MUL_TABLES[c] = table
+    return table
+
+
+def gf_mul_word(c: int, part: Buffer) -> int:
+    """c * part over GF(256), returned as a little-endian int word for XOR folding."""
+    if c == 0:
+        return 0
+    if c == 1:
+        return int.from_bytes(part, "little")
+    return int.from_bytes(bytes(part).translate(_mul_table(c)), "little")
+
+
+def cauchy_coeff(k: int, ridx: int, j: int) -> int:
+    return gf_inv((k + ridx) ^ j)
+
+
+def rs_encode(parts: Sequence[Buffer], m: int, size: int, first: int = 0) -> List[bytes]:
+    """Return m repair blocks (each size bytes, repair indices first..first+m-1) for the k data parts of one group."""
+    k = len(parts)
+    if k + first + m > 256:
+        raise ValueError(f"group of {k} frames with repair indices up to {first + m - 1} exceeds GF(256) "
+                         f"(k + index < 256)")
+    repairs = []
+    for r in range(first, first + m):
+        acc = 0
+        for j, part in enumerate(parts):
+            acc ^= gf_mul_word(cauchy_coeff(k, r, j), part)
+        repairs.append(acc.to_bytes(size, "little"))
+    return repairs
+
+
+def _gf_invert_matrix(rows: List[List[int]]) -> List[List[int]]:
+    n = len(rows)
+    aug = [row[:] + [1 if i == j else 0 for j in range(n)] for i, row in enumerate(rows)]
+    for col in range(n):
+        pivot = next(r for r in range(col, n) if aug[r][col])
+        aug[col], aug[pivot] = aug[pivot], aug[col]
+        inv = gf_inv(aug[col][col])
+        aug[col] = [gf_mul(inv, v) for v in aug[col]]
+        for r in range(n):
+            f = aug[r][col]
+            if r != col and f:
+                aug[r] = [v ^ gf_mul(f, w) for v, w in zip(aug[r], aug[col])]
+    return [row[n:] for row in aug]
+
+
+def rs_recover(known: Dict[int, Buffer], repairs: Dict[int, Buffer], k: int, size: int) -> Dict[int, bytes]:
+    """
+    known: group-relative index (0..k-1) -> data part for the frames we have
+    repairs: repair index -> repair block
+    returns group-relative index -> recovered block (size bytes) for every
+    missing index, or {} if there are more losses than repair blocks.
+    """
+    missing = [j for j in range(k) if j not in known]
+    if not missing or len(missing) > len(repairs):
+        return {}
+    rows = sorted(repairs)[:len(missing)]
+    syndromes = []
+    for r in rows:
+        acc = _word(repairs[r], size)
+        for j, part in known.items():
+            acc ^= gf_mul_word(cauchy_coeff(k, r, j), part)
+        syndromes.append(acc.to_bytes(size, "little"))
+    inv = _gf_invert_matrix([[cauchy_coeff(k, r, j) for j in missing] for r in rows])
+    out = {}
+    for i, j in enumerate(missing):
+        acc = 0
+        for c, s in zip(inv[i], syndromes):
+            acc ^= gf_mul_word(c, s)
+        out[j] = acc.to_bytes(size, "little")
+    return out
@@ -0,0 +1,177 @@
+"""
+Bounded reassembly table for gateways that receive frames across many requests.
+
+Frames carrying an X: envelope are pooled by tx_id, so relays delivering
+different frames of the same tx help each other; bare v1 frames are pooled
+per sender. Each entry is a streaming Decoder, so a tx is returned the
+moment its last needed frame arrives, whichever request carried it. Lines
+may be packed carrier message units (courier/packing.py): several frames
+separated by spaces.
+
+Memory is bounded three ways: entries idle longer than ttl are dropped,
+and the least recently used entries are evicted while there are more than
+max_entries or their buffered frames exceed max_bytes. A flood of partial
+garbage therefore costs at most max_bytes.
+
+on_frame(key, sender, line), if set, sees every accepted frame (not rejected
+or late lines) with the entry it went to, e.g. to spool it to disk.
+
+Finished enveloped txs are remembered for ttl so late copies do not start a
+new entry; note(key, value) attaches e.g. the broadcast tx hash to one, and
+feed(late=...) hands it back for every late frame, so a caller can answer
+a flooded copy from what it did with the first.
+
+hmac_key and require_auth go to every entry's Decoder: with a key, txs are
+only returned once their A: tags verify.
+
+All entries count into one DecodeReport (stats): frames by kind, rejected
+lines by reason, duplicates, late frames, recovered seqs, parse/recovery time.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from courier.foundry_courier import FRAME_KINDS, Decoder, DecodeReport, parse_frame, reject_reason
+from courier.packing import unpack
+
+
+class _Entry:
+    __slots__ = ("decoder", "size", "created", "last_seen")
+
+    def __init__(self, now: float, stats: DecodeReport, hmac_key: Optional[bytes] = None,
+                 require_auth: bool = False):
+        self.decoder = Decoder(stats, hmac_key, require_auth)
+        self.size = 0
+        self.created = self.last_seen = now
+
+
+class ReassemblyTable:
+    def __init__(self, ttl: float = 600.0, max_entries: int = 1024, max_bytes: int = 8 * 1024 * 1024,
+                 clock: Callable[[], float] = time.monotonic,
+                 on_complete: Optional[Callable[[str, float], None]] = None,
+                 on_frame: Optional[Callable[[str, str, str], None]] = None,
+                 hmac_key: Optional[bytes] = None, require_auth: bool = False):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.bytes = 0
+        self.evicted = 0
+        self.completed = 0
+        self.stats = DecodeReport()
+        self.on_complete = on_complete  # (key, seconds from first frame to completion)
+        self.on_frame = on_frame  # (key, sender, line)
+        self.hmac_key = hmac_key
+        self.require_auth = require_auth
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._done: "OrderedDict[str, Tuple[float, Optional[str]]]" = OrderedDict()  # key -> (finished at, note)
+        self._lock = threading.Lock()
+
+    def feed(self, sender: str, lines: Iterable[str], final: bool = False,
+             report: Optional[DecodeReport] = None,
+             late: Optional[Dict[str, Optional[str]]] = None) -> List[Tuple[str, bytes]]:
+        """
+        Add frames received from sender; returns [(key, raw)] for every tx
+        completed by them. final=True flushes this sender's bare v1 stream
+        (whose length may only be known at end of input) as complete. report,
+        if given, also receives this call's frame and rejected-line counts;
+        late, if given, receives key -> note for every already finished tx
+        one of the frames belongs to.
+        """
+        done: List[Tuple[str, bytes]] = []
+        stats = self.stats
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            for line in unpack(lines):
+                t0 = time.perf_counter()
+                fr = parse_frame(line)
+                stats.parse_seconds += time.perf_counter() - t0
+                if fr is None:
+                    reason = reject_reason(line)
+                    if reason is not None:
+                        stats.rejected[reason] = stats.rejected.get(reason, 0) + 1
+                        if report is not None:
+                            report.rejected[reason] = report.rejected.get(reason, 0) + 1
+                    continue
+                if report is not None:
+                    kind = FRAME_KINDS[type(fr)]
+                    report.frames[kind] = report.frames.get(kind, 0) + 1
+                key = f"tx:{fr.tx_id}" if fr.tx_id else f"sender:{sender}"
+                if key in self._done:
+                    stats.late += 1
+                    if late is not None:
+                        late[key] = self._done[key][1]
+                    continue
+                entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = _Entry(now, stats, self.hmac_key, self.require_auth)
+                else:
+                    self._entries.move_to_end(key)
+                    entry.last_seen = now
+                raw = entry.decoder.feed_frame(fr)
+                # only frames the decoder took are spooled: one that raises must not be replayed on restart
+                if self.on_frame is not None:
+                    self.on_frame(key, sender, line)
+                entry.size += len(line)
+                self.bytes += len(line)
+                if raw is not None:
+                    done.append((key, raw))
+                    self._finish(key, now)
+                self._enforce_caps()
+            if final:
+                key = f"sender:{sender}"
+                entry = self._entries.get(key)
+                if entry is not None and entry.decoder.result():
+                    done.append((key, entry.decoder.result()))
+                    self._finish(key, now)
+        return done
+
+    def note(self, key: str, value: str) -> None:
+        """Attach value to the finished tx key (feed hands it back for late frames)."""
+        with self._lock:
+            if key in self._done:
+                self._done[key] = (self._done[key][0], value)
+
+    def pending(self) -> Dict[str, List[int]]:
+        """key -> missing seqs of every partial tx still buffered."""
+        with self._lock:
+            return {key: e.decoder.missing() for key, e in self._entries.items()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _finish(self, key: str, now: float) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        self.completed += 1
+        if self.on_complete is not None:
+            self.on_complete(key, now - entry.created)
+        # remember finished txs for a while so late duplicates do not start a new entry
+        # (sender keys are reused by the sender's next bare v1 tx)
+        if key.startswith("tx:"):
+            self._done[key] = (now, None)
+        while len(self._done) > self.max_entries:
+            self._done.popitem(last=False)
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if now - entry.last_seen <= self.ttl:
+                break
+            self._evict(key)
+        while self._done:
+            key, (at, _) = next(iter(self._done.items()))
+            if now - at <= self.ttl:
+                break
+            del self._done[key]
+
+    def _enforce_caps(self) -> None:
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            self._evict(next(iter(self._entries)))
+
+    def _evict(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        self.bytes -= entry.size
+        self.evicted += 1
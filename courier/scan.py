@@ -0,0 +1,164 @@
+"""
+Streaming decode of large, noisy capture logs (SDR receivers, serial dumps).
+
+Real frames are sparse among noise, so the log is never decoded line by
+line. It is read as bytes (memory-mapped when it is a regular file, in
+chunks otherwise) and candidates are found with a byte scan: a literal-led
+regex jumps to the ":<6 to 9 digits>:" marker every v1 header has, and only lines
+holding one after F/P/R/Q/L/A are matched against the full frame pattern
+(optionally inside an X: envelope, anywhere in the line and as often as it
+occurs, so packed message units, receiver timestamps or RSSI prefixes do
+not matter); v2 lines are found by their ~ or
+^ at line start. Only candidates are parsed (as bytes, no str copy). Frames go to a
+Demuxer, so memory stays bounded by the chunk size plus max_open partial transactions.
+"""
+import mmap
+import os
+import re
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Union
+
+from courier.foundry_courier import Demuxer, parse_frame
+
+CHUNK_BYTES = 4 * 1024 * 1024
+# Longest line carried over between chunks; longer ones are dropped as noise
+MAX_LINE_BYTES = 64 * 1024
+
+# Prefilter: a literal-led pattern, so the regex engine skips through noise at memchr speed.
+# Every v1 frame header has ":<6 digits>:" right after its kind letter (zero-padded to 6,
+# up to the 9 parse_frame accepts once a seq or fountain esi reaches 10**6).
+_MARKER_RE = re.compile(rb":[0-9]{6,9}:")
+_FRAME_RE = re.compile(rb"(?:X:[0-9a-z]{1,16}:[0-9]{1,9}:(?:Z[0-9]{1,3}:)?)?[FPRQLA]:[0-9]{6,9}:[!-~]+")
+_V2_PREFIXES = (b"\n~", b"\n^")
+
+
+def candidates(chunk: bytes) -> Iterator[bytes]:
+    """Candidate frame tokens in chunk, in order of position."""
+    found = []
+    pos = 0
+    for m in _MARKER_RE.finditer(chunk):
+        i = m.start()
+        if i < pos or chunk[i - 1:i] not in (b"F", b"P", b"R", b"Q", b"L", b"A"):
+            continue
+        start = chunk.rfind(b"\n", 0, i) + 1
+        end = chunk.find(b"\n", i)
+        end = len(chunk) if end < 0 else end
+        # every frame on the line: packed message units carry several, space-separated
+        found.extend((fm.start(), fm.group()) for fm in _FRAME_RE.finditer(chunk, start, end))
+        pos = end
+    for prefix in _V2_PREFIXES:
+        i = 0 if chunk.startswith(prefix[1:]) else chunk.find(prefix)
+        while i >= 0:
+            start = i if chunk[i:i + 1] != b"\n" else i + 1
+            end = chunk.find(b"\n", start)
+            end = len(chunk) if end < 0 else end
+            found.append((start, chunk[start:end].rstrip()))
+            i = chunk.find(prefix, end)
+    found.sort(key=lambda item: item[0])
+    return (token for _, token in found)
+
+
+def iter_chunks(source: Union[str, os.PathLike, BinaryIO], chunk_size: int = CHUNK_BYTES,
+                max_line: int = MAX_LINE_BYTES, on_skip: Optional[Callable[[int], None]] = None) -> Iterator[bytes]:
+    """
+    Yield the source in pieces that end on a line boundary (the last may not).
+    A line that would carry more than max_line bytes over a chunk boundary
+    (no frame or message unit is that long) is dropped, and on_skip(its
+    length) is called: a log without newlines costs chunk_size + max_line.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as fh:
+            if os.fstat(fh.fileno()).st_size == 0:
+                return
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos, size = 0, len(mm)
+                while pos < size:
+                    limit = min(pos + chunk_size, size)
+                    if limit == size:
+                        yield mm[pos:size]
+                        return
+                    end = mm.find(b"\n", limit - 1, limit + max_line)
+                    if end >= 0:
+                        yield mm[pos:end + 1]
+                        pos = end + 1
+                        continue
+                    start = max(pos, mm.rfind(b"\n", pos, limit) + 1)
+                    if start > pos:
+                        yield mm[pos:start]
+                    end = mm.find(b"\n", limit)
+                    end = size if end < 0 else end + 1
+                    if on_skip:
+                        on_skip(end - start)
+                    pos = end
+        return
+    tail = b""
+    skipped = 0  # > 0 while dropping the rest of an oversized line
+    while True:
+        block = source.read(chunk_size)
+        if not block:
+            break
+        if skipped:
+            nl = block.find(b"\n")
+            if nl < 0:
+                skipped += len(block)
+                continue
+            if on_skip:
+                on_skip(skipped + nl + 1)
+            skipped = 0
+            block = block[nl + 1:]
+        cut = block.rfind(b"\n") + 1
+        if cut:
+            yield tail + block[:cut]
+            tail = b""
+        tail += block[cut:]
+        if len(tail) > max_line:
+            skipped, tail = len(tail), b""
+    if skipped and on_skip:
+        on_skip(skipped)
+    if tail:
+        yield tail
+
+
+def scan(source: Union[str, os.PathLike, BinaryIO], on_tx: Optional[Callable[[str, bytes], None]] = None,
+         chunk_size: int = CHUNK_BYTES, max_open: int = 1024, hmac_key: Optional[bytes] = None,
+         require_auth: bool = False) -> Dict[str, int]:
+    """
+    Reassemble every transaction in a capture log. on_tx(tx_id, raw) is called
+    as each one completes ("" for a bare v1 stream, reported best-effort at the
+    end like decode_frames). Returns a summary: bytes and lines scanned,
+    candidate frames, valid frames, txs decoded, partial txs left over, and
+    oversized lines dropped (see iter_chunks).
+    hmac_key and require_auth are as for Decoder.
+    """
+    demux = Demuxer(max_open=max_open, hmac_key=hmac_key, require_auth=require_auth)
+    summary = {"bytes": 0, "lines": 0, "candidates": 0, "valid": 0, "txs": 0, "incomplete": 0, "oversized": 0}
+    last = b""
+
+    def skipped(length: int) -> None:
+        summary["bytes"] += length
+        summary["lines"] += 1
+        summary["oversized"] += 1
+
+    for chunk in iter_chunks(source, chunk_size, on_skip=skipped):
+        summary["bytes"] += len(chunk)
+        summary["lines"] += chunk.count(b"\n")
+        last = chunk
+        for token in candidates(chunk):
+            summary["candidates"] += 1
+            fr = parse_frame(token)
+            if fr is None:
+                continue
+            summary["valid"] += 1
+            done = demux.feed_frame(fr)
+            if done is not None:
+                summary["txs"] += 1
+                if on_tx:
+                    on_tx(*done)
+    if last and not last.endswith(b"\n"):
+        summary["lines"] += 1
+    legacy = demux.open.pop("", None)
+    if legacy is not None and legacy.result():
+        summary["txs"] += 1
+        if on_tx:
+            on_tx("", legacy.result())
+    summary["incomplete"] = len(demux.open)
+    return summary
@@ -0,0 +1,19 @@
+"""
+Line syntax shared by the frame parser (courier/foundry_courier.py) and the
+fountain symbol parser (courier/fountain.py).
+
+Both check a line's structure with a precompiled bytes pattern before any
+base64 or CRC work, so what passes always decodes and garbage never raises.
+"""
+import re
+import sys
+
+# base64 alphabet with trailing padding; with a length that is a multiple of 4
+# this is always decodable
+B64_PATTERN = rb"[A-Za-z0-9+/]*={0,2}"
+
+# the part of an L: line after "L:": <esi>:<length>:<crc>:<base64symbol>
+SYMBOL_RE = re.compile(rb"([0-9]{1,9}):([0-9]{1,9}):([0-9a-fA-F]{1,8}):(%s)" % B64_PATTERN)
+
+# Frame records are created per received line; __slots__ (3.10+) keeps them small
+DATACLASS_OPTS = {"slots": True} if sys.version_info >= (3, 10) else {}
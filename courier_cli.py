@@ -6,11 +6,20 @@ Courier CLI – State-of-the-art, battle-hardened command-line interface for Fou
 Move signed blockchain transactions over any carrier, anywhere, anytime.
 """
 
+import time
+
+_STARTED = time.perf_counter()
+
 import argparse
+import importlib
+import itertools
+import os
 import sys
 from pathlib import Path
-from courier.foundry_courier import encode_frames, decode_frames
-from tools import push_btc, push_eth
+
+# Only the stdlib is imported up front. Each command lists the modules it needs
+# in COMMANDS (below) and imports them when it runs, so encode/decode on a small
+# device never pays for the broadcast stack (requests, web3).
 
 def list_services():
 
@@ -18,6 +27,14 @@ def list_services():
     print("Available services:")
     print("- encode-tx: Encode signed transaction into frames")
     print("- decode-frames: Decode frames into raw transaction")
+    print("- batch-encode: Encode a directory or JSONL batch of transactions in parallel")
+    print("- batch-decode: Decode a directory or JSONL batch of frame files in parallel")
+    print("- compress-report: Compare compression codecs on a transaction")
+    print("- scan-log: Decode every transaction in a large, noisy capture log (streamed)")
+    print("- ingest: Decode new frame files under a directory (USB inbox) into an outbox, incrementally")
+    print("- plan: Pick frame size, group size and parity for a carrier's loss profile")
+    print("- nack: Ask for just the missing frames of incomplete txs (two-way carriers)")
+    print("- resend: Answer a NACK with the requested data frames or fresh repair frames")
     print("- push-btc: Broadcast Bitcoin transaction")
     print("- push-eth: Broadcast Ethereum transaction")
     print("- help: Show command documentation")
@@ -25,49 +42,337 @@ def list_services():
 def encode_tx(args):
 
     """Encode a signed transaction hex string into frames and output to file or stdout."""
+    from courier.foundry_courier import encode_frames, encode_frames_binary, encode_stream
+    from courier.fountain import fountain_frames
     try:
-        tx_hex = args.hex.strip().lower().replace("0x", "")
-        frames = encode_frames(
-            tx_hex,
-            frame_payload_bytes=args.frame_size,
-            group_size=args.group_size,
-            add_parity=not args.no_parity
-        )
+        if args.report_formats:
+            report_formats(args)
+            return
+        if args.format == "v2-bin":
+            if not args.output or not args.hex:
+                print("[ERROR] Failed to encode: v2-bin needs --hex and --output (binary file)")
+                return
+            key = _hmac_key(args, encoding=True)
+            blob = encode_frames_binary(
+                args.hex.strip().lower().replace("0x", ""),
+                frame_payload_bytes=args.frame_size,
+                group_size=args.group_size,
+                add_parity=not args.no_parity,
+                repair_frames=args.repair_frames,
+                parity_layout=args.parity_layout,
+                compress=args.compress,
+                tx_id=args.tx_id,
+                hmac_key=key,
+                auth_scope=args.auth_scope,
+                tag_bytes=args.tag_bytes
+            )
+            Path(args.output).write_bytes(blob)
+            print(f"[OK] Wrote {len(blob)} bytes of v2 binary frames to {args.output}")
+            return
+        if args.batch:
+            tx_hexes = [ln.strip().lower().replace("0x", "") for ln in Path(args.batch).read_text().splitlines() if ln.strip()]
+            frames = encode_stream(
+                tx_hexes,
+                frame_payload_bytes=args.frame_size,
+                group_size=args.group_size,
+                add_parity=not args.no_parity,
+                repair_frames=args.repair_frames,
+                parity_layout=args.parity_layout,
+                compress=args.compress,
+                fmt=args.format,
+                hmac_key=_hmac_key(args, encoding=True),
+                auth_scope=args.auth_scope,
+                tag_bytes=args.tag_bytes
+            )
+        elif args.fountain:
+            tx_hex = args.hex.strip().lower().replace("0x", "")
+            symbols = fountain_frames(tx_hex, symbol_bytes=args.frame_size, tx_id=args.tx_id,
+                                      hmac_key=_hmac_key(args, encoding=True), tag_bytes=args.tag_bytes)
+            frames = list(itertools.islice(symbols, args.fountain))
+        else:
+            tx_hex = args.hex.strip().lower().replace("0x", "")
+            frames = encode_frames(
+                tx_hex,
+                frame_payload_bytes=args.frame_size,
+                group_size=args.group_size,
+                add_parity=not args.no_parity,
+                repair_frames=args.repair_frames,
+                parity_layout=args.parity_layout,
+                compress=args.compress,
+                tx_id=args.tx_id,
+                fmt=args.format,
+                hmac_key=_hmac_key(args, encoding=True),
+                auth_scope=args.auth_scope,
+                tag_bytes=args.tag_bytes
+            )
+        if args.pack:
+            from courier.packing import pack, profile_for
+            profile = profile_for(args.pack, frames)
+            units = pack(frames, profile)
+            print(f"[OK] Packed {len(frames)} frames into {len(units)} {profile.name} messages", file=sys.stderr)
+            frames = units
         if args.output:
             Path(args.output).write_text("\n".join(frames))
-            print(f"[OK] Wrote {len(frames)} frames to {args.output}")
+            print(f"[OK] Wrote {len(frames)} {'messages' if args.pack else 'frames'} to {args.output}")
         else:
             print("\n".join(frames))
     except Exception as e:
         print(f"[ERROR] Failed to encode: {e}")
 
+def _hmac_key(args, encoding=False):
+    """Frame authentication key from SVNEVM_HMAC (or the public lab key with --allow-insecure-default-key)."""
+    from courier import auth
+    key = auth.key_from_env(allow_insecure_default=args.allow_insecure_default_key)
+    if key == auth.INSECURE_DEFAULT_KEY and not os.environ.get(auth.ENV_KEY):
+        print("[WARN] Using the public lab HMAC key: anyone can forge these frames", file=sys.stderr)
+    elif key is None and encoding:
+        print(f"[WARN] {auth.ENV_KEY} not set: frames carry no authentication tags", file=sys.stderr)
+    return key
+
+def report_formats(args):
+
+    """Print frames and bytes-on-air of one tx in every frame format."""
+    from courier.foundry_courier import airtime_report
+    tx_hex = args.hex.strip().lower().replace("0x", "")
+    rows = airtime_report(
+        tx_hex,
+        frame_payload_bytes=args.frame_size,
+        group_size=args.group_size,
+        add_parity=not args.no_parity,
+        repair_frames=args.repair_frames,
+        parity_layout=args.parity_layout,
+        tx_id=args.tx_id
+    )
+    print(f"tx bytes: {len(tx_hex) // 2}")
+    print(f"{'format':<8} {'frames':>6} {'bytes':>8} {'overhead':>9}")
+    for row in rows:
+        print(f"{row['format']:<8} {row['frames']:>6} {row['bytes']:>8} {row['overhead']:>8.1%}")
+
+def batch_cmd(args):
+
+    """Encode or decode a whole directory / JSONL batch over a process pool."""
+    from courier.batch import run_batch
+    try:
+        options = {}
+        if args.command == "batch-encode":
+            options = dict(
+                frame_payload_bytes=args.frame_size,
+                group_size=args.group_size,
+                add_parity=not args.no_parity,
+                repair_frames=args.repair_frames,
+                parity_layout=args.parity_layout,
+                fmt=args.format,
+                compress=args.compress,
+                hmac_key=_hmac_key(args, encoding=True),
+                auth_scope=args.auth_scope,
+                tag_bytes=args.tag_bytes
+            )
+        else:
+            options = dict(hmac_key=_hmac_key(args), require_auth=args.require_auth)
+        mode = "encode" if args.command == "batch-encode" else "decode"
+        summary = run_batch(mode, args.input, args.output, workers=args.workers, chunksize=args.chunksize, **options)
+        print(f"[OK] {summary['ok']}/{summary['total']} items {mode}d to {args.output} ({summary['failed']} failed)")
+    except Exception as e:
+        print(f"[ERROR] Batch failed: {e}")
+
+def compress_report_cmd(args):
+
+    """Print compression ratio and encode/decode cost of each codec for one tx."""
+    from courier.compress import compression_report
+    try:
+        raw = bytes.fromhex(args.hex.strip().lower().replace("0x", ""))
+        print(f"tx bytes: {len(raw)}")
+        print(f"{'codec':<6} {'bytes':>7} {'ratio':>7} {'enc us':>9} {'dec us':>9}")
+        for row in compression_report(raw):
+            print(f"{row['codec']:<6} {row['bytes']:>7} {row['ratio']:>7.1%} "
+                  f"{row['encode_us']:>9.1f} {row['decode_us']:>9.1f}")
+    except Exception as e:
+        print(f"[ERROR] Failed to report: {e}")
+
 def decode_frames_cmd(args):
 
-    """Decode frames from file or stdin and output raw transaction hex."""
+    """Decode frames from file or stdin and output raw transaction hex.
+
+    Frames are fed to a streaming Demuxer one line at a time, so on a live
+    stdin feed each tx is printed as soon as its last needed frame arrives.
+    Multiplexed streams (X:<txid> envelopes) print one tx per line.
+    """
+    from courier.foundry_courier import Demuxer, parse_binary
     try:
-        if args.input:
-            lines = Path(args.input).read_text().splitlines()
+        demux = Demuxer(hmac_key=_hmac_key(args), require_auth=args.require_auth)
+        decoded = []
+
+        def emit(tx_id, raw):
+            line = f"{tx_id or '-'} {raw.hex()}" if args.with_ids else raw.hex()
+            decoded.append(line)
+            if not args.output:
+                print(line, flush=True)
+
+        if args.input and _is_binary_stream(args.input):
+            for fr in parse_binary(Path(args.input).read_bytes()):
+                done = demux.feed_frame(fr)
+                if done is not None:
+                    emit(*done)
+        elif args.input:
+            with open(args.input, "r") as fh:
+                _feed_lines(demux, fh, emit)
         else:
-            lines = [line.strip() for line in sys.stdin if line.strip()]
-        raw = decode_frames(lines)
-        raw_hex = raw.hex()
+            _feed_lines(demux, iter(sys.stdin.readline, ""), emit)
+        # a bare v1 stream may only be known complete at EOF: best-effort prefix
+        legacy = demux.open.get("")
+        if legacy is not None and legacy.result():
+            emit("", legacy.result())
+        if not decoded:
+            emit("", b"")
         if args.output:
-            Path(args.output).write_text(raw_hex)
+            Path(args.output).write_text("\n".join(decoded))
             print(f"[OK] Decoded raw tx written to {args.output}")
-        else:
-            print(raw_hex)
     except Exception as e:
         print(f"[ERROR] Failed to decode: {e}")
 
+def _is_binary_stream(path):
+    from courier import wire
+    with open(path, "rb") as fh:
+        return fh.read(len(wire.BINARY_MAGIC)) == wire.BINARY_MAGIC
+
+def _feed_lines(demux, lines, emit):
+    # a line may be a packed message unit: several frames separated by spaces
+    for line in lines:
+        for frame in line.split():
+            done = demux.feed(frame)
+            if done is not None:
+                emit(*done)
+
+def scan_log_cmd(args):
+
+    """Stream a capture log (file or stdin), printing each tx as found and a scan summary."""
+    from courier.scan import scan
+    try:
+        out = open(args.output, "w") if args.output else sys.stdout
+
+        def emit(tx_id, raw):
+            print(f"{tx_id or '-'} {raw.hex()}" if args.with_ids else raw.hex(), file=out, flush=True)
+
+        source = args.input if args.input and args.input != "-" else sys.stdin.buffer
+        summary = scan(source, on_tx=emit, chunk_size=args.chunk_mb * 1024 * 1024, hmac_key=_hmac_key(args),
+                       require_auth=args.require_auth)
+        if args.output:
+            out.close()
+        print(f"[OK] scanned {summary['lines']} lines ({summary['bytes'] / 1e6:.1f} MB): "
+              f"{summary['candidates']} candidates, {summary['valid']} valid frames, "
+              f"{summary['txs']} txs decoded, {summary['incomplete']} incomplete", file=sys.stderr)
+    except Exception as e:
+        print(f"[ERROR] Failed to scan: {e}")
+
+def ingest_cmd(args):
+
+    """Pool frames from every new or changed file under --root and write completed txs to --outbox."""
+    from courier.inbox import ingest
+    try:
+        def emit(tx_id, raw, path):
+            print(f"{tx_id or '-'} {path}" if args.with_ids else path, flush=True)
+
+        summary = ingest(args.root, args.outbox, index_path=args.index, workers=args.workers, on_tx=emit,
+                         hmac_key=_hmac_key(args), require_auth=args.require_auth)
+        print(f"[OK] {summary['files']} files: {summary['parsed']} parsed, {summary['skipped']} unchanged, "
+              f"{summary['duplicate']} duplicate; {summary['frames']} frames, {summary['txs']} txs to "
+              f"{args.outbox}, {summary['incomplete']} incomplete", file=sys.stderr)
+    except Exception as e:
+        print(f"[ERROR] Failed to ingest: {e}")
+
+def plan_cmd(args):
+
+    """Search frame size, group size, parity and format for a carrier profile via channel simulation."""
+    from courier.channel import PARITY_MODES, carrier_with, plan
+    try:
+        raw = bytes.fromhex(args.hex.strip().lower().replace("0x", "")) if args.hex else os.urandom(args.tx_bytes)
+        burst = [float(v) for v in args.burst.split(",")] if args.burst else [None, None]
+        carrier = carrier_with(args.carrier, mtu=args.mtu, loss_good=args.loss,
+                               p_good_bad=burst[0], p_bad_good=burst[1])
+        rows = plan(raw, carrier, target=args.target, trials=args.trials, objective=args.objective,
+                    formats=args.formats.split(","))
+    except Exception as e:
+        print(f"[ERROR] Failed to plan: {e}")
+        return
+    if not rows:
+        print(f"[ERROR] No setting fits one {carrier.name} message (mtu {carrier.mtu})")
+        return
+    print(f"carrier {carrier.name}: mtu {carrier.mtu}, {carrier.overhead} B/msg overhead, "
+          f"~{carrier.channel.mean_loss():.1%} mean loss; {len(raw)} B tx, target {args.target:.1%}, {args.trials} trials")
+    print(f"{'format':<8} {'frame':>5} {'group':>5} {'parity':<6} {'success':>8} {'msgs':>5} {'bytes':>7} {'exp.bytes':>9}")
+    for r in rows[:args.top]:
+        print(f"{r['format']:<8} {r['frame_size']:>5} {r['group_size']:>5} {r['parity']:<6} {r['success']:>8.1%} "
+              f"{r['messages']:>5} {r['bytes']:>7} {r['expected_bytes']:>9.0f}{'' if r['meets_target'] else '  (below target)'}")
+    best = rows[0]
+    mode = PARITY_MODES[best["parity"]]
+    flags = "--no-parity" if not mode["add_parity"] else f"--repair-frames {mode['repair_frames']}"
+    if mode.get("parity_layout", "contiguous") != "contiguous":
+        flags += f" --parity-layout {mode['parity_layout']}"
+    print(f"[OK] suggested: encode-tx --format {best['format']} --frame-size {best['frame_size']} "
+          f"--group-size {best['group_size']} {flags}")
+
+def nack_cmd(args):
+
+    """Read received frames (file or stdin) and print NACK lines for every incomplete tx."""
+    from courier.foundry_courier import Demuxer
+    from courier.nack import demux_nacks
+    try:
+        demux = Demuxer(hmac_key=_hmac_key(args), require_auth=args.require_auth)
+        done = []
+        lines = open(args.input, "r") if args.input else sys.stdin
+        with lines:
+            _feed_lines(demux, lines, lambda tx_id, raw: done.append(tx_id))
+        nacks = demux_nacks(demux, max_len=args.max_len or None)
+        if args.output:
+            Path(args.output).write_text("\n".join(nacks))
+        elif nacks:
+            print("\n".join(nacks))
+        print(f"[OK] {len(done)} complete, {len(demux.open)} incomplete, {len(nacks)} NACK lines", file=sys.stderr)
+    except Exception as e:
+        print(f"[ERROR] Failed to build NACK: {e}")
+
+def resend_cmd(args):
+
+    """Emit the frames a NACK asks for (data frames, or fresh repair frames with --repair)."""
+    from courier.nack import resend
+    try:
+        if args.nack.startswith("N:"):
+            nacks = [args.nack]
+        else:
+            nacks = [ln for ln in Path(args.nack).read_text().splitlines() if ln.strip()]
+        frames = resend(
+            args.hex.strip().lower().replace("0x", ""),
+            nacks,
+            frame_payload_bytes=args.frame_size,
+            tx_id=args.tx_id,
+            compress=args.compress,
+            fmt=args.format,
+            repair=args.repair,
+            extra=args.extra,
+            hmac_key=_hmac_key(args),
+            group_size=args.group_size,
+            auth_scope=args.auth_scope,
+            tag_bytes=args.tag_bytes
+        )
+        if args.output:
+            Path(args.output).write_text("\n".join(frames))
+            print(f"[OK] Wrote {len(frames)} frames to {args.output}")
+        else:
+            print("\n".join(frames))
+    except Exception as e:
+        print(f"[ERROR] Failed to resend: {e}")
+
 def push_btc_cmd(args):
 
     """Broadcast a raw Bitcoin transaction to the network."""
+    from tools import push_btc
     try:
         result = push_btc.push_btc(
             args.hex,
             rpc_url=args.rpc_url,
             user=args.user,
-            pwd=args.password
+            pwd=args.password,
+            fanout=args.fanout
         )
         print(f"[OK] Bitcoin tx broadcasted. Result: {result}")
     except Exception as e:
@@ -76,62 +381,198 @@ def push_btc_cmd(args):
 def push_eth_cmd(args):
 
     """Broadcast a raw Ethereum transaction to the network."""
+    from tools import push_eth
     try:
         raw_bytes = bytes.fromhex(args.hex.strip().lower().replace("0x", ""))
-        result = push_eth.push_eth(raw_bytes, rpc_url=args.rpc_url)
+        result = push_eth.push_eth(raw_bytes, rpc_url=args.rpc_url, fanout=args.fanout)
         print(f"[OK] Ethereum tx broadcasted. Result: {result}")
     except Exception as e:
         print(f"[ERROR] Failed to broadcast ETH tx: {e}")
 
+# command -> (handler, modules it imports); the modules are loaded only when the command runs
+COMMANDS = {
+    "list-services": (list_services, ()),
+    "encode-tx": (encode_tx, ("courier.foundry_courier",)),
+    "decode-frames": (decode_frames_cmd, ("courier.foundry_courier",)),
+    "batch-encode": (batch_cmd, ("courier.batch",)),
+    "batch-decode": (batch_cmd, ("courier.batch",)),
+    "compress-report": (compress_report_cmd, ("courier.compress",)),
+    "scan-log": (scan_log_cmd, ("courier.scan",)),
+    "ingest": (ingest_cmd, ("courier.inbox",)),
+    "plan": (plan_cmd, ("courier.channel",)),
+    "nack": (nack_cmd, ("courier.nack",)),
+    "resend": (resend_cmd, ("courier.nack",)),
+    "push-btc": (push_btc_cmd, ("tools.push_btc",)),
+    "push-eth": (push_eth_cmd, ("tools.push_eth",)),
+}
+
+def load_command_modules(command, profile=False):
+    """Import the modules command needs; with profile, print each import's time to stderr."""
+    for name in COMMANDS[command][1]:
+        before = len(sys.modules)
+        t0 = time.perf_counter()
+        importlib.import_module(name)
+        if profile:
+            print(f"[PROFILE] import {name}: {(time.perf_counter() - t0) * 1e3:.1f} ms "
+                  f"({len(sys.modules) - before} modules)", file=sys.stderr)
+
 def main():
     parser = argparse.ArgumentParser(
         prog="courier-cli",
         description="Courier CLI: Move value without the net. Battle-hardened, portable, and universal."
     )
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print startup and per-command import timings to stderr.")
     subparsers = parser.add_subparsers(dest="command")
 
+    # frame authentication (courier/auth.py): the key comes from SVNEVM_HMAC
+    auth_opts = argparse.ArgumentParser(add_help=False)
+    auth_opts.add_argument("--allow-insecure-default-key", action="store_true",
+                           help="Without SVNEVM_HMAC, use the public lab key (testing only: anyone can forge frames).")
+    verify_opts = argparse.ArgumentParser(add_help=False, parents=[auth_opts])
+    verify_opts.add_argument("--require-auth", action="store_true",
+                             help="With a key, reject txs that carry no A: tags (default: only tagged txs are checked).")
+    tag_opts = argparse.ArgumentParser(add_help=False, parents=[auth_opts])
+    tag_opts.add_argument("--auth-scope", choices=["group", "tx"], default="group",
+                          help="One A: tag per group of --group-size data frames, or one for the whole tx.")
+    tag_opts.add_argument("--tag-bytes", type=int, default=8, help="Truncated HMAC tag length (4-32 bytes).")
+
     subparsers.add_parser("list-services", help="List all available services and routes.")
 
-    enc = subparsers.add_parser("encode-tx", help="Encode a signed transaction into frames.")
-    enc.add_argument("--hex", required=True, help="Signed transaction hex string.")
+    enc = subparsers.add_parser("encode-tx", help="Encode a signed transaction into frames.", parents=[tag_opts])
+    src = enc.add_mutually_exclusive_group(required=True)
+    src.add_argument("--hex", help="Signed transaction hex string.")
+    src.add_argument("--batch", help="File with one signed tx hex per line; emits one interleaved multi-tx stream.")
+    enc.add_argument("--tx-id", help="Tag frames with an X:<txid>:<total>: envelope (1-16 chars of [0-9a-z]).")
     enc.add_argument("--frame-size", type=int, default=64, help="Frame payload size in bytes.")
     enc.add_argument("--group-size", type=int, default=8, help="Frames per parity group.")
     enc.add_argument("--no-parity", action="store_true", help="Disable parity frame.")
+    enc.add_argument("--repair-frames", type=int, default=1, help="Repair frames per group (1 = XOR parity, m > 1 = Reed-Solomon).")
+    enc.add_argument("--parity-layout", choices=["contiguous", "interleaved", "2d"], default="contiguous",
+                     help="XOR group layout: consecutive frames, strided (burst-tolerant) or row+column 2D.")
+    enc.add_argument("--fountain", type=int, default=0, metavar="COUNT",
+                     help="Emit COUNT rateless fountain symbols (L: lines) instead of F:/P: frames.")
+    enc.add_argument("--format", choices=["v1", "v2-b91", "v2-b85", "v2-bin"], default="v1",
+                     help="Frame format: v1 text, compact v2 text (basE91/Base85), or v2 raw binary (file only).")
+    enc.add_argument("--compress", choices=["zlib", "lzma"],
+                     help="Compress the tx before framing (flagged in the header; skipped if it does not shrink).")
+    enc.add_argument("--pack", choices=["sms", "sms-gsm7", "sms-ucs2", "lora", "aprs", "qr"],
+                     help="Emit carrier message units (several frames per SMS/packet, space-separated) instead of lines.")
+    enc.add_argument("--report-formats", action="store_true", help="Print bytes-on-air of this tx for each format and exit.")
     enc.add_argument("--output", help="Write frames to file (default: stdout)")
 
-    dec = subparsers.add_parser("decode-frames", help="Decode frames into raw transaction bytes.")
+    dec = subparsers.add_parser("decode-frames", help="Decode frames into raw transaction bytes.",
+                                parents=[verify_opts])
     dec.add_argument("--input", help="Input file with frames (default: stdin).")
     dec.add_argument("--output", help="Write raw tx hex to file (default: stdout)")
+    dec.add_argument("--with-ids", action="store_true", help="Prefix each decoded tx with its tx id ('-' for untagged frames).")
+
+    for name, what in (("batch-encode", "signed txs (*.hex files or JSONL {id, hex})"),
+                       ("batch-decode", "frame files (*.txt files or JSONL {id, frames})")):
+        bat = subparsers.add_parser(name, help=f"Process a directory or JSONL batch of {what} in parallel.",
+                                    parents=[tag_opts if name == "batch-encode" else verify_opts])
+        bat.add_argument("--input", required=True, help="Input directory or .jsonl file.")
+        bat.add_argument("--output", required=True, help="Output directory or .jsonl file (results in input order).")
+        bat.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count; 1 = no pool).")
+        bat.add_argument("--chunksize", type=int, default=64, help="Items per task submitted to a worker.")
+        if name == "batch-encode":
+            bat.add_argument("--frame-size", type=int, default=64, help="Frame payload size in bytes.")
+            bat.add_argument("--group-size", type=int, default=8, help="Frames per parity group.")
+            bat.add_argument("--no-parity", action="store_true", help="Disable parity frame.")
+            bat.add_argument("--repair-frames", type=int, default=1, help="Repair frames per group.")
+            bat.add_argument("--parity-layout", choices=["contiguous", "interleaved", "2d"], default="contiguous",
+                             help="XOR group layout.")
+            bat.add_argument("--format", choices=["v1", "v2-b91", "v2-b85"], default="v1", help="Frame text format.")
+            bat.add_argument("--compress", choices=["zlib", "lzma"], help="Compress each tx before framing.")
+
+    crep = subparsers.add_parser("compress-report", help="Compare compression ratio and cost per codec for a tx.")
+    crep.add_argument("--hex", required=True, help="Signed transaction hex string.")
+
+    scn = subparsers.add_parser("scan-log", help="Decode all txs in a large noisy capture log with bounded memory.",
+                                parents=[verify_opts])
+    scn.add_argument("--input", help="Capture log (default: stdin); memory-mapped when it is a file.")
+    scn.add_argument("--output", help="Write decoded tx hex to file (default: stdout).")
+    scn.add_argument("--with-ids", action="store_true", help="Prefix each decoded tx with its tx id.")
+    scn.add_argument("--chunk-mb", type=int, default=4, help="Scan window in MiB (bounds memory).")
+
+    ing = subparsers.add_parser("ingest", help="Decode new frame files under a directory into an outbox (indexed).",
+                                parents=[verify_opts])
+    ing.add_argument("--root", required=True, help="Inbox directory (e.g. a USB stick mount point).")
+    ing.add_argument("--outbox", default="outbox", help="Directory for decoded txs (one .hex file each).")
+    ing.add_argument("--index", help="Index file (default: <outbox>/.ingest-index.json).")
+    ing.add_argument("--workers", type=int, default=0, help="Parser processes (default: CPU count; 1 = no pool).")
+    ing.add_argument("--with-ids", action="store_true", help="Prefix each written outbox file with its tx id.")
+
+    pln = subparsers.add_parser("plan", help="Simulate a carrier's loss channel and rank frame/group/parity settings.")
+    pln.add_argument("--carrier", choices=["sms", "lora", "aprs", "qr"], default="sms", help="Carrier profile.")
+    tx_src = pln.add_mutually_exclusive_group()
+    tx_src.add_argument("--hex", help="Signed transaction hex string to plan for.")
+    tx_src.add_argument("--tx-bytes", type=int, default=250, help="Plan for a random tx of this size instead.")
+    pln.add_argument("--target", type=float, default=0.99, help="Required probability that one transmission decodes.")
+    pln.add_argument("--trials", type=int, default=200, help="Monte Carlo trials per setting.")
+    pln.add_argument("--objective", choices=["bytes", "messages"], default="bytes", help="What to minimise.")
+    pln.add_argument("--formats", default="v1,v2-b91", help="Comma-separated formats to consider.")
+    pln.add_argument("--mtu", type=int, help="Override the carrier's max message size (septets, bytes or characters, as it counts).")
+    pln.add_argument("--loss", type=float, help="Override the carrier's (good-state) loss rate.")
+    pln.add_argument("--burst", help="Override Gilbert-Elliott transitions as P_GOOD_BAD,P_BAD_GOOD.")
+    pln.add_argument("--top", type=int, default=10, help="Rows to show.")
+
+    nck = subparsers.add_parser("nack", help="Print NACK lines listing the missing frames of incomplete txs.",
+                                parents=[verify_opts])
+    nck.add_argument("--input", help="Received frames (default: stdin).")
+    nck.add_argument("--output", help="Write NACK lines to file (default: stdout).")
+    nck.add_argument("--max-len", type=int, default=160, help="Max characters per NACK line (0 = no limit).")
+
+    rsd = subparsers.add_parser("resend", help="Answer a NACK with only the frames it asks for.", parents=[tag_opts])
+    rsd.add_argument("--hex", required=True, help="The signed transaction hex that was sent.")
+    rsd.add_argument("--nack", required=True, help="A NACK line (N:...) or a file of NACK lines.")
+    rsd.add_argument("--frame-size", type=int, default=64, help="Frame payload size used for the original send.")
+    rsd.add_argument("--group-size", type=int, default=8, help="Group size of the original send (for its A: tags).")
+    rsd.add_argument("--tx-id", help="Tx id of the original send (default: the one in the NACK).")
+    rsd.add_argument("--compress", choices=["zlib", "lzma"], help="Compression used for the original send.")
+    rsd.add_argument("--format", choices=["v1", "v2-b91", "v2-b85"], default="v1", help="Frame text format.")
+    rsd.add_argument("--repair", action="store_true",
+                     help="Send fresh Reed-Solomon repair frames (one per gap, plus --extra) instead of data frames.")
+    rsd.add_argument("--extra", type=int, default=0, help="Extra repair frames per window (covers resend losses).")
+    rsd.add_argument("--output", help="Write frames to file (default: stdout).")
 
     btc = subparsers.add_parser("push-btc", help="Broadcast a raw Bitcoin transaction.")
     btc.add_argument("--hex", required=True, help="Signed transaction hex string.")
-    btc.add_argument("--rpc-url", default="http://127.0.0.1:8332", help="Bitcoin RPC URL.")
+    btc.add_argument("--rpc-url", default="http://127.0.0.1:8332",
+                     help="Bitcoin RPC URL; several comma-separated are hedged (first success wins).")
     btc.add_argument("--user", default="rpcuser", help="RPC username.")
     btc.add_argument("--password", default="rpcpass", help="RPC password.")
+    btc.add_argument("--fanout", action="store_true", help="With several RPC URLs, send to all at once instead of hedging.")
 
     eth = subparsers.add_parser("push-eth", help="Broadcast a raw Ethereum transaction.")
     eth.add_argument("--hex", required=True, help="Signed transaction hex string.")
-    eth.add_argument("--rpc-url", default="https://sepolia.infura.io/v3/YOUR_PROJECT_ID", help="Ethereum RPC URL.")
+    eth.add_argument("--rpc-url", default="https://sepolia.infura.io/v3/YOUR_PROJECT_ID",
+                     help="Ethereum RPC URL; several comma-separated are hedged (first success wins).")
+    eth.add_argument("--fanout", action="store_true", help="With several RPC URLs, send to all at once instead of hedging.")
 
     subparsers.add_parser("help", help="Show help and usage for all commands.")
 
     args = parser.parse_args()
+    profile = args.profile_startup
+    if profile:
+        print(f"[PROFILE] cli ready: {(time.perf_counter() - _STARTED) * 1e3:.1f} ms "
+              f"({len(sys.modules)} modules loaded)", file=sys.stderr)
 
-    if args.command == "list-services":
-        list_services()
-    elif args.command == "encode-tx":
-        encode_tx(args)
-    elif args.command == "decode-frames":
-        decode_frames_cmd(args)
-    elif args.command == "push-btc":
-        push_btc_cmd(args)
-    elif args.command == "push-eth":
-        push_eth_cmd(args)
-    elif args.command == "help" or args.command is None:
+    if args.command == "help" or args.command is None:
         parser.print_help()
-    else:
+        return
+    if args.command not in COMMANDS:
         print("Unknown command. Use 'help' for usage.")
         sys.exit(1)
+    handler = COMMANDS[args.command][0]
+    try:
+        load_command_modules(args.command, profile)
+    except ImportError as e:
+        print(f"[ERROR] {args.command} needs a missing dependency: {e}")
+        sys.exit(1)
+    if profile:
+        print(f"[PROFILE] {args.command} ready: {(time.perf_counter() - _STARTED) * 1e3:.1f} ms", file=sys.stderr)
+    handler(args)
 
 if __name__ == "__main__":
     main()
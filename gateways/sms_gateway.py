@@ -2,27 +2,238 @@
 """
 Minimal SMS/HTTP gateway example.
 - Exposes /frames endpoint to POST frames (one per line in body)
-- Decodes and broadcasts to chain (ETH by default)
+- Frames may arrive across many POSTs (one SMS per request is fine): they are
+  pooled in a bounded reassembly table (by tx id, or by sender for bare v1
+  frames) and a tx is broadcast the moment it completes; a line may be a packed
+  message unit (several frames, space-separated: encode-tx --pack)
+- Decodes and broadcasts to chain (ETH by default); broadcasts are queued on a
+  batched, keep-alive dispatcher (tools/dispatcher.py) so a slow node never
+  holds up the carrier's request. The reply carries the locally computed tx hash.
+  ETH_RPC may list several nodes (comma-separated): broadcasts are hedged across
+  them (tools/hedged.py), the fastest healthy node first, and the first success wins
+- Mesh duplicates of a tx already broadcast are answered from a dedup cache
+  (tools/broadcast_cache.py) without another RPC call, including flooded copies
+  of an enveloped tx the table already finished; GET /stats shows the hit rate
+- GET /metrics serves Prometheus text: decode counters (frames by kind, rejected
+  lines by reason, duplicates, recovered seqs, parse/recovery time), reassembly,
+  dedup and broadcast counters, and latency histograms (request, first frame to
+  complete tx, broadcast). A pending reply says how many lines were rejected and why
+- With SPOOL_PATH set, accepted frames and queued broadcasts are spooled to a
+  SQLite WAL file (tools/spool.py, batched fsync): a restarted gateway replays
+  partial txs into the table and re-queues broadcasts whose outcome it never saw
+- With SVNEVM_HMAC set, only txs whose A: tags verify are broadcast (courier/auth.py):
+  injected or forged frames never reach the node. REQUIRE_AUTH=0 also accepts untagged txs
+
+Sender: X-Sender header or "from" query/form field (default: client address).
+Final:  X-Final: 1 or final=1 ends a bare v1 stream whose length is unknown.
+Env:    ETH_RPC (one URL or several, comma-separated), BROADCAST_FANOUT (1: every node at once), PORT, REASSEMBLY_TTL (s), REASSEMBLY_MAX_ENTRIES, REASSEMBLY_MAX_BYTES,
+        BROADCAST_QUEUE, BROADCAST_BATCH, BROADCAST_RETRIES,
+        DEDUP_TTL (s), DEDUP_MAX_ENTRIES, DEDUP_PATH (optional file to survive restarts),
+        SPOOL_PATH (optional), SPOOL_FLUSH_INTERVAL (s), SPOOL_COMPACT_INTERVAL (s), REPLAY_TIMEOUT (s),
+        SVNEVM_HMAC (frame authentication key), REQUIRE_AUTH
 """
 import os
-from flask import Flask, request, jsonify
+import queue
+import time
+from flask import Flask, Response, request, jsonify
 from web3 import Web3
-from courier.foundry_courier import decode_frames
+from courier import auth
+from courier.foundry_courier import DecodeReport
+from courier.metrics import CONTENT_TYPE, Registry
+from courier.reassembly import ReassemblyTable
+from tools.broadcast_cache import BroadcastCache
+from tools.dispatcher import eth_dispatcher
+from tools.spool import Spool
 
 app = Flask(__name__)
 
 ETH_RPC = os.environ.get("ETH_RPC","https://sepolia.infura.io/v3/YOUR_KEY")
-w3 = Web3(Web3.HTTPProvider(ETH_RPC))
+dispatcher = eth_dispatcher(
+    ETH_RPC,
+    max_queue=int(os.environ.get("BROADCAST_QUEUE", "1000")),
+    max_batch=int(os.environ.get("BROADCAST_BATCH", "50")),
+    retries=int(os.environ.get("BROADCAST_RETRIES", "3")),
+    hedge={"fanout": os.environ.get("BROADCAST_FANOUT", "0") == "1"},
+)
+endpoints = getattr(dispatcher.client, "stats", lambda: [])  # per-node health and latency when hedged
+
+metrics = Registry()
+request_seconds = metrics.histogram("courier_request_seconds", "POST /frames handling time.")
+reassembly_seconds = metrics.histogram("courier_reassembly_seconds", "First frame to completed tx.",
+                                       buckets=(0.1, 1, 5, 15, 30, 60, 120, 300, 600))
+broadcast_seconds = metrics.histogram("courier_broadcast_seconds", "Broadcast submit to node answer.")
+
+table = ReassemblyTable(
+    ttl=float(os.environ.get("REASSEMBLY_TTL", "600")),
+    max_entries=int(os.environ.get("REASSEMBLY_MAX_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("REASSEMBLY_MAX_BYTES", str(8 * 1024 * 1024))),
+    on_complete=lambda key, seconds: reassembly_seconds.observe(seconds),
+    hmac_key=auth.key_from_env(),
+    require_auth=os.environ.get("REQUIRE_AUTH", "1") != "0",
+)
+
+spool = Spool(
+    os.environ["SPOOL_PATH"],
+    ttl=table.ttl,
+    flush_interval=float(os.environ.get("SPOOL_FLUSH_INTERVAL", "0.05")),
+    compact_interval=float(os.environ.get("SPOOL_COMPACT_INTERVAL", "60")),
+) if os.environ.get("SPOOL_PATH") else None
+
+# how long a restarted gateway waits for room in the broadcast queue per replayed tx
+REPLAY_TIMEOUT = float(os.environ.get("REPLAY_TIMEOUT", "30"))
+
+cache = BroadcastCache(
+    ttl=float(os.environ.get("DEDUP_TTL", "3600")),
+    max_entries=int(os.environ.get("DEDUP_MAX_ENTRIES", "10000")),
+    path=os.environ.get("DEDUP_PATH") or None,
+)
+
+# read from the live objects at scrape time (module globals, so they follow replacement)
+metrics.callback("courier_frames_total", "counter", "Valid frames received, by kind.",
+                 lambda: table.stats.frames, label="kind")
+metrics.callback("courier_frames_rejected_total", "counter", "Lines rejected by the parser, by reason.",
+                 lambda: table.stats.rejected, label="reason")
+metrics.callback("courier_frames_duplicate_total", "counter", "Frames already held.", lambda: table.stats.duplicates)
+metrics.callback("courier_frames_late_total", "counter", "Frames for txs already completed.", lambda: table.stats.late)
+metrics.callback("courier_frames_unauthenticated_total", "counter", "Frame groups whose A: tag failed (dropped).",
+                 lambda: table.stats.unauthenticated)
+metrics.callback("courier_seqs_recovered_total", "counter", "Data frames rebuilt from parity or repair frames.",
+                 lambda: table.stats.recovered)
+metrics.callback("courier_decode_seconds_total", "counter", "Time spent decoding, by phase.",
+                 lambda: {"parse": table.stats.parse_seconds, "recovery": table.stats.recovery_seconds,
+                          "auth": table.stats.auth_seconds},
+                 label="phase")
+metrics.callback("courier_txs_completed_total", "counter", "Txs reassembled.", lambda: table.completed)
+metrics.callback("courier_txs_evicted_total", "counter", "Partial txs dropped (TTL or caps).", lambda: table.evicted)
+metrics.callback("courier_reassembly_entries", "gauge", "Partial txs buffered.", lambda: len(table))
+metrics.callback("courier_reassembly_bytes", "gauge", "Frame bytes buffered.", lambda: table.bytes)
+metrics.callback("courier_dedup_total", "counter", "Dedup cache lookups, by result.",
+                 lambda: {"hit": cache.hits, "miss": cache.misses}, label="result")
+metrics.callback("courier_broadcast_total", "counter", "Broadcast outcomes.",
+                 lambda: {"sent": dispatcher.sent, "failed": dispatcher.failed, "retried": dispatcher.retried},
+                 label="outcome")
+metrics.callback("courier_broadcast_node_requests_total", "counter", "Requests sent to each RPC node (hedged).",
+                 lambda: {e["node"]: e["requests"] for e in endpoints()}, label="node")
+metrics.callback("courier_broadcast_node_wins_total", "counter", "Batches each RPC node answered first (hedged).",
+                 lambda: {e["node"]: e["wins"] for e in endpoints()}, label="node")
+metrics.callback("courier_spool_commits_total", "counter", "Spool batch commits (one fsync each).",
+                 lambda: spool.commits if spool else 0)
+metrics.callback("courier_spool_errors_total", "counter", "Spool batches that failed to commit.",
+                 lambda: spool.errors if spool else 0)
+
+def _sender():
+    return request.headers.get("X-Sender") or request.values.get("from") or request.remote_addr or "unknown"
+
+def _record_outcome(tx_hash, submitted):
+    def done(fut):
+        broadcast_seconds.observe(time.monotonic() - submitted)
+        if fut.exception() is not None:
+            app.logger.warning("broadcast %s failed: %s", tx_hash, fut.exception())
+            cache.discard(tx_hash)  # let the next copy try again
+        else:
+            cache.put(tx_hash, {"status":"broadcast","result": fut.result()})
+        if spool is not None:
+            spool.resolved(tx_hash)
+    return done
+
+def _submit(tx_hash, raw, block=False):
+    cache.put(tx_hash, {"status":"queued"})
+    try:
+        fut = dispatcher.submit(raw.hex(), block=True, timeout=REPLAY_TIMEOUT) if block else dispatcher.submit(raw.hex())
+    except queue.Full:
+        cache.discard(tx_hash)
+        raise
+    fut.add_done_callback(_record_outcome(tx_hash, time.monotonic()))
+
+def _complete(key, raw, block=False):
+    """Queue a completed tx for broadcast; True if it was a duplicate. Raises queue.Full."""
+    tx_hash = Web3.keccak(raw).hex()
+    table.note(key, tx_hash)  # late copies of the same envelope are answered from the cache
+    duplicate = cache.get(tx_hash) is not None
+    if spool is not None:
+        # spooled before the submit, whose outcome may be recorded right away
+        spool.complete(key, None if duplicate else tx_hash, None if duplicate else raw)
+    if not duplicate:
+        try:
+            _submit(tx_hash, raw, block)
+        except queue.Full:
+            if spool is not None and not block:
+                spool.resolved(tx_hash)  # the sender is told to retry (a replayed tx stays spooled)
+            raise
+    return tx_hash, duplicate
+
+def _replay_spool():
+    # nobody waits on a reply here, so wait for room in the broadcast queue rather than fail
+    for tx_hash, raw in spool.pending():
+        try:
+            _submit(tx_hash, raw, block=True)
+        except queue.Full:
+            app.logger.warning("spool replay: broadcast queue full, %s left for the next restart", tx_hash)
+    for key, sender, line in spool.frames():
+        try:
+            completed = table.feed(sender, [line])
+        except Exception:
+            # one bad row must not keep the gateway from starting (and crash it again on every restart)
+            app.logger.exception("spool replay: dropping frame of %s", key)
+            spool.drop_frame(key, line)
+            continue
+        for done_key, raw in completed:
+            try:
+                _complete(done_key, raw, block=True)
+            except queue.Full:
+                app.logger.warning("spool replay: broadcast queue full, %s left for the next restart", done_key)
+    app.logger.info("spool replayed: %s", spool.stats())
+
+def _is_final():
+    return (request.headers.get("X-Final") or request.args.get("final", "")).lower() in ("1", "true", "yes")
 
 @app.post("/frames")
 def frames():
+    started = time.monotonic()
+    try:
+        return _frames()
+    finally:
+        request_seconds.observe(time.monotonic() - started)
+
+def _frames():
     body = request.get_data(as_text=True)
     lines = [ln.strip() for ln in body.splitlines() if ln.strip()]
-    raw = decode_frames(lines)
-    if not raw:
-        return jsonify({"status":"error","msg":"decode_failed_or_incomplete"}), 400
-    tx_hash = w3.eth.send_raw_transaction(raw)
-    return jsonify({"status":"ok","tx": tx_hash.hex()})
+    report = DecodeReport()
+    late = {}
+    completed = table.feed(_sender(), lines, final=_is_final(), report=report, late=late)
+    hashes, duplicates = [], 0
+    for key, raw in completed:
+        try:
+            tx_hash, duplicate = _complete(key, raw)
+        except queue.Full:
+            return jsonify({"status":"busy","msg":"broadcast_queue_full","txs": hashes}), 503
+        duplicates += duplicate
+        hashes.append(tx_hash)
+    for tx_hash in late.values():
+        # frames of a tx the table already finished: a duplicate if its broadcast is still cached
+        if tx_hash is not None and tx_hash not in hashes and cache.get(tx_hash) is not None:
+            duplicates += 1
+            hashes.append(tx_hash)
+    if not hashes:
+        return jsonify({"status":"pending","msg":"decode_failed_or_incomplete","buffered":len(table),
+                        "frames":sum(report.frames.values()),"rejected":report.rejected}), 202
+    status = "duplicate" if duplicates == len(hashes) else "queued"
+    return jsonify({"status": status,"tx": hashes[0],"txs": hashes,"duplicates": duplicates})
+
+@app.get("/stats")
+def stats():
+    return jsonify({"dedup": cache.stats(), "buffered": len(table),
+                    "broadcast": {"sent": dispatcher.sent, "failed": dispatcher.failed, "retried": dispatcher.retried},
+                    "spool": spool.stats() if spool else None, "nodes": endpoints()})
+
+if spool is not None:
+    # replay before new frames are spooled, so replayed ones are not written twice
+    _replay_spool()
+    table.on_frame = spool.add_frame
+
+@app.get("/metrics")
+def metrics_page():
+    return Response(metrics.render(), content_type=CONTENT_TYPE)
 
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.environ.get("PORT","8080")))
@@ -0,0 +1,118 @@
+"""
+Tests for courier.auth (truncated HMAC tags, A: frames)
+"""
+import itertools
+import zlib
+
+import pytest
+
+from courier import auth
+from courier.foundry_courier import (AuthFrame, DataFrame, Decoder, Demuxer, ParityFrame, decode_frames, decode_report,
+                                     encode_frames, encode_frames_binary, format_frame, parse_binary, parse_frame,
+                                     reject_reason)
+from courier.fountain import FountainSymbol, fountain_frames
+from courier.nack import demux_nacks, nack_for, resend
+
+KEY = b"test_hmac_key"
+TX = "f86b" + "5a" * 300
+
+
+def _forged(seq, payload=b"\x00" * 64, tx_id=None, total=None):
+    fr = DataFrame(seq=seq, size=len(payload), crc=zlib.crc32(payload), payload=payload, tx_id=tx_id, total=total)
+    return format_frame(fr)
+
+
+def test_key_from_env():
+    assert auth.key_from_env({}) is None
+    assert auth.key_from_env({}, allow_insecure_default=True) == auth.INSECURE_DEFAULT_KEY
+    assert auth.key_from_env({auth.ENV_KEY: "s3cret"}, allow_insecure_default=True) == b"s3cret"
+
+
+@pytest.mark.parametrize("scope,tag_bytes,fmt", [("group", 8, "v1"), ("tx", 4, "v1"), ("group", 16, "v2-b91")])
+def test_roundtrip_scopes_and_formats(scope, tag_bytes, fmt):
+    frames = encode_frames(TX, frame_payload_bytes=16, tx_id="a1", hmac_key=KEY, auth_scope=scope,
+                           tag_bytes=tag_bytes, fmt=fmt)
+    tags = [fr for fr in map(parse_frame, frames) if isinstance(fr, AuthFrame)]
+    assert len(tags) == (1 if scope == "tx" else 3) and all(len(t.tag) == tag_bytes for t in tags)
+    assert decode_frames(frames, hmac_key=KEY, require_auth=True).hex() == TX
+    # old decoders and decoders without a key ignore the tags
+    assert decode_frames(frames).hex() == TX
+    blob = encode_frames_binary(TX, frame_payload_bytes=16, hmac_key=KEY, auth_scope=scope, tag_bytes=tag_bytes)
+    dec = Decoder(hmac_key=KEY, require_auth=True)
+    for fr in parse_binary(blob):
+        dec.feed_frame(fr)
+    assert dec.result().hex() == TX
+
+
+def test_tag_precedes_its_group():
+    frames = encode_frames(TX, frame_payload_bytes=16, group_size=4, hmac_key=KEY)
+    kinds = [f[0] for f in frames]
+    assert kinds[:6] == ["A", "F", "F", "F", "F", "P"] and kinds.count("A") == 5
+    assert reject_reason("A:000000:000003:1:AAAA") == "invalid"  # 3-byte tag: too short
+
+
+def test_wrong_key_and_missing_tags():
+    frames = encode_frames(TX, hmac_key=KEY)
+    assert decode_frames(frames, hmac_key=b"other") == b""
+    untagged = encode_frames(TX)
+    assert decode_frames(untagged, hmac_key=KEY).hex() == TX  # untagged streams pass unless required
+    raw, report = decode_report(untagged, hmac_key=KEY, require_auth=True)
+    assert raw == b"" and not report.complete
+
+
+def test_injected_frame_costs_a_resend_not_the_output():
+    frames = encode_frames(TX, tx_id="b2", group_size=4, add_parity=False, hmac_key=KEY)
+    # a hostile relay gets a CRC-valid seq 1 in before the real one
+    stream = [_forged(1, tx_id="b2", total=5)] + frames
+    demux = Demuxer(hmac_key=KEY)
+    assert [demux.feed(f) for f in stream][-1] is None
+    dec = demux.open["b2"]
+    assert dec.stats.unauthenticated == 1 and dec.result() == b""
+    nacks = demux_nacks(demux)
+    assert nacks and nacks[0].startswith("N:b2:0-3:")
+    more = resend(TX, nacks, tx_id="b2", group_size=4, hmac_key=KEY)
+    assert more[0].startswith("X:b2:000005:A:000000:000003:0:")
+    done = [demux.feed(f) for f in more]
+    assert done[-1] == ("b2", bytes.fromhex(TX))
+
+
+def test_forged_short_frame_cannot_truncate_the_tx():
+    frames = encode_frames(TX, frame_payload_bytes=32, add_parity=False, hmac_key=KEY)
+    # a short frame would end a bare stream early; with tags, the last tag says where it ends
+    stream = frames[:3] + [_forged(2, b"\x01" * 5)] + frames[3:]
+    dec = Decoder(hmac_key=KEY)
+    assert all(dec.feed(f) is None for f in stream)
+    assert dec.result() == b"" and dec.stats.unauthenticated == 1
+    assert dec.missing_ranges() == [(0, 7)]  # the rejected group: resent with its tag
+    more = resend(TX, nack_for(dec), frame_payload_bytes=32, hmac_key=KEY)
+    assert [dec.feed(f) for f in more][-1].hex() == TX
+
+
+def test_forged_parity_that_comes_first_does_not_block_recovery():
+    frames = encode_frames(TX, group_size=4, hmac_key=KEY)
+    payload = b"\x01" * 64
+    forged = format_frame(ParityFrame(gidx=0, start_seq=0, end_seq=3, size=64, crc=zlib.crc32(payload),
+                                      parity=payload))
+    lossy = [f for f in frames if not f.startswith("F:000001:")]
+    dec = Decoder(hmac_key=KEY)
+    assert all(dec.feed(f) is None for f in [forged] + lossy)
+    # seq 1 was rebuilt from the forged parity: its tag failed and the real P: was taken for a duplicate
+    assert dec.stats.unauthenticated == 1 and dec.result() == b""
+    # the forged group went with the data, so the same lossy resend now recovers seq 1 from the real P:
+    done = [dec.feed(f) for f in lossy]
+    assert done[lossy.index(frames[5])].hex() == TX and dec.stats.recovered == 2
+
+
+def test_fountain_symbols_are_released_by_their_tag():
+    symbols = list(itertools.islice(fountain_frames(TX, symbol_bytes=32, tx_id="c3", hmac_key=KEY), 40))
+    assert symbols[0].startswith("X:c3:000010:A:000000:000009:1:") and symbols[11].startswith("X:c3:000010:A:")
+    assert decode_frames(symbols, hmac_key=KEY, require_auth=True).hex() == TX
+    untagged = [s for s in symbols if ":A:" not in s]
+    assert decode_frames(untagged, hmac_key=KEY, require_auth=True) == b""
+    # a forged symbol spoils the first decode: the tag fails, the decoder starts over on the later symbols
+    payload = b"\x00" * 32
+    forged = "X:c3:000010:" + format_frame(FountainSymbol(esi=1, length=len(TX) // 2, crc=zlib.crc32(payload),
+                                                          payload=payload))
+    dec = Decoder(hmac_key=KEY)
+    done = [dec.feed(f) for f in [symbols[0], forged] + symbols[1:]]
+    assert dec.stats.unauthenticated == 1 and [d for d in done if d is not None][0].hex() == TX
@@ -0,0 +1,80 @@
+"""
+Tests for courier.batch
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from courier.batch import bounded_map, run_batch
+
+
+def test_jsonl_encode_decode_roundtrip_with_bad_item(tmp_path: Path):
+    txs = [os.urandom(n).hex() for n in (70, 200, 1000)]
+    src = tmp_path / "txs.jsonl"
+    lines = [json.dumps({"id": f"t{i}", "hex": h}) for i, h in enumerate(txs)]
+    lines.insert(1, json.dumps({"id": "bad", "hex": "zz"}))
+    src.write_text("\n".join(lines))
+
+    frames_out = tmp_path / "frames.jsonl"
+    summary = run_batch("encode", str(src), str(frames_out), workers=2, chunksize=1, progress=None)
+    assert (summary["ok"], summary["failed"]) == (3, 1)
+    assert summary["errors"][0][0] == "bad"
+    encoded = [json.loads(ln) for ln in frames_out.read_text().splitlines()]
+    assert [r["id"] for r in encoded] == ["t0", "bad", "t1", "t2"]
+
+    good = tmp_path / "good.jsonl"
+    good.write_text("\n".join(json.dumps(r) for r in encoded if r["ok"]))
+    txs_out = tmp_path / "txs_out.jsonl"
+    summary = run_batch("decode", str(good), str(txs_out), workers=1, progress=None)
+    assert summary["ok"] == 3
+    assert [json.loads(ln)["txs"] for ln in txs_out.read_text().splitlines()] == [[h] for h in txs]
+
+
+def test_directory_mode(tmp_path: Path):
+    src, mid, out = tmp_path / "in", tmp_path / "frames", tmp_path / "out"
+    src.mkdir()
+    tx = os.urandom(300).hex()
+    (src / "alpha.hex").write_text(tx + "\n")
+    run_batch("encode", str(src), str(mid), workers=1, progress=None)
+    assert (mid / "alpha.txt").exists()
+    run_batch("decode", str(mid), str(out), workers=1, progress=None)
+    assert (out / "alpha.hex").read_text() == tx
+
+
+def test_unreadable_files_and_path_ids_fail_only_their_item(tmp_path: Path):
+    src, out = tmp_path / "in", tmp_path / "out"
+    src.mkdir()
+    tx = os.urandom(100).hex()
+    (src / "alpha.hex").write_text(tx)
+    (src / "binary.hex").write_bytes(b"\xff\xfe\x00")
+    summary = run_batch("encode", str(src), str(out), workers=1, progress=None)
+    assert (summary["ok"], summary["failed"]) == (1, 1)
+    assert summary["errors"][0][0] == "binary" and "UnicodeDecodeError" in summary["errors"][0][1]
+    jsonl = tmp_path / "txs.jsonl"
+    jsonl.write_bytes(json.dumps({"id": "a", "hex": tx}).encode() + b'\n{"id": "b", "hex": "\xff"}\n')
+    summary = run_batch("encode", str(jsonl), str(tmp_path / "out.jsonl"), workers=1, progress=None)
+    assert (summary["ok"], summary["failed"]) == (1, 1) and summary["errors"][0][0] == "b"
+
+    jsonl = tmp_path / "txs.jsonl"
+    ids = ["x/y", "../../escaped", "..", "ok"]
+    jsonl.write_text("\n".join(json.dumps({"id": i, "hex": tx}) for i in ids))
+    summary = run_batch("encode", str(jsonl), str(out), workers=1, progress=None)
+    assert (summary["ok"], summary["failed"]) == (1, 3)
+    assert [e[0] for e in summary["errors"]] == ids[:3]
+    assert (out / "ok.txt").exists() and not (tmp_path.parent / "escaped.txt").exists()
+
+
+def test_bounded_map_reads_input_lazily():
+    pulled = []
+
+    def items():
+        for i in range(10000):
+            pulled.append(i)
+            yield -i
+
+    with ProcessPoolExecutor(max_workers=2) as pool:
+        results = bounded_map(pool, abs, items(), chunksize=10, window=4)
+        assert [next(results) for _ in range(5)] == list(range(5))
+        assert len(pulled) <= 5 * 10  # the window plus the chunk being refilled, not the whole input
+        assert list(results) == list(range(5, 10000))
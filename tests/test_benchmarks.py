@@ -0,0 +1,29 @@
+"""
+Tests for the benchmark suite's result format and regression check
+"""
+import copy
+
+from benchmarks.bench_codec import compare, run_suite
+
+
+def test_suite_results_and_compare():
+    grid = {"sizes": [200], "frame_sizes": [64], "group_sizes": [8], "parity": ["xor"],
+            "loss": [0.0], "formats": ["v1", "v2-b91"]}
+    report = run_suite(grid, min_time=0.001, repeat=1, progress=None)
+    assert len(report["results"]) == 2
+    v1, v2 = report["results"]
+    assert v1["recovered"] and v2["recovered"] and v2["overhead"] < v1["overhead"]
+    assert compare(report, report) == []
+
+    slower = copy.deepcopy(report)
+    slower["results"][0]["encode_mbps"] /= 2
+    slower["results"][1]["recovered"] = False
+    problems = compare(report, slower, threshold=0.25)
+    assert len(problems) == 2 and "encode_mbps" in problems[0] and "no longer recovered" in problems[1]
+
+    jittery = copy.deepcopy(report)
+    jittery["results"][0]["decode_mbps"] *= 0.6
+    assert set(report["results"][0]["noise"]) == {"encode_mbps", "decode_mbps", "parse_fps"}
+    assert compare(report, jittery, time_threshold=0.35) != []
+    jittery["results"][0]["noise"]["decode_mbps"] = 0.1  # the run measured its own jitter: tolerated
+    assert compare(report, jittery, time_threshold=0.35) == []
@@ -0,0 +1,132 @@
+"""
+Tests for tools.broadcast_cache and gateway deduplication
+"""
+import os
+from concurrent.futures import Future
+
+from courier.foundry_courier import encode_frames
+from tools.broadcast_cache import BroadcastCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hits_misses_ttl_and_lru():
+    clock = FakeClock()
+    cache = BroadcastCache(ttl=60, max_entries=2, clock=clock)
+    assert cache.get("a") is None
+    cache.put("a", {"result": 1})
+    cache.put("b", {"result": 2})
+    assert cache.get("a") == {"result": 1}  # a is now most recently used
+    cache.put("c", {"result": 3})
+    assert "b" not in cache and "a" in cache and "c" in cache
+    clock.now += 61
+    assert cache.get("a") is None and len(cache) <= 1
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert cache.hit_rate() == 1 / 3
+
+
+def test_persists_across_restarts(tmp_path):
+    clock = FakeClock()
+    path = str(tmp_path / "dedup.json")
+    cache = BroadcastCache(ttl=60, path=path, clock=clock)
+    cache.put("old", "x")
+    clock.now += 30
+    cache.put("new", "y")
+    cache.discard("gone")
+    clock.now += 40
+    restarted = BroadcastCache(ttl=60, path=path, clock=clock)
+    assert "new" in restarted and "old" not in restarted
+    assert restarted.get("new") == "y"
+    (tmp_path / "dedup.json").write_text("not json")
+    assert len(BroadcastCache(path=path)) == 0
+
+
+def test_gateway_answers_mesh_duplicates_from_cache(monkeypatch):
+    from gateways import sms_gateway
+
+    sent = []
+
+    class FakeDispatcher:
+        sent = failed = retried = 0
+
+        def submit(self, raw_hex):
+            sent.append(raw_hex)
+            fut = Future()
+            fut.set_result("0xabc")
+            return fut
+
+    monkeypatch.setattr(sms_gateway, "dispatcher", FakeDispatcher())
+    monkeypatch.setattr(sms_gateway, "table", sms_gateway.ReassemblyTable())
+    monkeypatch.setattr(sms_gateway, "cache", BroadcastCache())
+    client = sms_gateway.app.test_client()
+    tx = os.urandom(150).hex()
+    replies = []
+    for relay in range(4):  # every relay re-encodes, so tx ids differ and only the hash matches
+        body = "\n".join(encode_frames(tx, tx_id=f"r{relay}"))
+        replies.append(client.post("/frames", data=body, headers={"X-Sender": f"relay{relay}"}).get_json())
+    assert sent == [tx]
+    assert replies[0]["status"] == "queued"
+    assert all(r["status"] == "duplicate" and r["tx"] == replies[0]["tx"] for r in replies[1:])
+    stats = client.get("/stats").get_json()["dedup"]
+    assert stats["hits"] == 3 and stats["hit_rate"] == 0.75
+
+
+def test_gateway_answers_late_copies_of_an_enveloped_tx_from_cache(monkeypatch):
+    from gateways import sms_gateway
+
+    sent = []
+
+    class FakeDispatcher:
+        sent = failed = retried = 0
+
+        def submit(self, raw_hex):
+            sent.append(raw_hex)
+            fut = Future()
+            fut.set_result("0xabc")
+            return fut
+
+    monkeypatch.setattr(sms_gateway, "dispatcher", FakeDispatcher())
+    monkeypatch.setattr(sms_gateway, "table", sms_gateway.ReassemblyTable())
+    monkeypatch.setattr(sms_gateway, "cache", BroadcastCache())
+    client = sms_gateway.app.test_client()
+    body = "\n".join(encode_frames(os.urandom(150).hex(), tx_id="mesh1"))  # flooded: the same envelope
+    first = client.post("/frames", data=body, headers={"X-Sender": "relay0"})
+    second = client.post("/frames", data=body, headers={"X-Sender": "relay1"})
+    assert first.status_code == 200 and first.get_json()["status"] == "queued"
+    assert second.status_code == 200
+    assert second.get_json()["status"] == "duplicate" and second.get_json()["tx"] == first.get_json()["tx"]
+    assert len(sent) == 1
+
+
+def test_journal_appends_and_compacts(tmp_path):
+    clock = FakeClock()
+    path = tmp_path / "dedup.json"
+    path.write_text('[["legacy", %r, "z"]]' % clock.now)  # whole-file snapshot of older versions
+    cache = BroadcastCache(ttl=60, max_entries=4, path=str(path), clock=clock)
+    assert "legacy" in cache
+    for i in range(5):
+        cache.put(f"h{i}", i)
+    cache.discard("h4")
+    assert path.read_text().splitlines()[-1] == '["h4"]'  # one line per change, not a rewrite
+    for i in range(5, 7):
+        cache.put(f"h{i}", i)  # past 2 * max_entries lines: rewritten from memory
+    assert len(path.read_text().splitlines()) <= 4
+    with open(path, "a") as fh:
+        fh.write('["h9", 1')  # cut short by a crash
+    restarted = BroadcastCache(ttl=60, max_entries=4, path=str(path), clock=clock)
+    assert sorted(restarted._entries) == sorted(cache._entries)
+    restarted.close()
+    cache.close()
+
+
+def test_disk_errors_are_counted_not_raised(tmp_path):
+    cache = BroadcastCache(path=str(tmp_path / "missing-dir" / "dedup.json"))
+    cache.put("a", 1)
+    cache.discard("a")
+    assert cache.errors >= 1 and len(cache) == 0
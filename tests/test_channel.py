@@ -0,0 +1,71 @@
+"""
+Tests for courier.channel: impairments and the frame/group planner
+"""
+import os
+import random
+
+from courier.channel import CARRIERS, Carrier, bernoulli, gilbert_elliott, plan, simulate
+from courier.foundry_courier import decode_frames, encode_frames
+from courier.packing import PROFILES
+
+
+def test_impairments():
+    frames = [f"line{i:04d}" for i in range(2000)]
+    rng = random.Random(1)
+    assert bernoulli(0.0).transmit(frames, rng) == frames
+    kept = bernoulli(0.1).transmit(frames, rng)
+    assert 1700 < len(kept) < 1900 and set(kept) <= set(frames)
+    dup = bernoulli(0.0, duplicate=0.2).transmit(frames, rng)
+    assert len(dup) > 2300 and set(dup) == set(frames)
+    shuffled = bernoulli(0.0, reorder=0.5).transmit(frames, rng)
+    assert shuffled != frames and sorted(shuffled) == frames
+    damaged = bernoulli(0.0, corrupt=1.0).transmit(frames, rng)
+    assert all(a != b and len(a) == len(b) for a, b in zip(damaged, frames))
+
+
+def test_gilbert_elliott_losses_come_in_bursts():
+    ch = gilbert_elliott(0.05, 0.25)
+    assert abs(ch.mean_loss() - 1 / 6) < 1e-9
+    rng = random.Random(2)
+    frames = [str(i) for i in range(20000)]
+    kept = set(ch.transmit(frames, rng))
+    lost = [i for i in range(len(frames)) if str(i) not in kept]
+    assert 0.12 < len(lost) / len(frames) < 0.22
+    runs = sum(1 for a, b in zip(lost, lost[1:]) if b != a + 1) + 1
+    assert len(lost) / runs > 2.5  # mean burst length ~ 1 / p_bad_good = 4
+
+
+def test_simulate_runs_the_real_codec():
+    raw = os.urandom(300)
+    clean = simulate(raw, bernoulli(0.0), trials=5)
+    assert clean["success"] == 1.0 and clean["frames"] == len(encode_frames(raw.hex()))
+    damaged = bernoulli(0.0, corrupt=1.0).transmit(encode_frames(raw.hex()), random.Random(3))
+    assert decode_frames(damaged) != raw
+    assert simulate(raw, bernoulli(0.3), trials=40, add_parity=False)["success"] < 0.5
+
+
+def test_plan_respects_mtu_and_target():
+    raw = os.urandom(120)
+    carrier = Carrier("test", 100, 10, bernoulli(0.1))
+    rows = plan(raw, carrier, target=0.9, trials=40, frame_sizes=(16, 32, 64), group_sizes=(4, 8))
+    assert rows and all(r["frame_size"] != 64 or r["format"] != "v1" for r in rows)  # 64 B v1 frames exceed 100 chars
+    best = rows[0]
+    assert best["meets_target"] and best["parity"] != "none"
+    feasible = [r for r in rows if r["meets_target"]]
+    assert best["bytes"] == min(r["bytes"] for r in feasible)
+    assert set(CARRIERS) >= {"sms", "lora", "aprs", "qr"}
+
+
+def test_plan_measures_lines_as_the_carrier_counts_them():
+    raw = random.Random(5).randbytes(200)
+    sms, gsm7 = CARRIERS["sms"], PROFILES["sms-gsm7"]
+    rows = plan(raw, sms, trials=5, group_sizes=(8,), parity=("xor",))
+    assert rows
+    for r in rows:
+        frames = encode_frames(raw.hex(), frame_payload_bytes=r["frame_size"], group_size=8, fmt=r["format"])
+        assert all(gsm7.cost(f) is not None and gsm7.cost(f) <= 160 for f in frames)
+    # short enough by len(), but basE91 left GSM-7: it would go out as UCS-2 (70 per SMS)
+    frames = encode_frames(raw.hex(), frame_payload_bytes=96, group_size=8, fmt="v2-b91")
+    assert max(map(len, frames)) <= 160 and not all(map(sms.fits, frames))
+    assert not any(r["format"] == "v2-b91" and r["frame_size"] == 96 for r in rows)
+    assert not CARRIERS["aprs"].fits("F:{") and CARRIERS["lora"].fits("x" * 237)
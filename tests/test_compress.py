@@ -0,0 +1,60 @@
+"""
+Tests for courier.compress and the compressed framing path
+"""
+import os
+import zlib
+
+import pytest
+
+from courier import compress as codecs
+from courier.foundry_courier import decode_frames, encode_frames, parse_frame
+
+ERC20_TRANSFER = (
+    "02f8b1018203e8843b9aca008504a817c80083015f9094dac17f958d2ee523a2206206994597c13d831ec780b844"
+    "a9059cbb000000000000000000000000" + "11" * 20 + "00" * 24 + "0de0b6b3a7640000" + "c080a0" + "22" * 32 + "a0" + "33" * 32
+)
+
+
+def test_codecs_roundtrip():
+    raw = bytes.fromhex(ERC20_TRANSFER)
+    for codec in (codecs.CODEC_NONE, codecs.CODEC_ZLIB, codecs.CODEC_LZMA):
+        assert codecs.decompress(codecs.compress(raw, codec), codec) == raw
+
+
+def test_preset_dictionary_shrinks_erc20_transfer():
+    raw = bytes.fromhex(ERC20_TRANSFER)
+    codec, packed = codecs.pick(raw, "zlib")
+    assert codec == codecs.CODEC_ZLIB and len(packed) < len(raw)
+
+
+def test_dictionary_is_pinned():
+    # codec 1 means this exact dictionary: frames already in flight must still decode
+    assert len(codecs.DEFAULT_DICTIONARY) == 307 and zlib.crc32(codecs.DEFAULT_DICTIONARY) == 0xceb779cf
+
+
+def test_incompressible_falls_back_to_none():
+    raw = os.urandom(200)
+    assert codecs.pick(raw, "lzma") == (codecs.CODEC_NONE, raw)
+    with pytest.raises(ValueError, match="unknown compression method brotli"):
+        codecs.pick(raw, "brotli")
+
+
+def test_damaged_stream_raises():
+    with pytest.raises(ValueError):
+        codecs.decompress(b"\xff\xff\xff", codecs.CODEC_ZLIB)
+
+
+@pytest.mark.parametrize("fmt", ["v1", "v2-b91"])
+def test_compressed_frames_decode_transparently(fmt):
+    frames = encode_frames(ERC20_TRANSFER, frame_payload_bytes=32, compress="zlib", fmt=fmt)
+    fr = parse_frame(frames[0])
+    assert fr.codec == codecs.CODEC_ZLIB and fr.tx_id
+    assert decode_frames(frames).hex() == ERC20_TRANSFER
+
+
+def test_report_rows():
+    rows = codecs.compression_report(bytes.fromhex(ERC20_TRANSFER), repeat=2)
+    assert [r["codec"] for r in rows] == ["none", "zlib", "lzma"]
+    assert rows[0]["ratio"] == 1.0
+    assert [r["bytes"] for r in codecs.compression_report(bytes.fromhex(ERC20_TRANSFER), repeat=0)] == \
+        [r["bytes"] for r in rows]
@@ -0,0 +1,203 @@
+"""
+Tests for tools.dispatcher against a local stub JSON-RPC node
+"""
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from tools import push_btc, push_eth
+from tools.dispatcher import BroadcastDispatcher, JsonRpcClient, RpcError, TransportError, eth_dispatcher
+from tools.hedged import HedgedClient
+
+
+class StubNode:
+    """JSON-RPC node answering batches; fail_first makes the first N requests return HTTP 503, delay slows answers."""
+
+    def __init__(self, fail_first=0, reject=(), delay=0.0):
+        self.requests = []
+        self.clients = set()
+        self.fail_first = fail_first
+        self.reject = set(reject)
+        self.delay = delay
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                node.requests.append(body)
+                node.clients.add(self.client_address)
+                if node.fail_first:
+                    node.fail_first -= 1
+                    self._reply(503, b"busy")
+                    return
+                time.sleep(node.delay)
+                calls = body if isinstance(body, list) else [body]
+                replies = [node.answer(c) for c in calls]
+                self._reply(200, json.dumps(replies if isinstance(body, list) else replies[0]).encode())
+
+            def _reply(self, code, data):
+                self.send_response(code)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def answer(self, call):
+        raw = call["params"][0]
+        if raw.replace("0x", "") in self.reject:
+            return {"jsonrpc": call["jsonrpc"], "id": call["id"], "result": None,
+                    "error": {"code": -26, "message": "txn-mempool-conflict"}}
+        return {"jsonrpc": call["jsonrpc"], "id": call["id"], "result": "h-" + raw}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def node():
+    n = StubNode()
+    yield n
+    n.close()
+
+
+def test_batches_and_keeps_connection_alive(node):
+    d = BroadcastDispatcher(JsonRpcClient(node.url), "sendrawtransaction", max_batch=10, linger=0.2)
+    futs = [d.submit(f"{i:04x}") for i in range(25)]
+    assert [f.result(timeout=5) for f in futs] == [f"h-{i:04x}" for i in range(25)]
+    d.close()
+    assert len(node.requests) <= 5  # batched, not one POST per tx
+    assert sum(len(r) if isinstance(r, list) else 1 for r in node.requests) == 25
+    assert len(node.clients) == 1  # one pooled keep-alive connection
+
+
+def test_rejection_is_per_tx_and_final(node):
+    node.reject.add("bad0")
+    d = eth_dispatcher(node.url, linger=0.1)
+    good, bad = d.submit("aa00"), d.submit("bad0")
+    assert good.result(timeout=5) == "h-0xaa00"
+    with pytest.raises(RpcError, match="mempool-conflict"):
+        bad.result(timeout=5)
+    d.close()
+    assert d.sent == 1 and d.failed == 1 and d.retried == 0
+
+
+def test_transport_errors_are_retried_with_backoff():
+    node = StubNode(fail_first=2)
+    try:
+        d = BroadcastDispatcher(JsonRpcClient(node.url), "sendrawtransaction", retries=3, backoff=0.01)
+        assert d.broadcast("ab", timeout=5) == "h-ab"
+        assert d.retried == 2
+        d.close()
+        node.fail_first = 10
+        d = BroadcastDispatcher(JsonRpcClient(node.url), "sendrawtransaction", retries=1, backoff=0.01)
+        with pytest.raises(TransportError):
+            d.broadcast("cd", timeout=5)
+        d.close()
+    finally:
+        node.close()
+
+
+def test_bounded_queue_rejects_when_full():
+    d = BroadcastDispatcher(JsonRpcClient("http://127.0.0.1:9"), "sendrawtransaction", max_queue=1, workers=0)
+    d.submit("00")
+    with pytest.raises(queue.Full):
+        d.submit("01")
+
+
+def test_cancelled_futures_and_broken_batches_do_not_stop_the_worker():
+    class FlakyClient:
+        url = "stub://"
+
+        def __init__(self):
+            self.calls = []
+
+        def batch(self, calls):
+            self.calls.append([p[0] for _, p in calls])
+            if calls[0][1][0] == "bad":
+                raise ValueError("unparseable reply")
+            return [("h-" + p[0], None) for _, p in calls]
+
+        def close(self):
+            pass
+
+    client = FlakyClient()
+    d = BroadcastDispatcher(client, "sendrawtransaction", linger=0.2)
+    gone, bad = d.submit("gone"), d.submit("bad")
+    assert gone.cancel()
+    with pytest.raises(ValueError):
+        bad.result(timeout=5)
+    assert d.broadcast("ok", timeout=5) == "h-ok"  # the worker survived the broken batch
+    assert client.calls == [["bad"], ["ok"]] and d.failed == 1
+    d.close()
+
+
+def test_push_helpers_use_dispatcher(node):
+    assert push_btc.push_btc("DEADBEEF", rpc_url=node.url, user="u", pwd="p") == "h-deadbeef"
+    assert push_eth.push_eth(bytes.fromhex("beef"), rpc_url=node.url) == "h-0xbeef"
+    assert node.requests[0]["jsonrpc"] == "1.0" and node.requests[1]["method"] == "eth_sendRawTransaction"
+
+
+def test_hedged_client_hedges_past_a_slow_node_and_prefers_the_fast_one():
+    slow, fast = StubNode(delay=1.0), StubNode()
+    try:
+        client = HedgedClient([JsonRpcClient(slow.url), JsonRpcClient(fast.url)], default_delay=0.1)
+        started = time.monotonic()
+        assert client.call("sendrawtransaction", ["aa"]) == "h-aa"
+        assert time.monotonic() - started < 0.8 and client.hedges == 1
+        time.sleep(1.2)  # the abandoned request to the slow node finishes and is timed
+        assert [ep.url for ep in client.ranked()] == [fast.url, slow.url]
+        assert client.call("sendrawtransaction", ["bb"]) == "h-bb"
+        assert client.hedges == 1 and len(slow.requests) == 1 and len(fast.requests) == 2
+        assert [s["wins"] for s in client.stats()] == [0, 2]
+        client.close()
+    finally:
+        slow.close()
+        fast.close()
+
+
+def test_hedged_client_skips_dead_nodes_and_fans_out(node):
+    client = HedgedClient([JsonRpcClient("http://127.0.0.1:9", timeout=1), JsonRpcClient(node.url)], cooldown=60)
+    d = BroadcastDispatcher(client, "sendrawtransaction", retries=0)
+    assert d.broadcast("01", timeout=5) == "h-01"
+    assert [ep.url for ep in client.ranked()][-1] == "http://127.0.0.1:9"
+    assert client.stats()[0]["healthy"] is False and client.stats()[0]["node"] == "http://127.0.0.1:9"
+    d.close()
+    other = StubNode(reject=["02"])
+    try:
+        client = HedgedClient([JsonRpcClient(other.url), JsonRpcClient(node.url)], fanout=True)
+        assert client.batch([("sendrawtransaction", ["02"])]) == [("h-02", None)]  # one node rejects, one accepts
+        deadline = time.monotonic() + 5
+        while not other.requests and time.monotonic() < deadline:
+            time.sleep(0.01)  # the batch may return before the losing node has been reached
+        assert len(other.requests) == 1 and len(node.requests) == 2
+        client.close()
+    finally:
+        other.close()
+    dead = HedgedClient([JsonRpcClient("http://127.0.0.1:9", timeout=1)] * 2)
+    with pytest.raises(TransportError):
+        dead.call("sendrawtransaction", ["03"])
+
+
+def test_rejection_is_final_and_push_takes_several_urls(node):
+    with eth_dispatcher(f"{node.url}, http://127.0.0.1:9") as d:
+        assert isinstance(d.client, HedgedClient)
+    node.reject.add("04")
+    client = HedgedClient([JsonRpcClient(node.url), JsonRpcClient("http://127.0.0.1:9", timeout=1)])
+    with pytest.raises(RpcError):
+        client.call("sendrawtransaction", ["04"])
+    assert client.hedges == 0  # a rejection does not go on to the next node
+    client.close()
+    assert push_eth.push_eth(bytes.fromhex("beef"), rpc_url=f"http://127.0.0.1:9,{node.url}") == "h-0xbeef"
@@ -57,6 +57,44 @@ def test_cli_help():
     print("[PASS] CLI help")
 
 
+def test_every_encode_path_passes_a_gateway_that_requires_auth(tmp_path, monkeypatch):
+    from concurrent.futures import Future
+
+    from courier.reassembly import ReassemblyTable
+    from gateways import sms_gateway
+    from tools.broadcast_cache import BroadcastCache
+
+    sent = []
+
+    class FakeDispatcher:
+        def submit(self, raw_hex):
+            sent.append(raw_hex)
+            fut = Future()
+            fut.set_result("0x" + "00" * 32)
+            return fut
+
+    monkeypatch.setattr(sms_gateway, "dispatcher", FakeDispatcher())
+    monkeypatch.setattr(sms_gateway, "table", ReassemblyTable(hmac_key=b"test_hmac_key", require_auth=True))
+    monkeypatch.setattr(sms_gateway, "cache", BroadcastCache())
+    client = sms_gateway.app.test_client()
+
+    txs = [os.urandom(n).hex() for n in (150, 300, 450)]
+    single, fountain = tmp_path / "single.txt", tmp_path / "fountain.txt"
+    (tmp_path / "in").mkdir()
+    (tmp_path / "in" / "b1.hex").write_text(txs[2])
+    results = [
+        run_cli(["encode-tx", "--hex", txs[0], "--output", str(single)]),
+        run_cli(["encode-tx", "--hex", txs[1], "--tx-id", "f1", "--fountain", "20", "--output", str(fountain)]),
+        run_cli(["batch-encode", "--input", str(tmp_path / "in"), "--output", str(tmp_path / "out"),
+                 "--workers", "1"]),
+    ]
+    assert all(res.returncode == 0 and "[ERROR]" not in res.stdout for res in results)
+    for path, sender in ((single, "s1"), (fountain, "s2"), (tmp_path / "out" / "b1.txt", "s3")):
+        res = client.post("/frames", data=path.read_text(), headers={"X-Sender": sender})
+        assert res.status_code == 200, res.get_json()
+    assert sent == txs
+
+
 def run_all():
     test_encode_decode_cycle()
     test_cli_help()
@@ -3,6 +3,8 @@ Unit and property tests for courier.foundry_courier
 """
 from courier.foundry_courier import encode_frames, decode_frames
 import random
+import sys
+import zlib
  
 
 def random_hex(length: int) -> str:
@@ -57,3 +59,180 @@ def test_invalid_frame():
     assert decode_frames(
         bad, hmac_key=b"test_hmac_key"
     ) == bytes.fromhex(tx_hex)
+
+
+def test_reed_solomon_recovers_m_losses_per_group():
+    tx_hex = random_hex(2 * 1000 + 6)  # 1003 bytes -> 16 frames, short tail
+    frames = encode_frames(tx_hex, group_size=8, repair_frames=3)
+    assert sum(f.startswith('R:') for f in frames) == 6
+    data = [f for f in frames if f.startswith('F:')]
+    repairs = [f for f in frames if f.startswith('R:')]
+    # drop three frames from each group, including the short tail frame
+    kept = [f for i, f in enumerate(data) if i not in (0, 3, 7, 9, 12, 15)]
+    assert decode_frames(kept + repairs).hex() == tx_hex
+
+
+def test_reed_solomon_too_many_losses_truncates():
+    tx_hex = random_hex(1024)
+    frames = encode_frames(tx_hex, group_size=4, repair_frames=2)
+    data = [f for f in frames if f.startswith('F:')]
+    repairs = [f for f in frames if f.startswith('R:')]
+    assert decode_frames(data[:1] + data[4:] + repairs).hex() == tx_hex[:128]
+
+
+def test_default_parity_mode_stays_xor():
+    frames = encode_frames(random_hex(512), group_size=2)
+    assert [f[0] for f in frames] == ['F', 'F', 'P', 'F', 'F', 'P']
+
+
+def test_streaming_decoder_completes_before_eof():
+    from courier.foundry_courier import Decoder
+    tx_hex = random_hex(2 * 300)  # 5 frames, short tail
+    frames = encode_frames(tx_hex, group_size=4)
+    dec = Decoder()
+    out = [dec.feed(f) for f in frames]
+    done = [i for i, r in enumerate(out) if r is not None]
+    assert len(done) == 1
+    assert out[done[0]].hex() == tx_hex
+    assert dec.is_complete() and dec.missing() == []
+
+
+def test_streaming_decoder_missing_and_parity_recovery():
+    from courier.foundry_courier import Decoder
+    tx_hex = random_hex(2 * 300)
+    frames = encode_frames(tx_hex, group_size=4)  # F0..F3 P1 F4 P2
+    dec = Decoder()
+    for f in frames[:2] + frames[3:4] + frames[5:6]:
+        assert dec.feed(f) is None
+    assert dec.missing() == [2]
+    assert dec.feed(frames[4]).hex() == tx_hex
+
+
+def test_tx_id_envelope_and_total():
+    from courier.foundry_courier import parse_frame
+    tx_hex = random_hex(256)  # 2 full frames: total comes from the envelope
+    frames = encode_frames(tx_hex, tx_id="ab12")
+    assert all(f.startswith("X:ab12:000002:") for f in frames)
+    fr = parse_frame(frames[0])
+    assert (fr.tx_id, fr.total, fr.seq) == ("ab12", 2, 0)
+    assert decode_frames(frames).hex() == tx_hex
+
+
+def test_demux_interleaved_batch():
+    from courier.foundry_courier import Demuxer, demux_frames, encode_batch, encode_stream
+    txs = [random_hex(2 * n) for n in (64, 300, 129, 1000)]
+    ids = [tx_id for tx_id, _ in encode_batch(txs)]
+    assert len(set(ids)) == len(txs)
+    stream = encode_stream(txs, group_size=4)
+    assert demux_frames(stream) == {i: bytes.fromhex(t) for i, t in zip(ids, txs)}
+    # drop one data frame per tx: parity still completes all of them, in stream order
+    lossy = [f for f in stream if ":F:000001:" not in f]
+    demux = Demuxer()
+    done = [d for d in map(demux.feed, lossy) if d is not None]
+    assert sorted(done) == sorted((i, bytes.fromhex(t)) for i, t in zip(ids, txs))
+    assert demux.pending() == {}
+
+
+def test_interleaved_parity_survives_bursts_at_same_overhead():
+    from courier.foundry_courier import parse_frame
+    tx_hex = random_hex(2 * 5000)  # 79 frames: one merged 79-frame block, stride 10
+    flat = encode_frames(tx_hex, group_size=8)
+    frames = encode_frames(tx_hex, group_size=8, parity_layout="interleaved")
+    assert len(frames) == len(flat)
+    assert any(f.startswith("Q:") and parse_frame(f).stride == 10 for f in frames)
+    for start in range(len(frames) - 8):
+        assert decode_frames(frames[:start] + frames[start + 8:]).hex() == tx_hex
+    assert decode_frames(flat[:20] + flat[28:]).hex() != tx_hex
+
+
+def test_2d_parity_recovers_iteratively():
+    from courier.foundry_courier import Decoder, parse_frame
+    tx_hex = random_hex(2 * 64 * 16)  # 4x4 block of full frames
+    frames = encode_frames(tx_hex, group_size=4, parity_layout="2d", tx_id="sq")
+    by_seq = {parse_frame(f).seq: f for f in frames if ":F:" in f}
+    # L-shaped loss: row 1 repairs 4, then column 0 repairs 0, then row 0 repairs 1
+    lost = {by_seq[s] for s in (0, 1, 4)}
+    dec = Decoder()
+    results = [dec.feed(f) for f in frames if f not in lost]
+    assert [r.hex() for r in results if r is not None] == [tx_hex]
+    # a 2x2 square is beyond row+column XOR
+    square = {by_seq[s] for s in (0, 1, 4, 5)}
+    assert decode_frames([f for f in frames if f not in square]).hex() != tx_hex
+
+
+def test_strided_parity_trims_recovered_tail():
+    tx_hex = random_hex(2 * 250)
+    for layout in ("interleaved", "2d"):
+        frames = encode_frames(tx_hex, parity_layout=layout)
+        assert decode_frames(frames[:3] + frames[4:]).hex() == tx_hex
+        tagged = encode_frames(tx_hex, parity_layout=layout, tx_id="ab", fmt="v2-b91")
+        assert decode_frames(tagged[:3] + tagged[4:]).hex() == tx_hex
+
+
+def test_parser_rejects_garbage_without_raising():
+    from courier.foundry_courier import parse_frame
+    line = encode_frames(random_hex(200), tx_id="ab12")[0]
+    assert parse_frame(line).tx_id == "ab12"
+    bad = ["", "F", "F:", "X:ab12:000001:", "X:AB12:000001:" + line[14:], "F:1:2:3:4:5", "Q:" + line[16:],
+           line[:-2], line.replace(":", "::", 2), line[:20] + "!" + line[21:], line + "A", "\x00" * 40,
+           "F:000000:004:00000000:AAA=====", "L:000001:000010:deadbeef:AAA", "F:+00001:004:00000000:AAAAAA=="]
+    for text in bad:
+        assert parse_frame(text) is None
+        assert parse_frame(text.encode("latin-1")) is None
+
+
+def test_parse_frames_accepts_bytes_and_skips_noise():
+    from courier.foundry_courier import DataFrame, parse_frame, parse_frames
+    tx_hex = random_hex(300)
+    frames = encode_frames(tx_hex, tx_id="cd", repair_frames=2)
+    noisy = []
+    for f in frames:
+        noisy += [b"RSSI -97 " + f.encode(), f.encode(), b"F:zzz"]
+    parsed = list(parse_frames(noisy))
+    assert parsed == [parse_frame(f) for f in frames]
+    assert decode_frames(noisy).hex() == tx_hex
+    if sys.version_info >= (3, 10):
+        assert isinstance(parsed[0], DataFrame) and not hasattr(parsed[0], "__dict__")
+
+
+def test_decode_report_explains_short_output():
+    from courier.foundry_courier import decode_report, seq_ranges
+    raw = bytes(random.getrandbits(8) for _ in range(900))
+    frames = encode_frames(raw.hex(), group_size=4)  # 15 data frames, P: after every 4
+    data = [f for f in frames if f.startswith("F:")]
+    parity = [f for f in frames if f.startswith("P:")]
+    damaged = data[6][:30] + ("A" if data[6][30] != "A" else "B") + data[6][31:]
+    lines = data[:2] + data[3:6] + [damaged] + data[10:] + parity + [data[4], "noise", data[7][:40]]
+    out, rep = decode_report(lines)
+    assert out == raw[:6 * 64]
+    assert not rep.complete and rep.gap == 6 and rep.missing == [(6, 9)]
+    assert rep.recovered_seqs == [2] and rep.recovered == 1
+    assert rep.frames == {"data": 11, "parity": 4} and rep.duplicates == 1
+    assert rep.rejected == {"crc": 1, "malformed": 1, "length": 1}
+    assert rep.parse_seconds > 0 and rep.recovery_seconds > 0
+    assert seq_ranges([9, 1, 2, 3, 7]) == [(1, 3), (7, 7), (9, 9)]
+    out, rep = decode_report(frames)
+    assert out == raw and rep.complete and rep.missing == [] and rep.gap is None
+
+
+def test_parity_group_span_is_bounded():
+    from courier import wire
+    from courier.foundry_courier import MAX_GROUP, ParityFrame, format_frame, pack_frame, parse_frame
+    parity = b"\x00" * 16
+
+    def p_frame(start, end):
+        return ParityFrame(gidx=0, start_seq=start, end_seq=end, size=len(parity), crc=zlib.crc32(parity), parity=parity)
+
+    assert parse_frame(format_frame(p_frame(0, MAX_GROUP - 1))) is not None
+    assert parse_frame(format_frame(p_frame(0, 999999))) is None  # one frame must not stand for a million seqs
+    assert parse_frame(format_frame(p_frame(5, 4))) is None
+    assert parse_frame(wire.encode_text(pack_frame(p_frame(0, MAX_GROUP - 1)))) is not None
+    assert parse_frame(wire.encode_text(pack_frame(p_frame(0, MAX_GROUP)))) is None
+
+
+def test_demux_bare_stream_carries_consecutive_txs():
+    from courier.foundry_courier import Demuxer
+    txs = [random_hex(2 * 300), random_hex(2 * 200)]
+    demux = Demuxer()
+    done = [d for d in map(demux.feed, encode_frames(txs[0]) + encode_frames(txs[1])) if d is not None]
+    assert done == [("", bytes.fromhex(t)) for t in txs]
@@ -0,0 +1,61 @@
+"""
+Tests for courier.fountain
+"""
+import itertools
+import random
+
+from courier.foundry_courier import decode_frames
+from courier.fountain import MAX_SYMBOLS, FountainDecoder, FountainSymbol, fountain_frames, parse_symbol, symbol_neighbors
+
+
+def random_hex(length: int) -> str:
+    return ''.join(random.choice('0123456789abcdef') for _ in range(length))
+
+
+def test_systematic_prefix_decodes_with_exactly_k_symbols():
+    tx_hex = random_hex(2 * 300)
+    frames = list(itertools.islice(fountain_frames(tx_hex), 5))
+    dec = FountainDecoder()
+    results = [dec.feed(f) for f in frames]
+    assert results[:4] == [None] * 4
+    assert results[4].hex() == tx_hex
+
+
+def test_decodes_from_random_subset_and_stops():
+    rng = random.Random(7)
+    tx_hex = random_hex(2 * 2000)  # k = 32
+    dec = FountainDecoder()
+    used = 0
+    for line in fountain_frames(tx_hex):
+        if rng.random() < 0.6:
+            continue
+        used += 1
+        if dec.feed(line) is not None:
+            break
+    assert dec.is_complete()
+    assert dec.result().hex() == tx_hex
+    assert used < 32 * 2
+
+
+def test_neighbors_are_deterministic():
+    assert symbol_neighbors(40, 32) == symbol_neighbors(40, 32)
+    assert all(0 <= j < 32 for j in symbol_neighbors(99, 32))
+
+
+def test_decode_frames_understands_symbols():
+    tx_hex = random_hex(2 * 130)
+    lines = list(itertools.islice(fountain_frames(tx_hex, start=3), 40))
+    assert decode_frames(lines).hex() == tx_hex
+
+
+def test_zero_length_and_oversized_headers_are_ignored():
+    line = next(fountain_frames("ab" * 64))
+    esi, length, crc, b64 = line[2:].split(":")
+    dec = FountainDecoder()
+    assert dec.feed(f"L:{esi}:000000:{crc}:{b64}") is None  # would divide by zero
+    assert dec.feed(FountainSymbol(esi=0, length=0, crc=0, payload=b"\x00")) is None
+    # a 1-byte symbol claiming a 999999999-byte tx must not allocate a billion slots
+    assert parse_symbol(f"{esi}:999999999:{crc}:{b64}") is None
+    assert dec.feed(FountainSymbol(esi=0, length=MAX_SYMBOLS + 1, crc=0, payload=b"\x00")) is None
+    assert dec.length is None
+    assert dec.feed(line).hex() == "ab" * 64
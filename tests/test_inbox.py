@@ -0,0 +1,64 @@
+"""
+Tests for courier.inbox (incremental USB inbox ingest)
+"""
+import json
+import os
+
+from courier.foundry_courier import encode_frames, encode_frames_binary
+from courier.inbox import INDEX_NAME, ingest
+
+
+def _outbox(path):
+    return sorted(open(os.path.join(path, n)).read().strip() for n in os.listdir(path) if n.endswith(".hex"))
+
+
+def test_frames_pool_across_files_and_runs(tmp_path):
+    inbox, outbox = tmp_path / "stick", str(tmp_path / "out")
+    (inbox / "a").mkdir(parents=True)
+    tx1, tx2, tx3 = os.urandom(400).hex(), os.urandom(300).hex(), os.urandom(200).hex()
+    f1, f2 = encode_frames(tx1, tx_id="aa"), encode_frames(tx2, tx_id="bb")
+    (inbox / "a" / "one.txt").write_text("noise\n" + "\n".join(f1[:4]))
+    (inbox / "two.log").write_text("\n".join("rssi=-90 " + f for f in f1[4:]) + "\ngarbage")
+    (inbox / "three.bin").write_bytes(encode_frames_binary(tx3, tx_id="cc"))
+    (inbox / "bb1.txt").write_text("\n".join(f2[:3]))
+
+    s = ingest(str(inbox), outbox, workers=2)
+    assert (s["parsed"], s["txs"], s["incomplete"]) == (4, 2, 1)
+    assert _outbox(outbox) == sorted([tx1, tx3])
+
+    s = ingest(str(inbox), outbox)  # nothing new: no file is opened
+    assert (s["skipped"], s["parsed"], s["txs"]) == (4, 0, 0)
+
+    (inbox / "bb2.txt").write_text(" ".join(f2[3:]))  # the rest of tx2, packed on one line
+    (inbox / "copy.txt").write_text((inbox / "a" / "one.txt").read_text())
+    s = ingest(str(inbox), outbox, workers=1)
+    assert (s["parsed"], s["duplicate"], s["txs"], s["incomplete"]) == (1, 1, 1, 0)
+    assert _outbox(outbox) == sorted([tx1, tx2, tx3])
+
+
+def test_late_frames_of_done_tx_are_ignored(tmp_path):
+    inbox, outbox = tmp_path / "stick", str(tmp_path / "out")
+    inbox.mkdir()
+    frames = encode_frames(os.urandom(200).hex(), tx_id="dd")
+    (inbox / "all.txt").write_text("\n".join(frames))
+    assert ingest(str(inbox), outbox, workers=1)["txs"] == 1
+    (inbox / "late.txt").write_text(frames[0])
+    s = ingest(str(inbox), outbox, workers=1)
+    assert (s["txs"], s["incomplete"]) == (0, 0)
+
+
+def test_damaged_index_falls_back_to_a_full_ingest(tmp_path):
+    inbox, outbox = tmp_path / "stick", str(tmp_path / "out")
+    inbox.mkdir()
+    tx = os.urandom(300).hex()
+    frames = encode_frames(tx, tx_id="ee")
+    (inbox / "part1.txt").write_text("\n".join(frames[:3]))
+    assert ingest(str(inbox), outbox, workers=1)["incomplete"] == 1
+    index_path = os.path.join(outbox, INDEX_NAME)
+    index = json.load(open(index_path))
+    index["pending"]["ee"][0] = "X:ee:000005:F:000000:tampered"
+    json.dump(index, open(index_path, "w"))
+    (inbox / "part2.txt").write_text("\n".join(frames[3:]))
+    s = ingest(str(inbox), outbox, workers=1)
+    assert (s["reindexed"], s["parsed"], s["txs"]) == (1, 2, 1)
+    assert _outbox(outbox) == [tx]
@@ -0,0 +1,64 @@
+"""
+Tests for courier.metrics and the gateway /metrics endpoint
+"""
+import os
+from concurrent.futures import Future
+
+from courier.foundry_courier import encode_frames
+from courier.metrics import Registry
+from courier.reassembly import ReassemblyTable
+from tools.broadcast_cache import BroadcastCache
+
+
+def test_registry_renders_prometheus_text():
+    reg = Registry()
+    hits = reg.counter("t_hits_total", "Hits.", labels=("path",))
+    lat = reg.histogram("t_seconds", "Latency.", buckets=(0.1, 1))
+    reg.callback("t_open", "gauge", "Open.", lambda: 3)
+    reg.callback("t_by_kind_total", "counter", "By kind.", lambda: {"b": 2, "a": 1}, label="kind")
+    hits.inc(path="/x")
+    hits.inc(2, path='/"y"')
+    for v in (0.05, 0.5, 5):
+        lat.observe(v)
+    text = reg.render()
+    assert "# TYPE t_hits_total counter\n" in text
+    assert 't_hits_total{path="/x"} 1\n' in text and 't_hits_total{path="/\\"y\\""} 2\n' in text
+    assert 't_seconds_bucket{le="0.1"} 1\nt_seconds_bucket{le="1"} 2\nt_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "t_seconds_sum 5.55\nt_seconds_count 3\n" in text
+    assert "# TYPE t_open gauge\nt_open 3\n" in text
+    assert 't_by_kind_total{kind="a"} 1\nt_by_kind_total{kind="b"} 2\n' in text
+
+
+def test_gateway_metrics_and_pending_diagnostics(monkeypatch):
+    from gateways import sms_gateway
+
+    class FakeDispatcher:
+        sent = failed = retried = 0
+
+        def submit(self, raw_hex):
+            self.sent += 1
+            fut = Future()
+            fut.set_result("0xabc")
+            return fut
+
+    monkeypatch.setattr(sms_gateway, "dispatcher", FakeDispatcher())
+    monkeypatch.setattr(sms_gateway, "table", ReassemblyTable(
+        on_complete=lambda key, seconds: sms_gateway.reassembly_seconds.observe(seconds)))
+    monkeypatch.setattr(sms_gateway, "cache", BroadcastCache())
+    client = sms_gateway.app.test_client()
+    frames = encode_frames(os.urandom(300).hex(), tx_id="m1", group_size=4)
+    first = client.post("/frames", data="\n".join([frames[0], frames[1][:-6], "hello"]))
+    assert first.status_code == 202
+    assert first.get_json()["frames"] == 1 and first.get_json()["rejected"] == {"length": 1, "malformed": 1}
+    assert client.post("/frames", data="\n".join(frames[2:])).status_code == 200
+    page = client.get("/metrics")
+    assert page.content_type.startswith("text/plain; version=0.0.4")
+    text = page.get_data(as_text=True)
+    assert 'courier_frames_rejected_total{reason="length"} 1\n' in text
+    # F0 F1 F2 F3 P0 F4 P1: P0 rebuilds F1, F4 completes the tx, P1 arrives late
+    assert 'courier_frames_total{kind="data"} 4\n' in text and 'courier_frames_total{kind="parity"} 1\n' in text
+    assert "courier_frames_late_total 1\n" in text
+    assert "courier_seqs_recovered_total 1\n" in text
+    assert "courier_txs_completed_total 1\n" in text
+    assert 'courier_broadcast_total{outcome="sent"} 1\n' in text
+    assert "courier_request_seconds_count" in text and 'courier_decode_seconds_total{phase="parse"}' in text
@@ -0,0 +1,83 @@
+"""
+Tests for courier.nack (selective retransmit)
+"""
+import base64
+import random
+import zlib
+
+import pytest
+
+from courier.foundry_courier import Decoder, Demuxer, encode_frames, max_frames
+from courier.nack import demux_nacks, format_nack, nack_for, parse_nack, resend
+
+
+def _lossy(frames, lost):
+    return [f for i, f in enumerate(frames) if i not in lost]
+
+
+def test_format_parse_roundtrip_and_split():
+    ranges = [(3, 3), (7, 9), (40, None)]
+    (line,) = format_nack("ab12", ranges)
+    assert line.startswith("N:ab12:3,7-9,40-:")
+    nack = parse_nack(line)
+    assert nack.tx_id == "ab12" and nack.ranges == ranges
+    assert nack.seqs(42) == [3, 7, 8, 9, 40, 41]
+    assert parse_nack(line[:-1] + ("0" if line[-1] != "0" else "1")) is None  # crc
+    assert parse_nack("F:000001:064:00000000:AAAA") is None
+    lines = format_nack(None, [(i, i) for i in range(0, 400, 2)], max_len=160)
+    assert len(lines) > 1 and all(len(ln) <= 160 for ln in lines)
+    assert [r for ln in lines for r in parse_nack(ln).ranges] == [(i, i) for i in range(0, 400, 2)]
+
+
+@pytest.mark.parametrize("repair", [False, True])
+def test_resend_completes_tx(repair):
+    tx = random.Random(1).randbytes(64 * 200 - 10).hex()
+    frames = encode_frames(tx, tx_id="ab12", add_parity=False)
+    lost = {17, 120, 121, 122}
+    dec = Decoder()
+    for line in _lossy(frames, lost):
+        assert dec.feed(line) is None
+    nacks = nack_for(dec, "ab12")
+    assert nacks == [format_nack("ab12", [(17, 17), (120, 122)])[0]]
+    out = resend(tx, nacks, repair=repair, extra=1 if repair else 0)
+    assert len(out) == (6 if repair else 4)
+    if repair:
+        out = out[1:]  # any m of a window's m + extra repair frames will do
+    result = None
+    for line in out:
+        result = dec.feed(line) or result
+    assert result == bytes.fromhex(tx)
+
+
+def test_bare_stream_open_tail():
+    tx = random.Random(2).randbytes(64 * 20 - 5).hex()
+    frames = encode_frames(tx, add_parity=False)
+    demux = Demuxer()
+    for line in frames[:-2]:  # the end of the stream was lost
+        demux.feed(line)
+    (nack,) = demux_nacks(demux)
+    assert nack.startswith("N:-:18-:")
+    out = resend(tx, [nack], repair=True)  # open tails are always resent as data
+    assert out == frames[-2:]
+    assert [demux.feed(line) for line in out][-1] == ("", bytes.fromhex(tx))
+
+
+def test_resend_rejects_other_tx():
+    tx = "00" * 200
+    with pytest.raises(ValueError):
+        resend(tx, format_nack("other", [(1, 1)]), tx_id="ab12")
+    with pytest.raises(ValueError):
+        resend(tx, ["N:ab12:1:00000000"])
+
+
+def test_forged_huge_total_is_refused_and_gaps_are_not_materialised():
+    payload = bytes(64)
+    body = f"F:999999998:064:{zlib.crc32(payload):08x}:{base64.b64encode(payload).decode()}"
+    dec = Decoder()
+    assert dec.feed("X:abc:999999999:" + body) is None
+    assert dec.stats.rejected == {"invalid": 1} and dec.missing_ranges() == []  # nothing sized by the forgery
+    assert max_frames(64) == 65536
+    dec = Decoder()
+    dec.feed("X:abc:065536:" + body.replace("999999998", "065535"))  # the largest a 64-byte frame allows
+    assert dec.missing_ranges() == [(0, 65534)]
+    assert nack_for(dec, "abc")[0].startswith("N:abc:0-65534:")
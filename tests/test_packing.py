@@ -0,0 +1,46 @@
+"""
+Tests for courier.packing
+"""
+import os
+
+import pytest
+
+from courier.foundry_courier import decode_frames, encode_frames
+from courier.packing import PROFILES, pack, profile_for, unpack
+
+
+def test_pack_roundtrip_fewer_messages():
+    tx = os.urandom(600).hex()
+    frames = encode_frames(tx, frame_payload_bytes=32)
+    for name in ("sms-gsm7", "lora", "qr"):
+        profile = PROFILES[name]
+        units = pack(frames, profile)
+        assert len(units) < len(frames)
+        assert all(profile.cost(u) <= profile.capacity for u in units)
+        assert sorted(unpack(units)) == sorted(frames)
+        assert decode_frames(unpack(units)) == bytes.fromhex(tx)
+
+
+def test_units_are_striped_across_groups():
+    frames = encode_frames(os.urandom(600).hex(), frame_payload_bytes=32)
+    units = pack(frames, PROFILES["sms-gsm7"])
+    n = len(units)
+    assert [unpack([u]) for u in units] == [frames[j::n] for j in range(n)]
+
+
+def test_gsm7_costs_and_sms_fallback():
+    gsm7 = PROFILES["sms-gsm7"]
+    assert gsm7.cost("F:1:AB+/=") == 9
+    assert gsm7.cost("{[]}") == 8  # extension characters take an escape septet
+    assert gsm7.cost("a`b") is None
+    assert profile_for("sms", ["F:000000:001:00000000:AA=="]).name == "sms-gsm7"
+    assert profile_for("sms", ["F:000000:001:00000000:AA==", "~a`b"]).name == "sms-ucs2"
+    assert PROFILES["aprs"].cost("~abc") is None
+
+
+def test_pack_rejects_oversized_frames():
+    frames = encode_frames(os.urandom(100).hex(), frame_payload_bytes=64)
+    with pytest.raises(ValueError, match="smaller frame size"):
+        pack(frames, PROFILES["aprs"])
+    with pytest.raises(ValueError):
+        profile_for("pigeon")
@@ -0,0 +1,49 @@
+"""
+Tests for courier.parity
+"""
+import os
+
+from courier.parity import XorAccumulator, xor_parity
+
+
+def _ref_xor(parts, size):
+    out = bytearray(size)
+    for p in parts:
+        for i, b in enumerate(p[:size]):
+            out[i] ^= b
+    return bytes(out)
+
+
+def test_xor_parity_matches_reference_with_short_parts():
+    parts = [os.urandom(64), os.urandom(64), os.urandom(17)]
+    assert xor_parity(parts, 64) == _ref_xor(parts, 64)
+
+
+def test_xor_parity_accepts_memoryview_and_truncates():
+    raw = os.urandom(100)
+    mv = memoryview(raw)
+    assert xor_parity([mv[:50], mv[50:]], 50) == _ref_xor([raw[:50], raw[50:]], 50)
+    assert xor_parity([raw], 10) == raw[:10]
+
+
+def test_accumulator_self_inverse():
+    parts = [os.urandom(32) for _ in range(8)]
+    acc = XorAccumulator()
+    for p in parts:
+        acc.add(memoryview(p))
+    parity = acc.digest()
+    assert xor_parity([parity] + parts[1:], 32) == parts[0]
+    acc.reset()
+    assert acc.digest() == b""
+
+
+def test_rs_recover_any_m_losses():
+    from itertools import combinations
+    from courier.parity import rs_encode, rs_recover
+    parts = [os.urandom(16) for _ in range(6)]
+    repairs = dict(enumerate(rs_encode(parts, 3, 16)))
+    for lost in combinations(range(6), 3):
+        known = {j: p for j, p in enumerate(parts) if j not in lost}
+        for ridx in combinations(range(3), 3):
+            got = rs_recover(known, {r: repairs[r] for r in ridx}, 6, 16)
+            assert got == {j: parts[j] for j in lost}
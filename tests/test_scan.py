@@ -0,0 +1,80 @@
+"""
+Tests for courier.scan: streamed decode of noisy capture logs
+"""
+import base64
+import io
+import os
+import random
+import zlib
+
+from courier.foundry_courier import encode_frames, encode_stream, parse_frame
+from courier.scan import candidates, iter_chunks, scan
+
+
+def _noisy_log(frames, rng, noise=5):
+    out = []
+    for f in frames:
+        for _ in range(noise):
+            out.append("%d rssi=-%d " % (rng.randrange(10**9), rng.randrange(120))
+                       + "".join(rng.choice("abcXF:0123456789 ") for _ in range(rng.randrange(10, 80))))
+        prefix = rng.choice(["", "1712.550 rx: ", "[sdr0] "]) if f[0] not in "~^" else ""  # v2: line start only
+        out.append(prefix + f)
+    return ("\r\n".join(out) + "\r\n").encode()
+
+
+def test_scan_finds_every_tx_among_noise(tmp_path):
+    rng = random.Random(7)
+    txs = [os.urandom(rng.randrange(80, 900)).hex() for _ in range(12)]
+    stream = encode_stream(txs, group_size=4)
+    stream = [f for f in stream if ":F:000001:" not in f]  # one loss per tx for parity to repair
+    v2 = encode_frames(os.urandom(300).hex(), tx_id="v2tx", fmt="v2-b91")
+    log = _noisy_log(stream + v2, rng)
+    path = tmp_path / "capture.log"
+    path.write_bytes(log)
+
+    found = {}
+    summary = scan(str(path), on_tx=lambda tx_id, raw: found.__setitem__(tx_id, raw.hex()), chunk_size=4096)
+    assert sorted(v for k, v in found.items() if k != "v2tx") == sorted(txs)
+    assert "v2tx" in found
+    assert summary["lines"] == log.count(b"\n") and summary["bytes"] == len(log)
+    assert summary["valid"] == len(stream) + len(v2) <= summary["candidates"]
+    assert summary["txs"] == 13 and summary["incomplete"] == 0
+    # a stream (stdin / pipe) gives the same answer as the memory-mapped file
+    assert scan(io.BytesIO(log), chunk_size=1000) == summary
+
+
+def test_bare_stream_and_candidate_extraction():
+    tx = os.urandom(200)
+    frames = encode_frames(tx.hex())
+    got = []
+    summary = scan(io.BytesIO(_noisy_log(frames, random.Random(1), noise=2)), on_tx=lambda i, r: got.append((i, r)))
+    assert got == [("", tx)] and summary["txs"] == 1
+    chunk = b"noise F:12 x\n17.2 " + frames[0].encode() + b" rssi=-80\r\nP:not:a:frame\n"
+    assert list(candidates(chunk)) == [frames[0].encode()]
+    payload = os.urandom(16)
+    big = [f"{kind}:{n}:{len(payload):03d}:{zlib.crc32(payload):08x}:{base64.b64encode(payload).decode()}"
+           for kind, n in (("F", 1234567), ("L", 123456789))]  # seq / esi past six digits
+    assert [parse_frame(t) is not None for t in big] == [True, True]
+    assert list(candidates(("noise\n" + "\n".join(big)).encode())) == [t.encode() for t in big]
+
+
+def test_oversized_lines_are_dropped_with_bounded_memory(tmp_path):
+    tx = os.urandom(300).hex()
+    frames = encode_frames(tx, tx_id="big1")
+    junk = b"\x00" * 50000  # e.g. a binary dump with no newline, longer than max_line
+    log = ("\n".join(frames[:3]) + "\n").encode() + junk + b"\n" + ("\n".join(frames[3:]) + "\n").encode()
+    for source in (io.BytesIO(log), _write(tmp_path / "cap.log", log)):
+        skipped = []
+        chunks = list(iter_chunks(source, chunk_size=1024, max_line=4096, on_skip=skipped.append))
+        assert max(map(len, chunks)) <= 1024 + 4096
+        assert b"".join(chunks) == log.replace(junk + b"\n", b"") and skipped == [len(junk) + 1]
+    summary = scan(io.BytesIO(log), chunk_size=1024)
+    assert summary["txs"] == 1 and summary["oversized"] == 0  # 50 kB is under the default cap
+    found = []
+    summary = scan(io.BytesIO(junk * 2 + b"\n" + log), on_tx=lambda i, r: found.append(r.hex()), chunk_size=1024)
+    assert found == [tx] and summary["oversized"] == 1 and summary["bytes"] == len(log) + 2 * len(junk) + 1
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
@@ -0,0 +1,164 @@
+"""
+Tests for tools.spool and gateway restart recovery
+"""
+import os
+import queue
+import sqlite3
+import time
+from concurrent.futures import Future
+
+from web3 import Web3
+
+from courier.foundry_courier import encode_frames
+from courier.reassembly import ReassemblyTable
+from tools.broadcast_cache import BroadcastCache
+from tools.spool import Spool
+
+
+def test_replay_skips_completed_and_resolved(tmp_path):
+    path = str(tmp_path / "spool.db")
+    spool = Spool(path, flush_interval=0.2)
+    for i in range(500):
+        spool.add_frame("tx:a", "s1", f"a{i}")
+    spool.add_frame("tx:b", "s2", "b0")
+    spool.complete("tx:a", "0xaa", b"\x01\x02")
+    spool.add_frame("sender:s3", "s3", "c0")
+    spool.complete("sender:s3")
+    spool.add_frame("sender:s3", "s3", "c1")  # next bare stream of the same sender
+    spool.complete("tx:b", "0xbb", b"\x03")
+    spool.resolved("0xbb")
+    assert spool.flush(5)
+    assert spool.commits < 10  # batched, not one commit per frame
+    spool.close()
+
+    spool = Spool(path)  # restart
+    assert spool.frames() == [("sender:s3", "s3", "c1")]
+    assert spool.pending() == [("0xaa", b"\x01\x02")]
+    assert spool.compact() == 502
+    assert spool.frames() == [("sender:s3", "s3", "c1")] and spool.stats()["frames"] == 1
+    spool.close()
+
+
+def test_expired_frames_are_not_replayed(tmp_path):
+    now = [1000.0]
+    spool = Spool(str(tmp_path / "spool.db"), ttl=60, clock=lambda: now[0])
+    spool.add_frame("tx:a", "s1", "old")
+    spool.flush(5)
+    now[0] += 61
+    spool.add_frame("tx:b", "s1", "new")
+    spool.flush(5)
+    assert [line for _, _, line in spool.frames()] == ["new"]
+    assert spool.compact() == 1
+    spool.close()
+
+
+def test_gateway_resumes_partial_tx_and_pending_broadcast(tmp_path, monkeypatch):
+    from gateways import sms_gateway
+
+    sent = []
+
+    class FakeDispatcher:
+        def __init__(self, answer=True):
+            self.answer = answer
+
+        def submit(self, raw_hex, block=False, timeout=None):
+            sent.append(raw_hex)
+            fut = Future()
+            if self.answer:
+                fut.set_result("0x" + "00" * 32)
+            return fut
+
+    path = str(tmp_path / "spool.db")
+    tx1, tx2 = os.urandom(300).hex(), os.urandom(200).hex()
+    frames1, frames2 = encode_frames(tx1, tx_id="t1"), encode_frames(tx2)
+
+    def start(answer):
+        spool = Spool(path)
+        monkeypatch.setattr(sms_gateway, "dispatcher", FakeDispatcher(answer))
+        monkeypatch.setattr(sms_gateway, "table", ReassemblyTable())
+        monkeypatch.setattr(sms_gateway, "cache", BroadcastCache())
+        monkeypatch.setattr(sms_gateway, "spool", spool)
+        sms_gateway._replay_spool()
+        sms_gateway.table.on_frame = spool.add_frame
+        return spool, sms_gateway.app.test_client()
+
+    spool, client = start(answer=False)  # the node never answers before the crash
+    assert client.post("/frames", data="\n".join(frames1[:3])).status_code == 202
+    assert client.post("/frames", data="\n".join(frames2)).status_code == 200
+    spool.close()  # crash: partial tx1 and unanswered broadcast of tx2 are on disk
+
+    spool, client = start(answer=True)
+    assert sent == [tx2, tx2]  # re-queued from the spool
+    res = client.post("/frames", data="\n".join(frames1[3:]))
+    assert res.status_code == 200 and sent[-1] == tx1
+    spool.flush(5)
+    assert spool.pending() == [] and spool.frames() == []
+    spool.close()
+
+
+def test_gateway_replay_survives_bad_rows_and_a_full_queue(tmp_path, monkeypatch):
+    from gateways import sms_gateway
+
+    class FullDispatcher:
+        def submit(self, raw_hex, block=False, timeout=None):
+            raise queue.Full
+
+    class PickyTable(ReassemblyTable):
+        def feed(self, sender, lines, final=False, report=None):
+            if lines == ["boom"]:
+                raise ValueError("decoder bug")
+            return super().feed(sender, lines, final, report)
+
+    path = str(tmp_path / "spool.db")
+    tx = os.urandom(100).hex()
+    spool = Spool(path)
+    spool.add_frame("sender:s1", "s1", "boom")
+    spool.complete("tx:a", "0xaa", b"\x01")
+    for line in encode_frames(tx, tx_id="t1"):
+        spool.add_frame("tx:t1", "s1", line)
+    spool.close()
+
+    spool = Spool(path)
+    monkeypatch.setattr(sms_gateway, "dispatcher", FullDispatcher())
+    monkeypatch.setattr(sms_gateway, "table", PickyTable())
+    monkeypatch.setattr(sms_gateway, "cache", BroadcastCache())
+    monkeypatch.setattr(sms_gateway, "spool", spool)
+    monkeypatch.setattr(sms_gateway, "REPLAY_TIMEOUT", 0.01)
+    sms_gateway._replay_spool()  # neither the bad row nor the full queue stops the startup
+    spool.flush(5)
+    assert all(line != "boom" for _, _, line in spool.frames())
+    # neither the spooled broadcast nor the replayed tx is lost: both wait for the next restart
+    assert [h for h, _ in spool.pending()] == ["0xaa", Web3.keccak(bytes.fromhex(tx)).hex()]
+    assert sms_gateway.cache.get("0xaa") is None
+    spool.close()
+
+
+def test_frame_that_raises_is_not_spooled():
+    spooled = []
+    table = ReassemblyTable(on_frame=lambda key, sender, line: spooled.append(line))
+    frames = encode_frames(os.urandom(100).hex(), tx_id="t1")
+    table.feed("s1", frames[:1])
+    entry = table._entries["tx:t1"]
+    entry.decoder.feed_frame = lambda fr: 1 / 0
+    try:
+        table.feed("s1", frames[1:2])
+    except ZeroDivisionError:
+        pass
+    assert spooled == frames[:1]
+
+
+def test_failed_compaction_does_not_stop_the_writer(tmp_path, monkeypatch):
+    spool = Spool(str(tmp_path / "spool.db"), compact_interval=0.01)
+
+    def broken():
+        spool._db.execute("BEGIN IMMEDIATE")
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(spool, "compact", broken)
+    spool.add_frame("tx:a", "s1", "a0")
+    assert spool.flush(5)
+    time.sleep(0.1)
+    spool.add_frame("tx:a", "s1", "a1")
+    assert spool.flush(5)
+    assert spool.errors >= 1 and len(spool.frames()) == 2
+    spool.close()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Idempotent rebroadcast cache.
+
+Mesh flooding delivers the same tx to a gateway from many relays. The cache
+remembers recently broadcast txs by hash (txid / keccak of the raw bytes)
+so every copy after the first is answered from memory instead of costing
+another RPC round-trip.
+
+- LRU + TTL: at most max_entries hashes, each forgotten ttl seconds after it
+  was stored.
+- Optional persistence: with path set, the cache is loaded at start and
+  every change is appended to the file as one JSON line ([hash, at, result]
+  for a put, [hash] for a discard), so a restarted gateway still recognises
+  txs it broadcast a moment ago. Once the journal holds more than twice
+  max_entries lines it is rewritten from memory (atomically, via a temp
+  file). Timestamps are wall-clock for that reason. A disk error is logged
+  and counted (errors); the cache itself keeps working.
+- hits / misses counters; hit_rate() for monitoring.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+log = logging.getLogger(__name__)
+
+
+class BroadcastCache:
+    def __init__(self, ttl: float = 3600.0, max_entries: int = 10000, path: Optional[str] = None,
+                 clock: Callable[[], float] = time.time):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.path = path
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._journal = None  # append handle on path
+        self._lines = 0  # journal lines since the last rewrite
+        if path:
+            self._load()
+            self._rewrite()
+
+    def get(self, tx_hash: str) -> Optional[Any]:
+        """Cached result for tx_hash (counted as a hit), or None (a miss)."""
+        with self._lock:
+            now = self.clock()
+            self._expire(now)
+            entry = self._entries.get(tx_hash)
+            if entry is None or now - entry[0] > self.ttl:
+                self._entries.pop(tx_hash, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(tx_hash)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, tx_hash: str, result: Any) -> None:
+        """Store (or refresh) the broadcast result for tx_hash; result must be JSON-serialisable."""
+        with self._lock:
+            now = self.clock()
+            self._entries[tx_hash] = (now, result)
+            self._entries.move_to_end(tx_hash)
+            self._expire(now)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._append([tx_hash, now, result])
+
+    def discard(self, tx_hash: str) -> None:
+        """Forget tx_hash (e.g. its broadcast failed and a later copy should retry)."""
+        with self._lock:
+            if self._entries.pop(tx_hash, None) is not None:
+                self._append([tx_hash])
+
+    def close(self) -> None:
+        """Rewrite the journal compactly and close it."""
+        with self._lock:
+            if self.path:
+                self._rewrite()
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses, "hit_rate": self.hit_rate(),
+                "errors": self.errors}
+
+    def __contains__(self, tx_hash: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(tx_hash)
+            return entry is not None and self.clock() - entry[0] <= self.ttl
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _expire(self, now: float) -> None:
+        # LRU order is close to age order; stale entries behind a recently used one
+        # are caught on lookup or pushed out by the size cap
+        while self._entries:
+            tx_hash, (at, _) = next(iter(self._entries.items()))
+            if now - at <= self.ttl:
+                break
+            del self._entries[tx_hash]
+
+    def _load(self) -> None:
+        try:
+            with open(self.path, "r") as fh:
+                lines = fh.readlines()
+        except OSError:
+            return  # missing file: start empty
+        rows = []
+        for line in lines:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue  # damaged (e.g. a line cut short by a crash)
+            if isinstance(row, list) and row and isinstance(row[0], list):
+                rows.extend(row)  # a whole-file snapshot written by older versions
+            elif isinstance(row, list) and row:
+                rows.append(row)
+        now = self.clock()
+        for row in rows:
+            if len(row) == 1:
+                self._entries.pop(row[0], None)
+            elif len(row) == 3 and now - row[1] <= self.ttl:
+                self._entries[row[0]] = (row[1], row[2])
+                self._entries.move_to_end(row[0])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _append(self, row: list) -> None:
+        if not self.path:
+            return
+        self._lines += 1
+        if self._journal is not None:
+            try:
+                self._journal.write(json.dumps(row) + "\n")
+                self._journal.flush()
+            except OSError as e:
+                self.errors += 1
+                log.warning("dedup journal %s: %s", self.path, e)
+        if self._lines > 2 * self.max_entries:
+            self._rewrite()
+
+    def _rewrite(self) -> None:
+        tmp = f"{self.path}.tmp"
+        try:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            with open(tmp, "w") as fh:
+                for h, (at, result) in self._entries.items():
+                    fh.write(json.dumps([h, at, result]) + "\n")
+            os.replace(tmp, self.path)
+            self._lines = len(self._entries)
+            self._journal = open(self.path, "a")
+        except OSError as e:
+            # no journal until a rewrite succeeds (tried again after as many changes): the cache keeps working
+            self._lines = 0
+            self.errors += 1
+            log.warning("dedup journal %s: %s", self.path, e)
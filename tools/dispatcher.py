@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Broadcast dispatcher for BTC and ETH raw transactions.
+
+- JsonRpcClient: one keep-alive requests.Session (pooled connections) per
+  node, with JSON-RPC batch support (many calls per HTTP round-trip).
+- BroadcastDispatcher: a bounded queue drained by worker threads. Each
+  worker collects up to max_batch pending txs (waiting at most linger
+  seconds), sends them as one batch request, and resolves one Future per
+  tx. Transport failures (connection errors, timeouts, HTTP 5xx) are
+  retried with exponential backoff; a node rejecting a tx is final.
+  Futures cancelled while queued are skipped, and a batch that fails in an
+  unexpected way fails its own futures without stopping the worker.
+
+Callers never block on the node: submit() returns a Future right away and
+raises queue.Full when the queue is at capacity.
+
+btc_dispatcher/eth_dispatcher take one node URL or several (a list, or
+comma-separated); several are driven through tools.hedged.HedgedClient,
+which races them and keeps the first success.
+"""
+import itertools
+import json
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class RpcError(Exception):
+    """The node answered and rejected the call (not retried)."""
+
+    def __init__(self, error: Any):
+        self.error = error
+        msg = error.get("message", error) if isinstance(error, dict) else error
+        super().__init__(str(msg))
+
+
+class TransportError(Exception):
+    """The node could not be reached or answered garbage (retried)."""
+
+
+class JsonRpcClient:
+    def __init__(self, url: str, auth: Optional[Tuple[str, str]] = None, timeout: float = 10.0,
+                 pool_size: int = 8, jsonrpc: str = "2.0"):
+        self.url = url
+        self.timeout = timeout
+        self.jsonrpc = jsonrpc
+        self.session = requests.Session()
+        self.session.auth = auth
+        self.session.headers["Content-Type"] = "application/json"
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._ids = itertools.count(1)
+
+    def _post(self, payload: Any) -> Any:
+        try:
+            r = self.session.post(self.url, data=json.dumps(payload), timeout=self.timeout)
+        except requests.RequestException as e:
+            raise TransportError(str(e)) from e
+        if r.status_code == 429 or r.status_code > 500:
+            raise TransportError(f"HTTP {r.status_code}")
+        try:
+            # bitcoind answers rejected txs with HTTP 500 and a JSON error body
+            return r.json()
+        except ValueError as e:
+            raise TransportError(f"HTTP {r.status_code}: non-JSON response") from e
+
+    def call(self, method: str, params: Sequence[Any]) -> Any:
+        result, error = self.batch([(method, params)])[0]
+        if error is not None:
+            raise RpcError(error)
+        return result
+
+    def batch(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Tuple[Any, Any]]:
+        """Send calls in one HTTP request; returns [(result, error)] in call order."""
+        ids = [next(self._ids) for _ in calls]
+        payload = [{"jsonrpc": self.jsonrpc, "id": i, "method": m, "params": list(p)} for i, (m, p) in zip(ids, calls)]
+        reply = self._post(payload if len(payload) > 1 else payload[0])
+        if isinstance(reply, dict):
+            reply = [reply]
+        if not isinstance(reply, list):
+            raise TransportError("malformed JSON-RPC reply")
+        by_id = {item.get("id"): item for item in reply if isinstance(item, dict)}
+        if len(payload) == 1 and len(reply) == 1 and ids[0] not in by_id:
+            by_id[ids[0]] = reply[0]  # some nodes echo id as a string or null on errors
+        out = []
+        for i in ids:
+            item = by_id.get(i)
+            if item is None:
+                out.append((None, {"message": "missing reply in batch"}))
+            else:
+                out.append((item.get("result"), item.get("error")))
+        return out
+
+    def close(self) -> None:
+        self.session.close()
+
+
+class BroadcastDispatcher:
+    def __init__(self, client: JsonRpcClient, method: str, param=lambda raw_hex: [raw_hex],
+                 max_queue: int = 1000, max_batch: int = 50, linger: float = 0.02,
+                 retries: int = 3, backoff: float = 0.5, workers: int = 1):
+        self.client = client
+        self.method = method
+        self.param = param
+        self.max_batch = max_batch
+        self.linger = linger
+        self.retries = retries
+        self.backoff = backoff
+        self.sent = self.failed = self.retried = 0
+        self._queue: "queue.Queue[Optional[Tuple[str, Future]]]" = queue.Queue(maxsize=max_queue)
+        self._threads = [threading.Thread(target=self._run, name=f"broadcast-{i}", daemon=True)
+                         for i in range(workers)]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, raw_hex: str, block: bool = False, timeout: Optional[float] = None) -> Future:
+        """Queue one raw tx (hex, no 0x); raises queue.Full if the queue is at capacity."""
+        fut: Future = Future()
+        self._queue.put((raw_hex, fut), block=block, timeout=timeout)
+        return fut
+
+    def broadcast(self, raw_hex: str, timeout: Optional[float] = None) -> Any:
+        """Submit and wait for the node's answer (txid / tx hash)."""
+        return self.submit(raw_hex, block=True).result(timeout=timeout)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Drain the queue, then stop the workers."""
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout)
+        self.client.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            items = [item]
+            stop = False
+            deadline = time.monotonic() + self.linger
+            while len(items) < self.max_batch:
+                try:
+                    nxt = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if nxt is None:
+                    stop = True
+                    break
+                items.append(nxt)
+            try:
+                self._send(items)
+            except Exception as e:  # a malformed reply or a bug: fail this batch, keep draining the queue
+                self._fail(items, e)
+            if stop:
+                return
+
+    def _send(self, items: List[Tuple[str, Future]]) -> None:
+        # claims the futures: from here on a caller can no longer cancel them
+        items = [(raw_hex, fut) for raw_hex, fut in items if fut.set_running_or_notify_cancel()]
+        if not items:
+            return
+        calls = [(self.method, self.param(raw_hex)) for raw_hex, _ in items]
+        for attempt in range(self.retries + 1):
+            try:
+                replies = self.client.batch(calls)
+                break
+            except TransportError as e:
+                if attempt == self.retries:
+                    self._fail(items, e)
+                    return
+                self.retried += 1
+                time.sleep(self.backoff * (2 ** attempt))
+        if len(replies) != len(items):
+            raise TransportError(f"{len(replies)} replies to a batch of {len(items)}")
+        for (_, fut), (result, error) in zip(items, replies):
+            if error is not None:
+                self.failed += 1
+                fut.set_exception(RpcError(error))
+            else:
+                self.sent += 1
+                fut.set_result(result)
+
+    def _fail(self, items: List[Tuple[str, Future]], exc: BaseException) -> None:
+        for _, fut in items:
+            if not fut.done():
+                fut.set_exception(exc)
+                self.failed += 1
+
+
+def rpc_client(rpc_url: Union[str, Sequence[str]], auth: Optional[Tuple[str, str]] = None, jsonrpc: str = "2.0",
+               hedge: Optional[dict] = None):
+    """A JsonRpcClient for one URL; a HedgedClient (options from hedge) for several."""
+    urls = rpc_url.split(",") if isinstance(rpc_url, str) else list(rpc_url)
+    urls = [u.strip() for u in urls if u.strip()]
+    if not urls:
+        raise ValueError("no RPC URL given")
+    if len(urls) == 1:
+        return JsonRpcClient(urls[0], auth=auth, jsonrpc=jsonrpc)
+    from tools.hedged import HedgedClient
+    return HedgedClient([JsonRpcClient(u, auth=auth, jsonrpc=jsonrpc) for u in urls], **(hedge or {}))
+
+
+def btc_dispatcher(rpc_url: Union[str, Sequence[str]], user: str, pwd: str, hedge: Optional[dict] = None,
+                   **kwargs) -> BroadcastDispatcher:
+    client = rpc_client(rpc_url, auth=(user, pwd), jsonrpc="1.0", hedge=hedge)
+    return BroadcastDispatcher(client, "sendrawtransaction", **kwargs)
+
+
+def eth_dispatcher(rpc_url: Union[str, Sequence[str]], hedge: Optional[dict] = None, **kwargs) -> BroadcastDispatcher:
+    client = rpc_client(rpc_url, hedge=hedge)
+    return BroadcastDispatcher(client, "eth_sendRawTransaction", param=lambda raw_hex: ["0x" + raw_hex], **kwargs)
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Hedged JSON-RPC client over several nodes: first success wins.
+
+One slow or dead node would otherwise set the broadcast latency (up to the
+timeout) or fail it outright. HedgedClient has the JsonRpcClient batch()
+interface, so a BroadcastDispatcher drives it unchanged, and sends each
+batch to the nodes in order of preference:
+
+- hedged (default): the best node first; if it has not answered after its
+  own latency percentile (p95 of its recent requests, clamped to
+  min_delay..max_delay), the next node too, and so on. A transport failure
+  launches the next node at once.
+- fanout: every node at once.
+
+A call is done as soon as any node returns a result for it; the batch is
+done when every call is, and nodes not launched yet are never contacted.
+Requests already in flight cannot be interrupted: they are abandoned and
+only update their node's statistics. A node rejecting a tx is final, as for
+JsonRpcClient: its error is returned unless another node in flight accepts
+the tx. TransportError is raised only when no node answered at all.
+
+Health and preference: each node keeps a window of recent latencies.
+Healthy nodes are ranked by median latency (untried nodes count as
+default_delay, so they get tried). A transport failure marks a node down
+for cooldown seconds, doubling per consecutive failure up to max_cooldown;
+down nodes are tried last, so a recovered node comes back on its own.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from tools.dispatcher import JsonRpcClient, RpcError, TransportError
+
+
+class Endpoint:
+    def __init__(self, client: JsonRpcClient, window: int):
+        self.client = client
+        self.url = client.url
+        parts = urlsplit(client.url)
+        self.name = f"{parts.scheme}://{parts.hostname}" + (f":{parts.port}" if parts.port else "")  # no secrets
+        self.latencies: "deque[float]" = deque(maxlen=window)
+        self.failures = 0  # consecutive transport failures
+        self.down_until = 0.0
+        self.requests = self.wins = self.errors = 0
+
+    def percentile(self, q: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgedClient:
+    def __init__(self, clients: Sequence[JsonRpcClient], fanout: bool = False, percentile: float = 0.95,
+                 min_delay: float = 0.05, max_delay: float = 2.0, default_delay: float = 0.5,
+                 cooldown: float = 5.0, max_cooldown: float = 300.0, window: int = 100,
+                 clock: Callable[[], float] = time.monotonic):
+        if not clients:
+            raise ValueError("HedgedClient needs at least one client")
+        self.endpoints = [Endpoint(c, window) for c in clients]
+        self.fanout = fanout
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.default_delay = default_delay
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.clock = clock
+        self.hedges = 0  # requests sent beyond the first node of a batch
+        self._lock = threading.Lock()
+        # abandoned requests keep a worker until their timeout: room for a few per node
+        self._pool = ThreadPoolExecutor(max_workers=4 * len(clients), thread_name_prefix="hedge")
+
+    @property
+    def url(self) -> str:
+        return ",".join(ep.url for ep in self.endpoints)
+
+    def ranked(self) -> List[Endpoint]:
+        """Endpoints in order of preference: healthy by median latency, then down ones by recovery time."""
+        now = self.clock()
+        with self._lock:
+            up = [ep for ep in self.endpoints if ep.down_until <= now]
+            down = [ep for ep in self.endpoints if ep.down_until > now]
+            up.sort(key=lambda ep: self._median(ep))
+            down.sort(key=lambda ep: ep.down_until)
+        return up + down
+
+    def hedge_delay(self, ep: Endpoint) -> float:
+        """How long to wait for ep before also asking the next node."""
+        with self._lock:
+            p = ep.percentile(self.percentile)
+        return min(self.max_delay, max(self.min_delay, p if p is not None else self.default_delay))
+
+    def call(self, method: str, params: Sequence[Any]) -> Any:
+        result, error = self.batch([(method, params)])[0]
+        if error is not None:
+            raise RpcError(error)
+        return result
+
+    def batch(self, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Tuple[Any, Any]]:
+        """Send calls to the nodes as described above; returns [(result, error)] in call order."""
+        n = len(calls)
+        results: List[Any] = [None] * n
+        errors: List[Any] = [None] * n
+        got = [False] * n
+        todo = self.ranked()
+        answers: "queue.Queue" = queue.Queue()
+        in_flight: List[Endpoint] = []
+        last_error: Optional[Exception] = None
+        answered = False
+
+        def launch() -> None:
+            ep = todo.pop(0)
+            if len(todo) < len(self.endpoints) - 1:
+                self.hedges += 1
+            in_flight.append(ep)
+            fut = self._pool.submit(self._send, ep, calls)
+            fut.add_done_callback(lambda f, ep=ep: answers.put((ep, f)))
+
+        launch()
+        while self.fanout and todo:
+            launch()
+        while in_flight:
+            # once a node has answered (rejecting some call), only the requests in flight may still win
+            wait = self.hedge_delay(in_flight[-1]) if todo and not answered else None
+            try:
+                ep, fut = answers.get(timeout=wait)
+            except queue.Empty:
+                launch()  # the newest request is slower than usual for its node: hedge
+                continue
+            in_flight.remove(ep)
+            if fut.exception() is not None:
+                last_error = fut.exception()
+                if todo:
+                    launch()
+                continue
+            answered = True
+            won = False
+            for i, (result, error) in enumerate(fut.result()):
+                if got[i]:
+                    continue
+                if error is None:
+                    results[i], got[i], won = result, True, True
+                elif errors[i] is None:
+                    errors[i] = error
+            if won:
+                with self._lock:
+                    ep.wins += 1
+            if all(got):
+                break
+        if not answered:
+            raise TransportError(f"no node answered: {last_error}")
+        return [(results[i], None) if got[i] else (None, errors[i]) for i in range(n)]
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-node health, latency percentiles (s) and counters; nodes by scheme://host:port (keys in URLs stay out)."""
+        now = self.clock()
+        with self._lock:
+            return [{"node": ep.name, "healthy": ep.down_until <= now, "p50": ep.percentile(0.5),
+                     "p95": ep.percentile(0.95), "requests": ep.requests, "wins": ep.wins, "errors": ep.errors}
+                    for ep in self.endpoints]
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+        for ep in self.endpoints:
+            ep.client.close()
+
+    def _median(self, ep: Endpoint) -> float:
+        p = ep.percentile(0.5)
+        return p if p is not None else self.default_delay
+
+    def _send(self, ep: Endpoint, calls: Sequence[Tuple[str, Sequence[Any]]]) -> List[Tuple[Any, Any]]:
+        started = time.monotonic()
+        try:
+            replies = ep.client.batch(calls)
+        except TransportError:
+            with self._lock:
+                ep.requests += 1
+                ep.errors += 1
+                ep.failures += 1
+                backoff = min(self.max_cooldown, self.cooldown * 2 ** (ep.failures - 1))
+                ep.down_until = self.clock() + backoff
+            raise
+        with self._lock:
+            ep.requests += 1
+            ep.failures = 0
+            ep.down_until = 0.0
+            ep.latencies.append(time.monotonic() - started)
+        return replies
@@ -1,17 +1,24 @@
 #!/usr/bin/env python3
 import sys, os
-from web3 import Web3
+from tools.dispatcher import eth_dispatcher
+
+def push_eth(raw, rpc_url="https://sepolia.infura.io/v3/YOUR_KEY", timeout=None, fanout=False):
+    """Broadcast one raw tx (bytes or hex) through the batched dispatcher; returns the tx hash.
+
+    rpc_url may list several nodes (comma-separated): the request is hedged
+    across them, or sent to all at once with fanout, and the first success wins.
+    """
+    raw_hex = raw.hex() if isinstance(raw, (bytes, bytearray)) else raw.strip().lower().replace("0x","")
+    with eth_dispatcher(rpc_url, hedge={"fanout": fanout}) as dispatcher:
+        return dispatcher.broadcast(raw_hex, timeout=timeout)
 
 def main():
     if len(sys.argv) < 2:
-        print("Usage: push_eth.py <raw_tx_hex> [RPC_URL]\nEnv: ETH_RPC")
+        print("Usage: push_eth.py <raw_tx_hex> [RPC_URL[,RPC_URL...]]\nEnv: ETH_RPC")
         sys.exit(1)
     raw_hex = sys.argv[1].lower().replace("0x","")
     rpc = sys.argv[2] if len(sys.argv) > 2 else os.environ.get("ETH_RPC","https://sepolia.infura.io/v3/YOUR_KEY")
-    w3 = Web3(Web3.HTTPProvider(rpc))
-    raw = bytes.fromhex(raw_hex)
-    tx_hash = w3.eth.send_raw_transaction(raw)
-    print(tx_hash.hex())
+    print(push_eth(raw_hex, rpc))
 
 if __name__ == "__main__":
     main()
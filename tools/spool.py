@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Crash-safe spool for gateway ingestion and the broadcast queue.
+
+A gateway that restarts would otherwise lose every partially received tx
+and every decoded tx still waiting for its broadcast, and senders would
+have to resend over slow carriers. The spool keeps both on disk:
+
+- frames:  every frame accepted by the reassembly table, with its entry key
+           and sender, in arrival order
+- done:    entry keys completed (frames up to that point need no replay)
+- pending: decoded txs handed to the broadcaster, until their outcome is known
+
+Storage is one SQLite database in WAL mode. Callers never touch the disk:
+appends go on a queue and a single writer thread commits them in batches
+(at most max_batch ops, or whatever arrived within flush_interval), so
+sustained ingestion costs one fsync per batch rather than one per frame.
+A crash loses at most the last flush_interval of appends; flush() waits
+for everything queued so far. Ops commit in order, so a tx marked done is
+never without its pending record.
+
+On startup, frames() and pending() return what still needs replaying. The
+writer compacts in the background every compact_interval seconds: frames
+of completed entries, frames older than ttl (their entries would have
+expired anyway) and the done markers they leave behind are deleted.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (id INTEGER PRIMARY KEY, key TEXT NOT NULL, sender TEXT NOT NULL,
+                                   line TEXT NOT NULL, at REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS frames_key ON frames (key, id);
+CREATE TABLE IF NOT EXISTS done (key TEXT PRIMARY KEY, upto INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS pending (tx_hash TEXT PRIMARY KEY, raw BLOB NOT NULL, at REAL NOT NULL);
+"""
+
+_FLUSH = object()
+_CLOSE = object()
+
+
+class Spool:
+    def __init__(self, path: str, ttl: float = 600.0, flush_interval: float = 0.05, max_batch: int = 1000,
+                 max_queue: int = 100000, compact_interval: float = 60.0, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl = ttl
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.compact_interval = compact_interval
+        self.clock = clock
+        self.commits = 0
+        self.written = 0
+        self.compacted = 0
+        self.errors = 0
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=FULL")  # the WAL is fsynced on every (batched) commit
+        self._db.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)  # a full queue blocks callers (backpressure)
+        self._last_compact = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="spool-writer", daemon=True)
+        self._thread.start()
+
+    # -- appends (queued, committed by the writer) --
+
+    def add_frame(self, key: str, sender: str, line: str) -> None:
+        """Record a frame the reassembly table accepted for entry key."""
+        self._queue.put(("frame", key, sender, line, self.clock()))
+
+    def complete(self, key: str, tx_hash: Optional[str] = None, raw: Optional[bytes] = None) -> None:
+        """Entry key is complete; with tx_hash/raw its tx is queued for broadcast (same commit)."""
+        self._queue.put(("done", key, tx_hash, raw, self.clock()))
+
+    def drop_frame(self, key: str, line: str) -> None:
+        """Forget a spooled frame of entry key that cannot be replayed."""
+        self._queue.put(("drop", key, line))
+
+    def resolved(self, tx_hash: str) -> None:
+        """The broadcast of tx_hash finished (sent or failed for good): no replay needed."""
+        self._queue.put(("resolved", tx_hash))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is committed; False on timeout."""
+        event = threading.Event()
+        self._queue.put((_FLUSH, event))
+        return event.wait(timeout)
+
+    def close(self) -> None:
+        """Commit what is queued, stop the writer and close the database."""
+        if self._thread.is_alive():
+            self._queue.put((_CLOSE,))
+            self._thread.join()
+        self._db.close()
+
+    # -- replay --
+
+    def frames(self) -> List[Tuple[str, str, str]]:
+        """(key, sender, line) of frames of entries not completed yet, in arrival order."""
+        cutoff = self.clock() - self.ttl
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT f.key, f.sender, f.line FROM frames f LEFT JOIN done d ON d.key = f.key "
+                "WHERE (d.upto IS NULL OR f.id > d.upto) AND f.at >= ? ORDER BY f.id", (cutoff,)).fetchall()
+        return rows
+
+    def pending(self) -> List[Tuple[str, bytes]]:
+        """(tx_hash, raw) of txs queued for broadcast whose outcome was never recorded."""
+        with self._lock:
+            rows = self._db.execute("SELECT tx_hash, raw FROM pending ORDER BY at").fetchall()
+        return [(h, bytes(raw)) for h, raw in rows]
+
+    def compact(self) -> int:
+        """Delete frames that no longer need replaying; returns the number of rows removed."""
+        cutoff = self.clock() - self.ttl
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            removed = db.execute("DELETE FROM frames WHERE id <= (SELECT upto FROM done WHERE done.key = frames.key)"
+                                 ).rowcount
+            removed += db.execute("DELETE FROM frames WHERE at < ?", (cutoff,)).rowcount
+            # a marker only matters while frames it covers remain
+            db.execute("DELETE FROM done WHERE NOT EXISTS (SELECT 1 FROM frames WHERE frames.key = done.key "
+                       "AND frames.id <= done.upto)")
+            db.execute("COMMIT")
+            db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self.compacted += removed
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            frames = self._db.execute("SELECT COUNT(*) FROM frames").fetchone()[0]
+            pending = self._db.execute("SELECT COUNT(*) FROM pending").fetchone()[0]
+        return {"frames": frames, "pending": pending, "queued": self._queue.qsize(), "commits": self.commits,
+                "written": self.written, "compacted": self.compacted, "errors": self.errors}
+
+    # -- writer --
+
+    def _run(self) -> None:
+        while True:
+            try:
+                first = self._queue.get(timeout=self.compact_interval)
+            except queue.Empty:
+                first = None
+            batch, events, closing = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            item = first
+            while item is not None:
+                if item[0] is _FLUSH:
+                    events.append(item[1])
+                elif item[0] is _CLOSE:
+                    closing = True
+                    break
+                else:
+                    batch.append(item)
+                if len(batch) >= self.max_batch or events:
+                    break
+                wait = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=wait) if wait > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._commit(batch)
+                except sqlite3.Error:
+                    # disk full / I/O error: the gateway keeps running without durability for this batch
+                    self.errors += 1
+                    if self._db.in_transaction:
+                        self._db.execute("ROLLBACK")
+            for event in events:
+                event.set()
+            if closing:
+                return
+            if time.monotonic() - self._last_compact >= self.compact_interval:
+                self._last_compact = time.monotonic()
+                try:
+                    self.compact()
+                except sqlite3.Error:
+                    # same as a failed commit: the writer keeps going, the next compaction catches up
+                    self.errors += 1
+                    with self._lock:
+                        if self._db.in_transaction:
+                            self._db.execute("ROLLBACK")
+
+    def _commit(self, batch: list) -> None:
+        with self._lock:
+            db = self._db
+            db.execute("BEGIN IMMEDIATE")
+            frames: list = []
+            for op in batch:
+                kind = op[0]
+                if kind == "frame":
+                    frames.append(op[1:])
+                    continue
+                if frames:  # keep ops in order: a done marker covers the frames queued before it
+                    db.executemany("INSERT INTO frames (key, sender, line, at) VALUES (?, ?, ?, ?)", frames)
+                    frames = []
+                if kind == "done":
+                    _, key, tx_hash, raw, at = op
+                    db.execute("INSERT OR REPLACE INTO done (key, upto) SELECT ?, COALESCE(MAX(id), 0) FROM frames "
+                               "WHERE key = ?", (key, key))
+                    if tx_hash is not None:
+                        db.execute("INSERT OR REPLACE INTO pending (tx_hash, raw, at) VALUES (?, ?, ?)",
+                                   (tx_hash, raw, at))
+                elif kind == "resolved":
+                    db.execute("DELETE FROM pending WHERE tx_hash = ?", (op[1],))
+                elif kind == "drop":
+                    db.execute("DELETE FROM frames WHERE key = ? AND line = ?", (op[1], op[2]))
+            if frames:
+                db.executemany("INSERT INTO frames (key, sender, line, at) VALUES (?, ?, ?, ?)", frames)
+            db.execute("COMMIT")
+            self.commits += 1
+            self.written += len(batch)